@@ -4,6 +4,17 @@ import plotly.express as px
 import plotly.graph_objects as go
 import data_loader
 import visualizations
+# pandas 2.x: data_loader의 캐시(core.frame_store)가 결과를 얕은 뷰로 공유하므로 앱 시작 시 Copy-on-Write 활성화
+# (프로세스 전역 옵션, pandas 3은 기본값)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+# [NEW] st.cache_data 히트/미스/크기 측정 래퍼
+from core import cache_metrics
+from core.cache_metrics import metered_cache_data
+# [NEW] 활성 탭만 계산
+from core.lazy_tabs import lazy_tabs, is_open
+# [NEW] 다음에 볼 가능성이 높은 결과를 백그라운드에서 사전 계산
+from core import precompute
 import os
 import io
 import glob
@@ -262,6 +273,9 @@ def load_custom_css():
 
 load_custom_css()
 
+# [NEW] 캐시 메트릭 엔드포인트 (DASHBOARD_METRICS_PORT 설정 시에만)
+cache_metrics.start_metrics_server()
+
 # [NEW] Supabase 연결 시도 (데이터 무결성 확인)
 try:
     total_records = data_loader.get_raw_data_count()
@@ -272,7 +286,7 @@ except Exception as e:
     st.stop()
 
 # [NEW] 집계 데이터 캐싱 - 핵심 성능 개선
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def get_daily_aggregated(data_id, keyword, start_date, end_date):
     """
     일자별 집계 데이터를 캐싱 (선형 차트용) - [SERVER-SIDE OPTIMIZED]
@@ -286,7 +300,7 @@ def get_daily_aggregated(data_id, keyword, start_date, end_date):
         daily = data_loader.get_keyword_trend_server(keyword, start_date, end_date)
     return daily
 
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def get_weekly_aggregated(data_id, keyword, start_date, end_date):
     """
     주간 집계 데이터를 캐싱 (막대 차트용) - [SERVER-SIDE OPTIMIZED]
@@ -318,7 +332,7 @@ def get_weekly_aggregated(data_id, keyword, start_date, end_date):
     return daily_counts, week_ranges
 
 # [NEW] 전체 키워드별 집계 데이터를 미리 계산
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def precompute_all_keyword_aggregations(data_id):
     """
     모든 키워드의 집계 데이터를 한 번에 계산하여 딕셔너리로 반환
@@ -362,7 +376,7 @@ def precompute_all_keyword_aggregations(data_id):
     
     return result
 
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def get_daily_aggregated_fast(data_id, keyword, precomputed):
     """
     미리 계산된 데이터에서 빠르게 가져오기
@@ -517,7 +531,7 @@ def create_line_chart_from_aggregated(daily_agg):
     return fig
 
 # [NEW] 파이 차트용 집계 데이터 캐싱
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def get_pie_aggregated(data_id, keyword):
     """
     파이 차트용 집계 데이터를 한 번에 캐싱
@@ -606,6 +620,100 @@ def create_pie_chart(data_dict, title, color_sequence):
     fig.update_traces(textposition='inside', textinfo='percent+label')
     return fig
 
+# [NEW] 탭 구성 (지연 탭 + 백그라운드 예열에서 공용)
+TAB_LABELS = ["주간 트렌드", "인기 검색어", "속성별 검색어", "연령별 검색어", "실패 검색어"]
+
+# Left -> Right Order: Overseas, Domestic, Hotel, Tour
+SEARCH_TYPE_CATEGORIES = [
+    ("해외여행", "package"),
+    ("국내여행", "domestic"),
+    ("호텔", "hotel"),
+    ("투어/입장권", "localTour")
+]
+
+AGE_CATEGORIES = ["20대 이하", "30대", "40대", "50대 이상"]
+
+# [NEW] 탭별 랭킹 계산 캐싱 - 탭을 열 때 또는 백그라운드 예열 시 1회만 계산
+# _df: 밑줄 인자는 해시하지 않음 (data_id가 캐시 키 역할)
+@metered_cache_data(ttl=3600, show_spinner=False)
+def get_popular_stats(data_id, _df, column=None, value=None):
+    """
+    인기 검색어 랭킹 (column/value 지정 시 해당 세그먼트만)
+    """
+    df = _df if column is None else _df[_df[column] == value]
+    return visualizations.calculate_popular_keywords_stats(df)
+
+@metered_cache_data(ttl=3600, show_spinner=False)
+def get_failed_stats(data_id, _df):
+    """
+    실패 검색어 랭킹 - [SERVER-SIDE FIX] 전수 랭킹 데이터(filtered_df) 사용
+    """
+    return visualizations.calculate_failed_keywords_stats(_df)
+
+@metered_cache_data(ttl=3600, show_spinner=False)
+def get_failed_trend_df(data_id, _trend_df):
+    """
+    실패 검색어 추이 차트용 데이터 - [SERVER-SIDE FIX] 전수 트렌드 데이터 (trend_df) 사용
+    """
+    # visualizations.py 내부 필터를 통과하도록 더미 컬럼 주입
+    plot_trend_df = _trend_df.copy()
+    plot_trend_df['total_count'] = 0
+    plot_trend_df['result_total_count'] = 0
+    plot_trend_df['service'] = 'totalsearch'
+    plot_trend_df['page'] = 1
+    plot_trend_df['quick_link_yn'] = 'N'
+    plot_trend_df['search_keyword'] = '전체' # 트렌드용
+    return visualizations.get_filtered_failed_keywords_df(plot_trend_df)
+
+def get_category_column(df):
+    """속성별 랭킹 기준 컬럼 (없으면 None → 전체 데이터 사용)"""
+    if 'pathcd' in df.columns:
+        return 'pathcd'
+    if '속성' in df.columns:
+        return '속성'
+    return None
+
+# 사전 계산할 상위 키워드 수 (파이 차트)
+PRECOMPUTE_TOP_KEYWORDS = 20
+
+def precompute_keyword_pies(data_id, filtered_df, n=PRECOMPUTE_TOP_KEYWORDS):
+    """
+    상위 n개 키워드의 파이 차트 집계를 미리 캐싱 (job 취소 시 중단)
+    일자별 추이는 키워드마다 서버 RPC가 필요하므로 사전 계산하지 않음
+    """
+    top_keywords = filtered_df['search_keyword'].value_counts().head(n).index.tolist()
+    for keyword in ["전체"] + top_keywords:
+        if precompute.cancelled():
+            return
+        get_pie_aggregated(data_id, keyword)
+
+def precompute_tasks(rank_id, filtered_df, data_id, trend_df, open_labels=()):
+    """
+    사전 계산 작업 목록 (라벨, callable) - 이미 열려 있는 탭은 제외, 앞쪽이 우선
+    """
+    category_col = get_category_column(filtered_df)
+    tasks = []
+    if "인기 검색어" not in open_labels:
+        tasks.append(("인기 검색어", lambda: get_popular_stats(rank_id, filtered_df)))
+    if "속성별 검색어" not in open_labels:
+        tasks += [
+            (f"속성별 검색어:{search_type}",
+             lambda search_type=search_type: get_popular_stats(rank_id, filtered_df, category_col, search_type))
+            for _, search_type in SEARCH_TYPE_CATEGORIES
+        ]
+    if "연령별 검색어" not in open_labels:
+        tasks += [
+            (f"연령별 검색어:{age}", lambda age=age: get_popular_stats(rank_id, filtered_df, '연령대', age))
+            for age in AGE_CATEGORIES
+        ]
+    if "실패 검색어" not in open_labels:
+        tasks += [
+            ("실패 검색어", lambda: get_failed_stats(rank_id, filtered_df)),
+            ("실패 검색어 추이", lambda: get_failed_trend_df(data_id, trend_df)),
+        ]
+    tasks.append((f"Top {PRECOMPUTE_TOP_KEYWORDS} 키워드 파이 차트", lambda: precompute_keyword_pies(data_id, filtered_df)))
+    return tasks
+
 # [NEW] Fragment를 사용한 차트 렌더링 - 부분 재실행으로 속도 향상
 @st.fragment
 def render_charts(data_id, selected_keyword, plot_df, start_date, end_date):
@@ -854,309 +962,122 @@ if connection_status:
 
     # Main Dashboard
     if not filtered_df.empty:
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "주간 트렌드", 
-            "인기 검색어", 
-            "속성별 검색어", 
-            "연령별 검색어", 
-            "실패 검색어"
-        ])
+        # [CRITICAL OPTIMIZATION] 데이터 식별자 생성 (캐싱 키)
+        data_id = f"{st.session_state.get('cached_date_range', '')}_{len(trend_df)}"
+        # [NEW] 랭킹용 식별자 (접속 경로 필터 키 포함), 인기/속성별/연령별/실패 탭에서 공용
+        rank_id = f"{st.session_state.get('cached_path_filter_key', st.session_state.get('cached_date_range', ''))}_{len(filtered_df)}"
+
+        # [UPDATED] 지연 탭: 선택된 탭 본문만 실행
+        tabs = lazy_tabs(TAB_LABELS, key="active_tab")
+        tab1, tab2, tab3, tab4, tab5 = tabs
 
         with tab1:
-            # [NEW] 키워드 검색 성능 로깅 시작
-            perf_logger.start_operation(f"키워드 검색")
+            if is_open(tab1):
+                # [NEW] 키워드 검색 성능 로깅 시작
+                perf_logger.start_operation(f"키워드 검색")
             
-            # 타이틀 스타일 (가독성 개선)
-            st.markdown("""
-                <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                    <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                        분석할 키워드 검색
-                    </p>
-                </div>
-            """, unsafe_allow_html=True)
+                # 타이틀 스타일 (가독성 개선)
+                st.markdown("""
+                    <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                        <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                            분석할 키워드 검색
+                        </p>
+                    </div>
+                """, unsafe_allow_html=True)
             
-            # [OPTIMIZED] 인기 키워드 목록 캐싱 (필터 변경 시에만 재계산)
-            filter_cache_key = st.session_state.get('cached_path_filter_key', '')
+                # [OPTIMIZED] 인기 키워드 목록 캐싱 (필터 변경 시에만 재계산)
+                filter_cache_key = st.session_state.get('cached_path_filter_key', '')
             
-            if 'cached_keyword_list' not in st.session_state or \
-               st.session_state.get('cached_keyword_list_key') != filter_cache_key:
-                t1 = time.time()
-                # 랭킹 분석용으로 로드된 filtered_df 사용 (상위 10만 행 기준)
-                top_keywords = filtered_df['search_keyword'].value_counts().head(100).index.tolist()
-                search_options = ["전체"] + top_keywords
+                if 'cached_keyword_list' not in st.session_state or \
+                   st.session_state.get('cached_keyword_list_key') != filter_cache_key:
+                    t1 = time.time()
+                    # 랭킹 분석용으로 로드된 filtered_df 사용 (상위 10만 행 기준)
+                    top_keywords = filtered_df['search_keyword'].value_counts().head(100).index.tolist()
+                    search_options = ["전체"] + top_keywords
                 
-                # 키워드 목록 캐싱
-                st.session_state['cached_keyword_list'] = search_options
-                st.session_state['cached_keyword_list_key'] = filter_cache_key
+                    # 키워드 목록 캐싱
+                    st.session_state['cached_keyword_list'] = search_options
+                    st.session_state['cached_keyword_list_key'] = filter_cache_key
                 
-                perf_logger.log_step("키워드 목록 생성 (Top 100)", time.time() - t1)
-            else:
-                # 캐시된 키워드 목록 사용 (즉시!)
-                search_options = st.session_state['cached_keyword_list']
-                perf_logger.log_step("키워드 목록 캐시 사용", 0.001)
+                    perf_logger.log_step("키워드 목록 생성 (Top 100)", time.time() - t1)
+                else:
+                    # 캐시된 키워드 목록 사용 (즉시!)
+                    search_options = st.session_state['cached_keyword_list']
+                    perf_logger.log_step("키워드 목록 캐시 사용", 0.001)
             
-            selected_keyword = st.selectbox(
-                "분석할 키워드 검색", # ID용
-                options=search_options,
-                index=0,
-                label_visibility="collapsed", # 기본 레이블 숨김
-                help="현재 기간의 인기 검색어 Top 100 중 선택하세요."
-            )
-            perf_logger.log_step("Selectbox 렌더링")
+                # [NEW] 다른 탭을 보는 동안 위젯이 렌더링되지 않아도 선택 키워드 유지
+                last_keyword = st.session_state.get('last_selected_keyword')
+                selected_keyword = st.selectbox(
+                    "분석할 키워드 검색", # ID용
+                    options=search_options,
+                    index=search_options.index(last_keyword) if last_keyword in search_options else 0,
+                    label_visibility="collapsed", # 기본 레이블 숨김
+                    help="현재 기간의 인기 검색어 Top 100 중 선택하세요."
+                )
+                st.session_state['last_selected_keyword'] = selected_keyword
+                perf_logger.log_step("Selectbox 렌더링")
             
-            # Keyword Filter (최적화: 메모리 내 빠른 필터링)
-            t2 = time.time()
-            try:
-                if selected_keyword != "전체":
-                    # .copy() 제거 - 메모리 절약
-                    plot_df = trend_df[trend_df['search_keyword'] == selected_keyword]
-                    if plot_df.empty:
-                        st.warning(f"선택하신 기간 내에 '{selected_keyword}'에 대한 데이터가 없습니다.")
-                        plot_df = pd.DataFrame()  # 빈 DataFrame으로 설정
+                # Keyword Filter (최적화: 메모리 내 빠른 필터링)
+                t2 = time.time()
+                try:
+                    if selected_keyword != "전체":
+                        # .copy() 제거 - 메모리 절약
+                        plot_df = trend_df[trend_df['search_keyword'] == selected_keyword]
+                        if plot_df.empty:
+                            st.warning(f"선택하신 기간 내에 '{selected_keyword}'에 대한 데이터가 없습니다.")
+                            plot_df = pd.DataFrame()  # 빈 DataFrame으로 설정
+                        else:
+                            st.success(f"'{selected_keyword}' 분석 결과입니다. ({len(plot_df):,}건)")
                     else:
-                        st.success(f"'{selected_keyword}' 분석 결과입니다. ({len(plot_df):,}건)")
-                else:
-                    plot_df = trend_df
-                perf_logger.log_step(f"데이터 필터링 ({selected_keyword})", time.time() - t2)
+                        plot_df = trend_df
+                    perf_logger.log_step(f"데이터 필터링 ({selected_keyword})", time.time() - t2)
 
-                # [CRITICAL OPTIMIZATION] 데이터 식별자 생성 (캐싱 키)
-                data_id = f"{st.session_state.get('cached_date_range', '')}_{len(trend_df)}"
-                
-                # 메모리 정리
-                gc.collect()
+                    # 메모리 정리
+                    gc.collect()
                 
-                # [NEW] Fragment를 사용한 부분 재실행 최적화
-                t3 = time.time()
-                render_charts(data_id, selected_keyword, plot_df, start_date, end_date)
-                perf_logger.log_step("차트 렌더링 (전체)", time.time() - t3)
+                    # [NEW] Fragment를 사용한 부분 재실행 최적화
+                    t3 = time.time()
+                    render_charts(data_id, selected_keyword, plot_df, start_date, end_date)
+                    perf_logger.log_step("차트 렌더링 (전체)", time.time() - t3)
                 
-                # 로깅 종료 (터미널에만 출력)
-                perf_logger.end_operation()
-            except Exception as e:
-                st.error(f"차트 렌더링 중 오류가 발생했습니다: {str(e)}")
-                gc.collect()
+                    # 로깅 종료 (터미널에만 출력)
+                    perf_logger.end_operation()
+                except Exception as e:
+                    st.error(f"차트 렌더링 중 오류가 발생했습니다: {str(e)}")
+                    gc.collect()
 
         with tab2:
-            # st.header("인기 검색어") 제거됨
+            if is_open(tab2):
+                # st.header("인기 검색어") 제거됨
             
-            # [SERVER-SIDE FIX] 인기 검색어 통계 계산 시 속성 정보가 포함된 filtered_df 사용
-            stats_df = visualizations.calculate_popular_keywords_stats(filtered_df)
+                # [SERVER-SIDE FIX] 인기 검색어 통계 계산 시 속성 정보가 포함된 filtered_df 사용
+                stats_df = get_popular_stats(rank_id, filtered_df)
             
-            if stats_df is not None and not stats_df.empty:
-                col1, col2 = st.columns([1, 2])
+                if stats_df is not None and not stats_df.empty:
+                    col1, col2 = st.columns([1, 2])
             
-                with col1:
-                    st.markdown("""
-                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                                Top 100 검색어 순위
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                
-                    # Format Table for display - Strictly Top 100
-                    display_df = stats_df[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy().head(100)
+                    with col1:
+                        st.markdown("""
+                            <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                                <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                                    Top 100 검색어 순위
+                                </p>
+                            </div>
+                        """, unsafe_allow_html=True)
                 
-                    # Integer casting for numeric columns
-                    display_df['rank'] = display_df['rank'].astype(int)
-                    display_df['count'] = display_df['count'].astype(int)
-                    display_df['count_change'] = display_df['count_change'].astype(int)
-                    # Convert rank_change_display to string to handle mixed types (NEW and numbers)
-                    display_df['rank_change_display'] = display_df['rank_change_display'].astype(str)
+                        # Format Table for display - Strictly Top 100
+                        display_df = stats_df[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy().head(100)
                 
-                    display_df.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
-                
-                    # Apply Pandas Styling with NEW badge support
-                    def color_rank_change(val):
-                        if val == 'NEW':
-                            return 'font-weight: bold'  # JavaScript가 색상 처리
-                        elif isinstance(val, (int, float)) and val < 0:
-                            return 'color: #DC3545'  # Bootstrap red
-                        elif isinstance(val, (int, float)) and val > 0:
-                            return ''  # 양수는 기본 색상 (테마 자동 적응)
-                        else:
-                            return ''
-                    
-                    def highlight_new_row(row):
-                        """NEW가 있는 행 전체에 배경색 적용"""
-                        if row['순위 변화'] == 'NEW':
-                            return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                        return [''] * len(row)
-                        
-                    def color_negative_red(val):
-                        if val < 0:
-                            return 'color: #DC3545'  # Bootstrap red
-                        elif val > 0:
-                            return ''  # 양수는 기본 색상 (테마 자동 적응)
-                        return ''
-                    
-                    def format_with_plus(val):
-                        if val > 0:
-                            return f"+{val:,}"
-                        return f"{val:,}"
-                    
-                    def format_rank_change(val):
-                        if val == 'NEW':
-                            return 'NEW'
-                        # Handle string values (after astype(str) conversion)
-                        if isinstance(val, str):
-                            try:
-                                num_val = float(val)
-                                return f"+{int(num_val):,}" if num_val > 0 else f"{int(num_val):,}"
-                            except ValueError:
-                                return val
-                        elif isinstance(val, (int, float)):
-                            if val > 0:
-                                return f"+{int(val):,}"
-                            return f"{int(val):,}"
-                        return str(val)
-                    
-                    def format_comma(val):
-                        return f"{val:,}"
-
-                    # [Updated Styling] Column-specific alignment using CSS selectors
-                    styled_df = display_df.style.apply(highlight_new_row, axis=1)\
-                        .map(color_negative_red, subset=['전주 대비 변화'])\
-                        .map(color_rank_change, subset=['순위 변화'])\
-                        .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
-                        .set_properties(**{
-                            'font-weight': 'normal',
-                            'font-family': 'Journey, sans-serif'
-                        })\
-                        .set_table_styles([
-                            # 헤더 스타일
-                            {
-                                'selector': 'th', 
-                                'props': [
-                                    ('background-color', '#5E2BB8'), 
-                                    ('color', 'white'), 
-                                    ('text-align', 'center !important'),
-                                    ('font-weight', 'normal'),
-                                    ('font-family', 'Journey, sans-serif')
-                                ]
-                            },
-                            # 순위 컬럼 (1번째) - 가운데
-                            {
-                                'selector': 'td.col0',
-                                'props': [('text-align', 'center !important')]
-                            },
-                            # 검색어 컬럼 (2번째) - 왼쪽
-                            {
-                                'selector': 'td.col1',
-                                'props': [('text-align', 'left !important')]
-                            },
-                            # 검색량 컬럼 (3번째) - 오른쪽
-                            {
-                                'selector': 'td.col2',
-                                'props': [('text-align', 'right !important')]
-                            },
-                            # 전주 대비 변화 컬럼 (4번째) - 오른쪽
-                            {
-                                'selector': 'td.col3',
-                                'props': [('text-align', 'right !important')]
-                            },
-                            # 순위 변화 컬럼 (5번째) - 가운데
-                            {
-                                'selector': 'td.col4',
-                                'props': [('text-align', 'center !important')]
-                            }
-                        ])
-
-                    # Display table
-                    st.dataframe(
-                        styled_df, 
-                        width="stretch", 
-                        height=800, 
-                        hide_index=True
-                    )
-                
-                with col2:
-                    # Add spacer to align with Table Header on the left
-                    st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
-                
-                    # Top 1-5 Chart (Use trend_df for 8-week history)
-                    top5_keywords = stats_df.sort_values('rank').head(5)['keyword'].tolist()
-                    if top5_keywords:
-                        fig_top5 = visualizations.plot_keyword_group_trend(
-                            trend_df, top5_keywords, title="1~5위 키워드별 검색량 추이"
-                        )
-                        st.plotly_chart(fig_top5, width="stretch")
-                
-                    # Top 6-10 Chart
-                    next5_keywords = stats_df.sort_values('rank').iloc[5:10]['keyword'].tolist()
-                    if next5_keywords:
-                        fig_next5 = visualizations.plot_keyword_group_trend(
-                            trend_df, next5_keywords, title="6~10위 키워드별 검색량 추이"
-                        )
-                        st.plotly_chart(fig_next5, width="stretch")
-            else:
-                st.info("데이터가 충분하지 않습니다.")
-
-        with tab3:
-            # st.header("속성별 인기 검색어 (Top 100)") 제거됨
-        
-            # 4 Categories as requested
-            # Left -> Right Order: Overseas, Domestic, Hotel, Tour
-            categories = [
-                ("해외여행", "package"),
-                ("국내여행", "domestic"),
-                ("호텔", "hotel"),
-                ("투어/입장권", "localTour")
-            ]
-        
-            # Layout: 4 Columns equal width
-            cols = st.columns(4)
-        
-            # Helper functions for Styling
-            def color_negative_red(val):
-                if val < 0:
-                    return 'color: #DC3545'  # Bootstrap red
-                elif val > 0:
-                    return ''  # 양수는 기본 색상 (테마 자동 적응)
-                return ''
-            
-            def format_with_plus(val):
-                if val > 0: return f"+{val:,}"
-                return f"{val:,}"
-            
-            def format_comma(val):
-                return f"{val:,}"
-
-            for i, (label, search_type) in enumerate(categories):
-                with cols[i]:
-                    # 섹션 제목 (가독성 개선)
-                    st.markdown(f"""
-                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                                {label}
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                
-                    # Filter Trend DF for specific category history
-                    # search_type 컬럼이 없으면 전체 데이터 사용
-                    if 'pathcd' in filtered_df.columns:
-                        type_df = filtered_df[filtered_df['pathcd'] == search_type]
-                    elif '속성' in filtered_df.columns:
-                        type_df = filtered_df[filtered_df['속성'] == search_type]
-                    else:
-                        type_df = filtered_df
+                        # Integer casting for numeric columns
+                        display_df['rank'] = display_df['rank'].astype(int)
+                        display_df['count'] = display_df['count'].astype(int)
+                        display_df['count_change'] = display_df['count_change'].astype(int)
+                        # Convert rank_change_display to string to handle mixed types (NEW and numbers)
+                        display_df['rank_change_display'] = display_df['rank_change_display'].astype(str)
                 
-                    # Calculate Stats
-                    stats = visualizations.calculate_popular_keywords_stats(type_df)
+                        display_df.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
                 
-                    if stats is not None and not stats.empty:
-                        # Select & Format
-                        display = stats[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy()
-                    
-                        display['rank'] = display['rank'].astype(int)
-                        display['count'] = display['count'].astype(int)
-                        display['count_change'] = display['count_change'].astype(int)
-                        # Convert rank_change_display to string to handle mixed types (NEW and numbers)
-                        display['rank_change_display'] = display['rank_change_display'].astype(str)
-                    
-                        display.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
-                    
+                        # Apply Pandas Styling with NEW badge support
                         def color_rank_change(val):
                             if val == 'NEW':
                                 return 'font-weight: bold'  # JavaScript가 색상 처리
@@ -1166,12 +1087,24 @@ if connection_status:
                                 return ''  # 양수는 기본 색상 (테마 자동 적응)
                             else:
                                 return ''
-                        
+                    
                         def highlight_new_row(row):
                             """NEW가 있는 행 전체에 배경색 적용"""
                             if row['순위 변화'] == 'NEW':
                                 return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
                             return [''] * len(row)
+                        
+                        def color_negative_red(val):
+                            if val < 0:
+                                return 'color: #DC3545'  # Bootstrap red
+                            elif val > 0:
+                                return ''  # 양수는 기본 색상 (테마 자동 적응)
+                            return ''
+                    
+                        def format_with_plus(val):
+                            if val > 0:
+                                return f"+{val:,}"
+                            return f"{val:,}"
                     
                         def format_rank_change(val):
                             if val == 'NEW':
@@ -1189,7 +1122,11 @@ if connection_status:
                                 return f"{int(val):,}"
                             return str(val)
                     
-                        styled = display.style.apply(highlight_new_row, axis=1)\
+                        def format_comma(val):
+                            return f"{val:,}"
+
+                        # [Updated Styling] Column-specific alignment using CSS selectors
+                        styled_df = display_df.style.apply(highlight_new_row, axis=1)\
                             .map(color_negative_red, subset=['전주 대비 변화'])\
                             .map(color_rank_change, subset=['순위 변화'])\
                             .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
@@ -1198,6 +1135,7 @@ if connection_status:
                                 'font-family': 'Journey, sans-serif'
                             })\
                             .set_table_styles([
+                                # 헤더 스타일
                                 {
                                     'selector': 'th', 
                                     'props': [
@@ -1208,94 +1146,367 @@ if connection_status:
                                         ('font-family', 'Journey, sans-serif')
                                     ]
                                 },
-                                {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
-                                {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
-                                {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
-                                {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
-                                {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
+                                # 순위 컬럼 (1번째) - 가운데
+                                {
+                                    'selector': 'td.col0',
+                                    'props': [('text-align', 'center !important')]
+                                },
+                                # 검색어 컬럼 (2번째) - 왼쪽
+                                {
+                                    'selector': 'td.col1',
+                                    'props': [('text-align', 'left !important')]
+                                },
+                                # 검색량 컬럼 (3번째) - 오른쪽
+                                {
+                                    'selector': 'td.col2',
+                                    'props': [('text-align', 'right !important')]
+                                },
+                                # 전주 대비 변화 컬럼 (4번째) - 오른쪽
+                                {
+                                    'selector': 'td.col3',
+                                    'props': [('text-align', 'right !important')]
+                                },
+                                # 순위 변화 컬럼 (5번째) - 가운데
+                                {
+                                    'selector': 'td.col4',
+                                    'props': [('text-align', 'center !important')]
+                                }
                             ])
-                    
+
+                        # Display table
                         st.dataframe(
-                            styled, 
+                            styled_df, 
                             width="stretch", 
                             height=800, 
                             hide_index=True
                         )
-                    else:
-                        st.info("데이터 없음")
+                
+                    with col2:
+                        # Add spacer to align with Table Header on the left
+                        st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
+                
+                        # Top 1-5 Chart (Use trend_df for 8-week history)
+                        top5_keywords = stats_df.sort_values('rank').head(5)['keyword'].tolist()
+                        if top5_keywords:
+                            fig_top5 = visualizations.plot_keyword_group_trend(
+                                trend_df, top5_keywords, title="1~5위 키워드별 검색량 추이"
+                            )
+                            st.plotly_chart(fig_top5, width="stretch")
+                
+                        # Top 6-10 Chart
+                        next5_keywords = stats_df.sort_values('rank').iloc[5:10]['keyword'].tolist()
+                        if next5_keywords:
+                            fig_next5 = visualizations.plot_keyword_group_trend(
+                                trend_df, next5_keywords, title="6~10위 키워드별 검색량 추이"
+                            )
+                            st.plotly_chart(fig_next5, width="stretch")
+                else:
+                    st.info("데이터가 충분하지 않습니다.")
 
-        with tab4:
-            # st.header("연령별 인기 검색어") 제거됨
+        with tab3:
+            if is_open(tab3):
+                # st.header("속성별 인기 검색어 (Top 100)") 제거됨
         
-            # 4 Age Categories
-            age_categories = ["20대 이하", "30대", "40대", "50대 이상"]
+                # 4 Categories as requested
+                # Left -> Right Order: Overseas, Domestic, Hotel, Tour
+                categories = SEARCH_TYPE_CATEGORIES
+                category_col = get_category_column(filtered_df)
         
-            # Layout: 4 Columns
-            age_cols = st.columns(4)
+                # Layout: 4 Columns equal width
+                cols = st.columns(4)
         
-            for i, age_label in enumerate(age_categories):
-                with age_cols[i]:
-                    # 섹션 제목 (가독성 개선)
-                    st.markdown(f"""
-                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                                {age_label}
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
+                # Helper functions for Styling
+                def color_negative_red(val):
+                    if val < 0:
+                        return 'color: #DC3545'  # Bootstrap red
+                    elif val > 0:
+                        return ''  # 양수는 기본 색상 (테마 자동 적응)
+                    return ''
+            
+                def format_with_plus(val):
+                    if val > 0: return f"+{val:,}"
+                    return f"{val:,}"
+            
+                def format_comma(val):
+                    return f"{val:,}"
+
+                for i, (label, search_type) in enumerate(categories):
+                    with cols[i]:
+                        # 섹션 제목 (가독성 개선)
+                        st.markdown(f"""
+                            <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                                <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                                    {label}
+                                </p>
+                            </div>
+                        """, unsafe_allow_html=True)
                 
-                    # Filter Aggregate DF for specific age (using filtered_df which has age info)
-                    age_df = filtered_df[filtered_df['연령대'] == age_label]
+                        # Filter Trend DF for specific category history
+                        # search_type 컬럼이 없으면 전체 데이터 사용
+                        stats = get_popular_stats(rank_id, filtered_df, category_col, search_type)
                 
-                    # Calculate Stats
-                    age_stats = visualizations.calculate_popular_keywords_stats(age_df)
+                        if stats is not None and not stats.empty:
+                            # Select & Format
+                            display = stats[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy()
+                    
+                            display['rank'] = display['rank'].astype(int)
+                            display['count'] = display['count'].astype(int)
+                            display['count_change'] = display['count_change'].astype(int)
+                            # Convert rank_change_display to string to handle mixed types (NEW and numbers)
+                            display['rank_change_display'] = display['rank_change_display'].astype(str)
+                    
+                            display.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
+                    
+                            def color_rank_change(val):
+                                if val == 'NEW':
+                                    return 'font-weight: bold'  # JavaScript가 색상 처리
+                                elif isinstance(val, (int, float)) and val < 0:
+                                    return 'color: #DC3545'  # Bootstrap red
+                                elif isinstance(val, (int, float)) and val > 0:
+                                    return ''  # 양수는 기본 색상 (테마 자동 적응)
+                                else:
+                                    return ''
+                        
+                            def highlight_new_row(row):
+                                """NEW가 있는 행 전체에 배경색 적용"""
+                                if row['순위 변화'] == 'NEW':
+                                    return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
+                                return [''] * len(row)
+                    
+                            def format_rank_change(val):
+                                if val == 'NEW':
+                                    return 'NEW'
+                                # Handle string values (after astype(str) conversion)
+                                if isinstance(val, str):
+                                    try:
+                                        num_val = float(val)
+                                        return f"+{int(num_val):,}" if num_val > 0 else f"{int(num_val):,}"
+                                    except ValueError:
+                                        return val
+                                elif isinstance(val, (int, float)):
+                                    if val > 0:
+                                        return f"+{int(val):,}"
+                                    return f"{int(val):,}"
+                                return str(val)
+                    
+                            styled = display.style.apply(highlight_new_row, axis=1)\
+                                .map(color_negative_red, subset=['전주 대비 변화'])\
+                                .map(color_rank_change, subset=['순위 변화'])\
+                                .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
+                                .set_properties(**{
+                                    'font-weight': 'normal',
+                                    'font-family': 'Journey, sans-serif'
+                                })\
+                                .set_table_styles([
+                                    {
+                                        'selector': 'th', 
+                                        'props': [
+                                            ('background-color', '#5E2BB8'), 
+                                            ('color', 'white'), 
+                                            ('text-align', 'center !important'),
+                                            ('font-weight', 'normal'),
+                                            ('font-family', 'Journey, sans-serif')
+                                        ]
+                                    },
+                                    {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
+                                    {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
+                                    {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
+                                    {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
+                                    {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
+                                ])
+                    
+                            st.dataframe(
+                                styled, 
+                                width="stretch", 
+                                height=800, 
+                                hide_index=True
+                            )
+                        else:
+                            st.info("데이터 없음")
+
+        with tab4:
+            if is_open(tab4):
+                # st.header("연령별 인기 검색어") 제거됨
+        
+                # 4 Age Categories
+                age_categories = AGE_CATEGORIES
+        
+                # Layout: 4 Columns
+                age_cols = st.columns(4)
+        
+                # Helper functions for Styling
+                # (지연 탭에서는 속성별 탭이 실행되지 않을 수 있으므로 이 탭에서도 정의)
+                def color_negative_red(val):
+                    if val < 0:
+                        return 'color: #DC3545'  # Bootstrap red
+                    elif val > 0:
+                        return ''  # 양수는 기본 색상 (테마 자동 적응)
+                    return ''
+            
+                def format_with_plus(val):
+                    if val > 0: return f"+{val:,}"
+                    return f"{val:,}"
+            
+                def format_comma(val):
+                    return f"{val:,}"
+        
+                for i, age_label in enumerate(age_categories):
+                    with age_cols[i]:
+                        # 섹션 제목 (가독성 개선)
+                        st.markdown(f"""
+                            <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                                <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                                    {age_label}
+                                </p>
+                            </div>
+                        """, unsafe_allow_html=True)
+                
+                        # Filter Aggregate DF for specific age (using filtered_df which has age info)
+                        age_stats = get_popular_stats(rank_id, filtered_df, '연령대', age_label)
                 
-                    if age_stats is not None and not age_stats.empty:
-                        # Select & Format
-                        age_display = age_stats[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy().head(100)
+                        if age_stats is not None and not age_stats.empty:
+                            # Select & Format
+                            age_display = age_stats[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy().head(100)
                     
-                        age_display['rank'] = age_display['rank'].astype(int)
-                        age_display['count'] = age_display['count'].astype(int)
-                        age_display['count_change'] = age_display['count_change'].astype(int)
-                        # Convert rank_change_display to string to handle mixed types (NEW and numbers)
-                        age_display['rank_change_display'] = age_display['rank_change_display'].astype(str)
+                            age_display['rank'] = age_display['rank'].astype(int)
+                            age_display['count'] = age_display['count'].astype(int)
+                            age_display['count_change'] = age_display['count_change'].astype(int)
+                            # Convert rank_change_display to string to handle mixed types (NEW and numbers)
+                            age_display['rank_change_display'] = age_display['rank_change_display'].astype(str)
                     
-                        age_display.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
+                            age_display.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
                     
-                        # Styles matching previous tabs
-                        def color_rank_change(val):
-                            if val == 'NEW':
-                                return 'font-weight: bold'  # JavaScript가 색상 처리
-                            elif isinstance(val, (int, float)) and val < 0:
-                                return 'color: #DC3545'  # Bootstrap red
-                            elif isinstance(val, (int, float)) and val > 0:
-                                return ''  # 양수는 기본 색상 (테마 자동 적응)
-                            return ''
+                            # Styles matching previous tabs
+                            def color_rank_change(val):
+                                if val == 'NEW':
+                                    return 'font-weight: bold'  # JavaScript가 색상 처리
+                                elif isinstance(val, (int, float)) and val < 0:
+                                    return 'color: #DC3545'  # Bootstrap red
+                                elif isinstance(val, (int, float)) and val > 0:
+                                    return ''  # 양수는 기본 색상 (테마 자동 적응)
+                                return ''
                         
-                        def highlight_new_row(row):
-                            """NEW가 있는 행 전체에 배경색 적용"""
-                            if row['순위 변화'] == 'NEW':
-                                return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                            return [''] * len(row)
+                            def highlight_new_row(row):
+                                """NEW가 있는 행 전체에 배경색 적용"""
+                                if row['순위 변화'] == 'NEW':
+                                    return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
+                                return [''] * len(row)
                     
-                        def format_rank_change(val):
-                            if val == 'NEW': return 'NEW'
-                            # Handle string values (after astype(str) conversion)
-                            if isinstance(val, str):
-                                try:
-                                    num_val = float(val)
-                                    return f"+{int(num_val):,}" if num_val > 0 else f"{int(num_val):,}"
-                                except ValueError:
-                                    return val
-                            elif isinstance(val, (int, float)):
-                                if val > 0: return f"+{int(val):,}"
-                                return f"{int(val):,}"
-                            return str(val)
+                            def format_rank_change(val):
+                                if val == 'NEW': return 'NEW'
+                                # Handle string values (after astype(str) conversion)
+                                if isinstance(val, str):
+                                    try:
+                                        num_val = float(val)
+                                        return f"+{int(num_val):,}" if num_val > 0 else f"{int(num_val):,}"
+                                    except ValueError:
+                                        return val
+                                elif isinstance(val, (int, float)):
+                                    if val > 0: return f"+{int(val):,}"
+                                    return f"{int(val):,}"
+                                return str(val)
+                    
+                            age_styled = age_display.style.apply(highlight_new_row, axis=1)\
+                                .map(color_negative_red, subset=['전주 대비 변화'])\
+                                .map(color_rank_change, subset=['순위 변화'])\
+                                .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
+                                .set_properties(**{
+                                    'font-weight': 'normal',
+                                    'font-family': 'Journey, sans-serif'
+                                })\
+                                .set_table_styles([
+                                    {
+                                        'selector': 'th', 
+                                        'props': [
+                                            ('background-color', '#5E2BB8'), 
+                                            ('color', 'white'), 
+                                            ('text-align', 'center !important'),
+                                            ('font-weight', 'normal'),
+                                            ('font-family', 'Journey, sans-serif')
+                                        ]
+                                    },
+                                    {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
+                                    {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
+                                    {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
+                                    {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
+                                    {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
+                                ])
                     
-                        age_styled = age_display.style.apply(highlight_new_row, axis=1)\
+                            st.dataframe(age_styled, width="stretch", height=800, hide_index=True)
+                        else:
+                            st.info(f"{age_label} 데이터 없음")
+
+        with tab5:
+            if is_open(tab5):
+                # Reuse styling functions globally within this tab
+                def color_rank_change(val):
+                    if val == 'NEW':
+                        return 'font-weight: bold'  # JavaScript가 색상 처리
+                    elif isinstance(val, (int, float)) and val < 0:
+                        return 'color: #DC3545'  # Bootstrap red
+                    elif isinstance(val, (int, float)) and val > 0:
+                        return ''  # 양수는 기본 색상 (테마 자동 적응)
+                    return ''
+            
+                def highlight_new_row(row):
+                    """NEW가 있는 행 전체에 배경색 적용"""
+                    if row['순위 변화'] == 'NEW':
+                        return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
+                    return [''] * len(row)
+            
+                def color_negative_red(val):
+                    if val < 0:
+                        return 'color: #DC3545'  # Bootstrap red
+                    elif val > 0:
+                        return ''  # 양수는 기본 색상 (테마 자동 적응)
+                    return ''
+                def format_with_plus(val):
+                    return f"+{val:,}" if val > 0 else f"{val:,}"
+                def format_rank_change(val):
+                    if val == 'NEW': return 'NEW'
+                    # Handle string values (after astype(str) conversion)
+                    if isinstance(val, str):
+                        try:
+                            num_val = float(val)
+                            return f"+{int(num_val):,}" if num_val > 0 else f"{int(num_val):,}"
+                        except ValueError:
+                            return val
+                    return f"+{int(val):,}" if isinstance(val, (int, float)) and val > 0 else f"{int(val):,}"
+                def format_comma(val):
+                    return f"{val:,}"
+
+                # Column setup: Left (Table), Right (Charts) - 1:2 ratio matching 인기 검색어 tab
+                col1, col2 = st.columns([1, 2])
+        
+                # --- LEFT: 이번 주 실패 검색어 Top 100 ---
+                with col1:
+                    st.markdown("""
+                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                                이번 주 실패 검색어 Top 100
+                            </p>
+                        </div>
+                    """, unsafe_allow_html=True)
+            
+                    # [SERVER-SIDE FIX] 실패 검색어 통계 계산 시 전수 랭킹 데이터 사용
+                    failed_stats_df = get_failed_stats(rank_id, filtered_df)
+            
+                    if failed_stats_df is not None and not failed_stats_df.empty:
+                        # Formatting Table
+                        display_this = failed_stats_df.copy().head(100)
+                        display_this['rank'] = display_this['rank'].astype(int)
+                        display_this['cnt'] = display_this['cnt'].astype(int)
+                        display_this['count_change'] = display_this['count_change'].astype(int)
+                        # Convert rank_change_display to string to handle mixed types (NEW and numbers)
+                        display_this['rank_change_display'] = display_this['rank_change_display'].astype(str)
+                
+                        display_this = display_this[['rank', 'search_keyword', 'cnt', 'count_change', 'rank_change_display']]
+                        display_this.columns = ['순위', '검색어', '실패 횟수', '전주 대비 변화', '순위 변화']
+                
+                        this_styled = display_this.style.apply(highlight_new_row, axis=1)\
                             .map(color_negative_red, subset=['전주 대비 변화'])\
                             .map(color_rank_change, subset=['순위 변화'])\
-                            .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
+                            .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '실패 횟수': format_comma})\
                             .set_properties(**{
                                 'font-weight': 'normal',
                                 'font-family': 'Journey, sans-serif'
@@ -1317,143 +1528,54 @@ if connection_status:
                                 {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
                                 {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
                             ])
-                    
-                        st.dataframe(age_styled, width="stretch", height=800, hide_index=True)
+                        st.dataframe(this_styled, width="stretch", height=800, hide_index=True)
                     else:
-                        st.info(f"{age_label} 데이터 없음")
-
-        with tab5:
-            # Reuse styling functions globally within this tab
-            def color_rank_change(val):
-                if val == 'NEW':
-                    return 'font-weight: bold'  # JavaScript가 색상 처리
-                elif isinstance(val, (int, float)) and val < 0:
-                    return 'color: #DC3545'  # Bootstrap red
-                elif isinstance(val, (int, float)) and val > 0:
-                    return ''  # 양수는 기본 색상 (테마 자동 적응)
-                return ''
-            
-            def highlight_new_row(row):
-                """NEW가 있는 행 전체에 배경색 적용"""
-                if row['순위 변화'] == 'NEW':
-                    return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                return [''] * len(row)
-            
-            def color_negative_red(val):
-                if val < 0:
-                    return 'color: #DC3545'  # Bootstrap red
-                elif val > 0:
-                    return ''  # 양수는 기본 색상 (테마 자동 적응)
-                return ''
-            def format_with_plus(val):
-                return f"+{val:,}" if val > 0 else f"{val:,}"
-            def format_rank_change(val):
-                if val == 'NEW': return 'NEW'
-                # Handle string values (after astype(str) conversion)
-                if isinstance(val, str):
-                    try:
-                        num_val = float(val)
-                        return f"+{int(num_val):,}" if num_val > 0 else f"{int(num_val):,}"
-                    except ValueError:
-                        return val
-                return f"+{int(val):,}" if isinstance(val, (int, float)) and val > 0 else f"{int(val):,}"
-            def format_comma(val):
-                return f"{val:,}"
-
-            # Column setup: Left (Table), Right (Charts) - 1:2 ratio matching 인기 검색어 tab
-            col1, col2 = st.columns([1, 2])
+                        st.info("이번 주 실패 검색어 데이터가 없습니다.")
         
-            # --- LEFT: 이번 주 실패 검색어 Top 100 ---
-            with col1:
-                st.markdown("""
-                    <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                        <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                            이번 주 실패 검색어 Top 100
-                        </p>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-                # [SERVER-SIDE FIX] 실패 검색어 통계 계산 시 전수 랭킹 데이터 사용
-                failed_stats_df = visualizations.calculate_failed_keywords_stats(filtered_df)
-            
-                if failed_stats_df is not None and not failed_stats_df.empty:
-                    # Formatting Table
-                    display_this = failed_stats_df.copy().head(100)
-                    display_this['rank'] = display_this['rank'].astype(int)
-                    display_this['cnt'] = display_this['cnt'].astype(int)
-                    display_this['count_change'] = display_this['count_change'].astype(int)
-                    # Convert rank_change_display to string to handle mixed types (NEW and numbers)
-                    display_this['rank_change_display'] = display_this['rank_change_display'].astype(str)
-                
-                    display_this = display_this[['rank', 'search_keyword', 'cnt', 'count_change', 'rank_change_display']]
-                    display_this.columns = ['순위', '검색어', '실패 횟수', '전주 대비 변화', '순위 변화']
-                
-                    this_styled = display_this.style.apply(highlight_new_row, axis=1)\
-                        .map(color_negative_red, subset=['전주 대비 변화'])\
-                        .map(color_rank_change, subset=['순위 변화'])\
-                        .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '실패 횟수': format_comma})\
-                        .set_properties(**{
-                            'font-weight': 'normal',
-                            'font-family': 'Journey, sans-serif'
-                        })\
-                        .set_table_styles([
-                            {
-                                'selector': 'th', 
-                                'props': [
-                                    ('background-color', '#5E2BB8'), 
-                                    ('color', 'white'), 
-                                    ('text-align', 'center !important'),
-                                    ('font-weight', 'normal'),
-                                    ('font-family', 'Journey, sans-serif')
-                                ]
-                            },
-                            {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
-                            {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
-                            {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
-                            {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
-                            {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
-                        ])
-                    st.dataframe(this_styled, width="stretch", height=800, hide_index=True)
-                else:
-                    st.info("이번 주 실패 검색어 데이터가 없습니다.")
-        
-            # --- RIGHT: 실패 검색어 트렌드 차트 ---
-            with col2:
-                # Add spacer to align with Table Header on the left
-                st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
+                # --- RIGHT: 실패 검색어 트렌드 차트 ---
+                with col2:
+                    # Add spacer to align with Table Header on the left
+                    st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
             
-                if failed_stats_df is not None and not failed_stats_df.empty:
-                    # [SERVER-SIDE FIX] 실패 검색어 트렌드 필터링 시 전수 트렌드 데이터 (trend_df) 사용
-                    # visualizations.py 내부 필터를 통과하도록 더미 컬럼 주입
-                    plot_trend_df = trend_df.copy()
-                    plot_trend_df['total_count'] = 0
-                    plot_trend_df['result_total_count'] = 0
-                    plot_trend_df['service'] = 'totalsearch'
-                    plot_trend_df['page'] = 1
-                    plot_trend_df['quick_link_yn'] = 'N'
-                    plot_trend_df['search_keyword'] = '전체' # 트렌드용
-                    
-                    failed_trend_df = visualizations.get_filtered_failed_keywords_df(plot_trend_df)
+                    if failed_stats_df is not None and not failed_stats_df.empty:
+                        # [SERVER-SIDE FIX] 실패 검색어 트렌드 필터링 시 전수 트렌드 데이터 (trend_df) 사용
+                        failed_trend_df = get_failed_trend_df(data_id, trend_df)
                 
-                    # Top 1-5 Failed Keywords Chart
-                    top5_failed = failed_stats_df.sort_values('rank').head(5)['search_keyword'].tolist()
-                    if top5_failed:
-                        fig_top5_failed = visualizations.plot_keyword_group_trend(
-                            failed_trend_df, top5_failed, title="1~5위 실패검색어 추이"
-                        )
-                        st.plotly_chart(fig_top5_failed, width="stretch")
+                        # Top 1-5 Failed Keywords Chart
+                        top5_failed = failed_stats_df.sort_values('rank').head(5)['search_keyword'].tolist()
+                        if top5_failed:
+                            fig_top5_failed = visualizations.plot_keyword_group_trend(
+                                failed_trend_df, top5_failed, title="1~5위 실패검색어 추이"
+                            )
+                            st.plotly_chart(fig_top5_failed, width="stretch")
                 
-                    # Top 6-10 Failed Keywords Chart
-                    next5_failed = failed_stats_df.sort_values('rank').iloc[5:10]['search_keyword'].tolist()
-                    if next5_failed:
-                        fig_next5_failed = visualizations.plot_keyword_group_trend(
-                            failed_trend_df, next5_failed, title="6~10위 실패검색어 추이"
-                        )
-                        st.plotly_chart(fig_next5_failed, width="stretch")
-                else:
-                    st.info("차트를 표시할 데이터가 없습니다.")
+                        # Top 6-10 Failed Keywords Chart
+                        next5_failed = failed_stats_df.sort_values('rank').iloc[5:10]['search_keyword'].tolist()
+                        if next5_failed:
+                            fig_next5_failed = visualizations.plot_keyword_group_trend(
+                                failed_trend_df, next5_failed, title="6~10위 실패검색어 추이"
+                            )
+                            st.plotly_chart(fig_next5_failed, width="stretch")
+                    else:
+                        st.info("차트를 표시할 데이터가 없습니다.")
+
+        # [UPDATED] 첫 화면 출력 후 닫힌 탭의 랭킹 + Top 20 키워드 파이 차트 집계를 사전 계산
+        # 필터가 바뀌면 식별자가 달라져 이전 job은 취소됨
+        open_labels = [label for label, tab in zip(TAB_LABELS, tabs) if is_open(tab)]
+        precompute.schedule(
+            f"filters:{rank_id}:{data_id}",
+            precompute_tasks(rank_id, filtered_df, data_id, trend_df, open_labels)
+        )
     else:
+        precompute.cancel()
         st.warning("⚠️ 선택하신 기간에는 데이터가 존재하지 않습니다. 좌측 필터에서 다른 날짜를 선택해 주세요.")
 
 else:
     st.error("데이터베이스 서버에 연결할 수 없습니다. 관리자에게 문의하거나 인터넷 연결을 확인해주세요.")
+
+# [NEW] 관리자용 캐시 통계 (?admin=1)
+if st.query_params.get("admin") == "1":
+    with st.expander("🔧 캐시 통계 (관리자)", expanded=False):
+        cache_metrics.render_admin_panel()
+        st.subheader("사전 계산 작업")
+        st.dataframe(pd.DataFrame(precompute.scheduler.jobs()), use_container_width=True, hide_index=True)
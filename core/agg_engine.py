@@ -0,0 +1,799 @@
+"""
+집계 엔진 (DuckDB SQL / pandas)
+
+visualizations.py와 차트 집계 함수는 전체 행을 pandas로 들고 groupby/drop_duplicates를 수행합니다.
+여기서는 같은 집계를 SQL로 만들어 DuckDB의 벡터화·멀티스레드 실행기에서 처리하고,
+pandas에는 수십~수천 행의 결과 테이블만 넘깁니다.
+
+- 데이터 원천(Source)
+    FrameSource: 메모리의 DataFrame (필요한 컬럼만 pyarrow.Table로 감싸 등록, 버퍼 공유)
+    ParquetSource: data_storage/*.parquet를 직접 스캔 (전처리/기간/접속 경로 필터를 SQL 뷰로 구성)
+- 엔진
+    DuckDBEngine: 기본값, 집계를 SQL로 실행
+    PandasEngine: 기존 pandas 구현 (DASHBOARD_AGG_ENGINE=pandas, 결과 비교/문제 발생 시 우회용)
+- 두 엔진의 결과는 동일 (NULL 키 제외 등 pandas groupby 규칙을 SQL에 그대로 반영)
+  단, 파이 차트의 건수 동률 항목 순서는 라벨 순 (pandas는 첫 등장 순)
+- 실패 검색어 고유 세션 집계는 정확 집계(기본, 감사용) 또는 HyperLogLog 스케치(hll.py) 추정
+    스케치: (주차, 접속 경로, 검색어)별 레지스터 → 주차/경로 합집합 후 추정 (상대 오차 약 1.04/sqrt(2^p))
+
+환경 변수:
+    DASHBOARD_AGG_ENGINE=duckdb|pandas   집계 엔진 (기본 duckdb)
+    DASHBOARD_AGG_THREADS=16             DuckDB 스레드 수 (기본: CPU 코어 수)
+    DASHBOARD_DISTINCT_MODE=exact|hll    실패 검색어 고유 세션 집계 방식 (기본 exact)
+    DASHBOARD_DUCKDB_MEMORY_LIMIT=1GB    연결당 DuckDB 메모리 상한 (초과분은 임시 파일로 내려씀, 기본 제한 없음)
+    DASHBOARD_DUCKDB_TEMP_DIR=/tmp/...   메모리 상한 초과 시 임시 파일 위치
+
+사용법:
+    engine = agg_engine.get_engine()
+    daily_counts, week_ranges = engine.weekday_counts(agg_engine.as_source(df), keyword="제주")
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import generations
+    import hll
+    # [NEW] DuckDB는 첫 집계 시 import (compute만 쓰는 배치 작업/pandas 엔진은 로드하지 않음)
+    from lazy_imports import lazy
+except ImportError:  # 루트 app.py에서 core.agg_engine으로 import된 경우
+    from core import generations
+    from core import hll
+    from core.lazy_imports import lazy
+duckdb = lazy('duckdb')
+
+AGG_ENGINE = os.getenv('DASHBOARD_AGG_ENGINE', 'duckdb').lower()
+AGG_THREADS = int(os.getenv('DASHBOARD_AGG_THREADS', '0')) or (os.cpu_count() or 1)
+DISTINCT_MODE = os.getenv('DASHBOARD_DISTINCT_MODE', 'exact').lower()
+MEMORY_LIMIT = os.getenv('DASHBOARD_DUCKDB_MEMORY_LIMIT')
+TEMP_DIR = os.getenv('DASHBOARD_DUCKDB_TEMP_DIR', os.path.join(tempfile.gettempdir(), 'dashboard_duckdb'))
+
+
+def _connect():
+    """독립 DuckDB 연결 (호출마다 새로 생성 → 스레드 안전)"""
+    config = {'threads': AGG_THREADS}
+    if MEMORY_LIMIT:
+        # 집계/정렬 상태가 상한을 넘으면 임시 파일로 내려써 메모리 사용량 고정
+        config.update(memory_limit=MEMORY_LIMIT, temp_directory=TEMP_DIR)
+    return duckdb.connect(config=config)
+
+
+def _ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _in_list(values):
+    return ', '.join(_literal(v) for v in values)
+
+
+# ==========================================
+# 데이터 원천
+# ==========================================
+
+class FrameSource:
+    """메모리의 DataFrame을 src 테이블로 노출"""
+
+    def __init__(self, df):
+        self.df = df
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    def to_pandas(self):
+        return self.df
+
+    def connect(self, columns=None, name='src'):
+        """
+        src가 등록된 DuckDB 연결
+
+        Args:
+            columns: 사용할 컬럼 (없는 컬럼은 무시, None이면 전체)
+            name: 등록할 테이블 이름
+        """
+        df = self.df
+        if columns is not None:
+            df = df[[col for col in dict.fromkeys(columns) if col in df.columns]]
+        if 'search_date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['search_date']):
+            df = df.assign(search_date=pd.to_datetime(df['search_date'], errors='coerce'))
+
+        conn = _connect()
+        try:
+            # Arrow 문자열 컬럼은 pyarrow.Table로 감싸 등록 (버퍼 공유, pandas 스캔보다 빠름)
+            conn.register(name, pa.Table.from_pandas(df, preserve_index=False))
+        except (pa.ArrowException, TypeError, ValueError):
+            # 타입이 섞인 object 컬럼 등은 DuckDB의 pandas 스캔으로 등록
+            conn.register(name, df)
+        return conn
+
+
+class ParquetSource:
+    """
+    parquet 파일을 직접 스캔하는 src 뷰
+
+    data_loader.load_data_range() + preprocess_data()와 같은 결과가 되도록 SQL로 구성합니다.
+    (원본 컬럼명 변경, 검색일 파싱, 검색어 결측 제거, 영문 별칭, sessionid/logweek 생성, 기간/접속 경로 필터)
+    """
+
+    def __init__(self, pattern, aliases=None, start_date=None, end_date=None, paths=None, renames=None):
+        self.pattern = pattern
+        conn = _connect()
+        try:
+            schema = conn.execute(
+                f"DESCRIBE SELECT * FROM read_parquet({_literal(pattern)}, union_by_name=true)"
+            ).fetchall()
+        finally:
+            conn.close()
+        types = {row[0]: row[1] for row in schema}
+        self.sql, self.columns = self._build_view(
+            pattern, types, aliases or {}, start_date, end_date, paths, renames or {}
+        )
+        self._empty = None
+
+    @staticmethod
+    def _build_view(pattern, types, aliases, start_date, end_date, paths, renames):
+        # 원본 컬럼명 변경 (예: Hugging Face 샤드의 logday → 검색일, 이미 있는 컬럼은 유지)
+        renames = {old: new for old, new in renames.items() if old in types and new not in types}
+        relation = f"read_parquet({_literal(pattern)}, union_by_name=true)"
+        if renames:
+            rename_list = ', '.join(f"{_ident(old)} AS {_ident(new)}" for old, new in renames.items())
+            relation = f"(SELECT * RENAME ({rename_list}) FROM {relation})"
+            types = {renames.get(name, name): type_ for name, type_ in types.items()}
+
+        replace = []
+        extra = []
+        columns = list(types)
+
+        # 검색일: 숫자(20251001)/문자열은 %Y%m%d로 파싱 (실패 시 NULL, pd.to_datetime errors='coerce'와 동일)
+        date_expr = None
+        if '검색일' in types:
+            raw_type = types['검색일'].upper()
+            if raw_type.startswith(('TIMESTAMP', 'DATE')):
+                date_expr = 'CAST("검색일" AS TIMESTAMP)'
+            elif raw_type == 'VARCHAR':
+                date_expr = "try_strptime(\"검색일\", '%Y%m%d')"
+            else:
+                date_expr = "try_strptime(CAST(TRY_CAST(\"검색일\" AS BIGINT) AS VARCHAR), '%Y%m%d')"
+            replace.append(f'{date_expr} AS "검색일"')
+
+        for korean, english in aliases.items():
+            if korean in types and english not in types:
+                expr = date_expr if korean == '검색일' else _ident(korean)
+                extra.append(f'{expr} AS {_ident(english)}')
+                columns.append(english)
+
+        # sessionid가 없으면 행 번호 (행마다 고유 → COUNT(sessionid) = 행 수)
+        if 'sessionid' not in columns:
+            extra.append('row_number() OVER () - 1 AS sessionid')
+            columns.append('sessionid')
+
+        if 'logweek' not in columns and 'search_date' in columns:
+            search_date = date_expr if 'search_date' not in types else 'search_date'
+            extra.append(f'week({search_date}) AS logweek')  # ISO 주차 (isocalendar().week)
+            columns.append('logweek')
+
+        if 'search_keyword' not in columns or 'search_date' not in columns:
+            raise ValueError(f"{pattern}: search_keyword/search_date 컬럼을 만들 수 없습니다.")
+
+        select = '*'
+        if replace:
+            select += f" REPLACE ({', '.join(replace)})"
+        select = ', '.join([select] + extra)
+
+        conditions = []
+        if '검색어' in types:
+            conditions.append('"검색어" IS NOT NULL')
+        date_col = '"검색일"' if '검색일' in types else None
+        if date_col and start_date is not None:
+            conditions.append(f"{date_col} >= TIMESTAMP {_literal(pd.Timestamp(start_date))}")
+        if date_col and end_date is not None:
+            conditions.append(f"{date_col} <= TIMESTAMP {_literal(pd.Timestamp(end_date))}")
+        if paths is not None:
+            path_col = 'pathcd' if 'pathcd' in columns else ('pathCd' if 'pathCd' in columns else None)
+            if path_col:
+                conditions.append(f"{_ident(path_col)} IN ({_in_list(paths) or 'NULL'})")
+
+        sql = f"SELECT {select} FROM {relation}"
+        if conditions:
+            sql = f"SELECT * FROM ({sql}) WHERE {' AND '.join(conditions)}"
+        return sql, columns
+
+    @property
+    def empty(self):
+        if self._empty is None:
+            conn = self.connect()
+            try:
+                self._empty = conn.execute("SELECT 1 FROM src LIMIT 1").fetchone() is None
+            finally:
+                conn.close()
+        return self._empty
+
+    def to_pandas(self):
+        conn = self.connect()
+        try:
+            return conn.execute("SELECT * FROM src").df()
+        finally:
+            conn.close()
+
+    def connect(self, columns=None, name='src'):
+        # 뷰에서 필요한 컬럼만 읽도록 DuckDB가 projection을 parquet 스캔까지 내려보냄
+        conn = _connect()
+        conn.execute(f"CREATE VIEW {_ident(name)} AS {self.sql}")
+        return conn
+
+
+class FailedSource:
+    """
+    실패 검색어 필터를 거친 행을 src로 노출 (compute.get_filtered_failed_keywords_df의 SQL 뷰)
+
+    실패 검색어 추이 차트가 필터링된 행을 메모리에 만들지 않고 원천(parquet 등)에서 바로 집계하도록 합니다.
+    """
+
+    def __init__(self, source):
+        self.source = as_source(source)
+        self._view = _failed_view_sql(self.source.columns, relation='base_src')
+        self._empty = None
+
+    @property
+    def columns(self):
+        if self._view is None:
+            return []
+        conn = self.connect()
+        try:
+            return [row[0] for row in conn.execute("DESCRIBE src").fetchall()]
+        finally:
+            conn.close()
+
+    @property
+    def empty(self):
+        if self._view is None:
+            return True
+        if self._empty is None:
+            conn = self.connect()
+            try:
+                self._empty = conn.execute("SELECT 1 FROM src LIMIT 1").fetchone() is None
+            finally:
+                conn.close()
+        return self._empty
+
+    def to_pandas(self):
+        if self._view is None:
+            return pd.DataFrame()
+        conn = self.connect()
+        try:
+            return conn.execute("SELECT * FROM src").df()
+        finally:
+            conn.close()
+
+    def connect(self, columns=None, name='src'):
+        if self._view is None:
+            raise ValueError("search_keyword 컬럼이 없어 실패 검색어 뷰를 만들 수 없습니다.")
+        sql, used, _, _ = self._view
+        conn = self.source.connect(used, name='base_src')
+        conn.execute(f"CREATE TEMP VIEW {_ident(name)} AS {sql}")
+        return conn
+
+
+def as_source(data):
+    """DataFrame 또는 Source를 Source로 변환"""
+    if isinstance(data, (FrameSource, ParquetSource, FailedSource)):
+        return data
+    return FrameSource(data)
+
+
+# ==========================================
+# 공통 후처리
+# ==========================================
+
+PATH_LABELS = {'MDA': '앱', 'DCM': '모바일웹', 'DCP': 'PC'}
+GENDER_LABELS = {'F': '여성', 'M': '남성'}
+
+# 실패 검색어 필터에서 제외되는 사내 IP
+BLOCKED_IPS = [
+    '112.223.61.10', '112.223.61.11', '112.223.61.12', '112.223.61.13', '112.223.61.14',
+    '112.223.61.16', '112.223.61.17', '112.223.61.18', '112.223.61.39', '112.223.61.40',
+    '112.220.71.243', '112.220.71.244'
+]
+
+
+def _week_ranges_from_days(days):
+    """(logweek, 요일)별 min/max 날짜 → 주차별 날짜 범위 (logweek, min, max)"""
+    return days.groupby('logweek').agg({'min': 'min', 'max': 'max'}).reset_index()
+
+
+def _label_counts(counts, column):
+    """(라벨, 건수) 집계 → value_counts()와 같은 내림차순 dict (결측 라벨 제외)"""
+    grouped = counts.dropna(subset=[column]).groupby(column)['n'].sum()
+    grouped = grouped.sort_values(ascending=False, kind='stable')
+    return {label: int(n) for label, n in grouped.items()}
+
+
+# ==========================================
+# DuckDB 엔진
+# ==========================================
+
+# Python re의 \s (유니코드 공백) - RE2의 \s는 ASCII 공백만 포함하므로 직접 나열
+_WS = r'\t-\r\x{1c}-\x{20}\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}'
+
+# compute.preprocess_failed_keyword_data의 정규식 (RE2 문법, str.match의 $는 끝 개행 허용)
+_FAILED_KEYWORD_EXCLUDES = [
+    f'[^ㄱ-ㅎㅏ-ㅣ가-힣a-zA-Z0-9{_WS}]',         # 1. 특수문자
+    r'^[Hh][a-zA-Z0-9]{11}\n?$',                  # 2. H코드
+    r'^[0-9]+\n?$',                               # 3. 숫자만
+    r'^[A-Za-z][A-Za-z0-9]{13,}\n?$',             # 4. 상품코드
+    r'[Dd][Bb]|디비',                             # 5. DB/디비
+    f'(?:^|[{_WS}])[A-Za-z]{{3}}[0-9]+(?:[{_WS}]|$)',  # 6. 영문3+숫자 (공백 구분)
+    r'텔레|출장|마사지',                           # 7. 스팸
+    r'^[\x{4E00}-\x{9FFF}]+\n?$',                 # 8. 한자만
+    r'[A-Za-z]{3}[0-9]{6,}',                      # 9. 영문3+숫자6
+]
+
+
+def _failed_view_sql(columns, relation='src'):
+    """
+    실패 검색어 필터 (compute.get_filtered_failed_keywords_df와 동일한 조건)
+
+    Args:
+        relation: 원본 테이블/뷰 이름
+
+    Returns:
+        (SQL, 사용 컬럼 목록, logweek 존재 여부, sessionid 존재 여부) 또는 검색어 컬럼이 없으면 None
+    """
+    cols = set(columns)
+
+    def pick(*names):
+        return next((name for name in names if name in cols), None)
+
+    if 'search_keyword' not in cols:
+        return None
+
+    conditions = []
+    path_col = pick('pathcd', 'pathCd')
+    if path_col:
+        conditions.append(f"upper(CAST({_ident(path_col)} AS VARCHAR)) IN ('DCM', 'MDA', 'DCP')")
+    if 'service' in cols:
+        conditions.append("lower(CAST(service AS VARCHAR)) = 'totalsearch'")
+    if 'page' in cols:
+        conditions.append("TRY_CAST(page AS DOUBLE) = 1")
+    for name in (pick('total_count', 'totalCount'), pick('result_total_count', 'resultTotalCount')):
+        if name:
+            conditions.append(f"TRY_CAST({_ident(name)} AS DOUBLE) = 0")
+    search_type = pick('search_type', 'searchType')
+    if search_type:
+        conditions.append(f"lower(CAST({_ident(search_type)} AS VARCHAR)) = 'all'")
+    quick_link = pick('quick_link_yn', 'quickLinkYn')
+    if quick_link:
+        conditions.append(f"upper(coalesce(CAST({_ident(quick_link)} AS VARCHAR), 'N')) <> 'Y'")
+    userip = pick('userip', 'userIp')
+    if userip:
+        # astype(str).str.strip(): 결측은 'nan' → 차단 목록에 없으므로 유지
+        # (trim(문자 집합)은 느리므로 정규식으로 앞뒤 공백 제거)
+        conditions.append(
+            f"NOT list_contains([{_in_list(BLOCKED_IPS)}], coalesce(regexp_replace("
+            f"CAST({_ident(userip)} AS VARCHAR), '^[{_WS}]+|[{_WS}]+$', '', 'g'), 'nan'))"
+        )
+    conditions.append("search_keyword IS NOT NULL")
+
+    logweek = pick('logweek')
+    sessionid = pick('sessionid', 'userId')
+    select = [f"{_ident(col)} AS {name}" for name, col in (('logweek', logweek), ('sessionid', sessionid)) if col]
+    if path_col:
+        # 스케치의 접속 경로 차원 (정확 집계는 사용하지 않음)
+        select.append(f"upper(CAST({_ident(path_col)} AS VARCHAR)) AS path")
+    if 'search_date' in cols:
+        # 추이 차트의 주차 날짜 범위 (FailedSource)
+        select.append("search_date")
+    select.append("CAST(search_keyword AS VARCHAR) AS search_keyword")
+
+    keyword_filters = [f"NOT regexp_matches(search_keyword, {_literal(p)})" for p in _FAILED_KEYWORD_EXCLUDES]
+    keyword_filters.append("search_keyword <> ''")
+
+    # 정규식은 고유 검색어에만 적용 (행마다 9개 패턴을 평가하지 않음)
+    sql = f"""
+        WITH base AS (
+            SELECT {', '.join(select)} FROM {relation} WHERE {' AND '.join(conditions)}
+        ), valid AS (
+            SELECT search_keyword FROM (SELECT DISTINCT search_keyword FROM base)
+            WHERE {' AND '.join(keyword_filters)}
+        )
+        SELECT * FROM base WHERE search_keyword IN (SELECT search_keyword FROM valid)
+    """
+    used = [col for col in (path_col, 'service', 'page', pick('total_count', 'totalCount'),
+                            pick('result_total_count', 'resultTotalCount'), search_type,
+                            quick_link, userip, logweek, sessionid, 'search_keyword', 'search_date') if col in cols]
+    return sql, used, logweek is not None, sessionid is not None
+
+
+class DuckDBEngine:
+    name = 'duckdb'
+
+    @staticmethod
+    def _keyword_filter(keyword):
+        return ("AND search_keyword = ?", [keyword]) if keyword is not None else ("", [])
+
+    def weekday_counts(self, source, keyword=None):
+        """
+        주차 × 요일 검색량과 주차별 날짜 범위 (막대형 차트)
+
+        Returns:
+            (daily_counts[logweek, day_num, Session Count, actual_date], week_ranges[logweek, min, max])
+        """
+        kw_sql, params = self._keyword_filter(keyword)
+        conn = source.connect(['logweek', 'search_date', 'sessionid', 'search_keyword'])
+        try:
+            # 날짜 결측 행도 주차 범위 집계에는 포함되도록 요일 NULL 그룹을 함께 집계 (스캔 1회)
+            days = conn.execute(f'''
+                SELECT logweek, CAST(isodow(search_date) - 1 AS INTEGER) AS day_num,
+                       COUNT(sessionid) AS session_count,
+                       MIN(search_date) AS "min", MAX(search_date) AS "max"
+                FROM src
+                WHERE logweek IS NOT NULL {kw_sql}
+                GROUP BY ALL
+                ORDER BY logweek, day_num
+            ''', params).df()
+        finally:
+            conn.close()
+
+        week_ranges = _week_ranges_from_days(days)
+        daily_counts = days[days['day_num'].notna()].reset_index(drop=True)
+        daily_counts = daily_counts[['logweek', 'day_num', 'session_count', 'min']]
+        daily_counts['day_num'] = daily_counts['day_num'].astype('int32')
+        daily_counts.columns = ['logweek', 'day_num', 'Session Count', 'actual_date']
+        return daily_counts, week_ranges
+
+    def daily_counts(self, source, keyword=None):
+        """일자별 검색량 (선형 차트) → [Date, Count]"""
+        kw_sql, params = self._keyword_filter(keyword)
+        conn = source.connect(['search_date', 'sessionid', 'search_keyword'])
+        try:
+            return conn.execute(f'''
+                SELECT search_date AS "Date", COUNT(sessionid) AS "Count"
+                FROM src
+                WHERE search_date IS NOT NULL {kw_sql}
+                GROUP BY 1
+                ORDER BY 1
+            ''', params).df()
+        finally:
+            conn.close()
+
+    def pie_counts(self, source, keyword=None):
+        """
+        채널/로그인/성별/연령 비중 (파이 차트, 스캔 1회)
+
+        Returns:
+            dict: {'path': {...}, 'login': {...}, 'gender': {...}, 'age': {...}} (없는 컬럼은 빈 dict)
+        """
+        cols = set(source.columns)
+        path_col = 'pathcd' if 'pathcd' in cols else ('pathCd' if 'pathCd' in cols else None)
+
+        def case(column, labels):
+            whens = ' '.join(f"WHEN {_literal(k)} THEN {_literal(v)}" for k, v in labels.items())
+            return f"CASE CAST({_ident(column)} AS VARCHAR) {whens} END"
+
+        dims = {
+            'path': case(path_col, PATH_LABELS) if path_col else None,
+            'login': ("CASE WHEN contains(CAST(uidx AS VARCHAR), 'C') THEN '로그인' ELSE '비로그인' END"
+                      if 'uidx' in cols else None),
+            'gender': case('gender', GENDER_LABELS) if 'gender' in cols else None,
+            'age': "CASE WHEN age IS DISTINCT FROM '미분류' THEN CAST(age AS VARCHAR) END" if 'age' in cols else None,
+        }
+        active = {name: expr for name, expr in dims.items() if expr is not None}
+        result = {name: {} for name in dims}
+        if not active:
+            return result
+
+        kw_sql, params = self._keyword_filter(keyword)
+        conn = source.connect([path_col, 'uidx', 'gender', 'age', 'search_keyword'])
+        try:
+            # 라벨 조합별 건수만 반환 (최대 3 × 2 × 2 × 5행)
+            counts = conn.execute(f'''
+                SELECT {', '.join(f'{expr} AS {name}' for name, expr in active.items())}, COUNT(*) AS n
+                FROM src
+                WHERE TRUE {kw_sql}
+                GROUP BY ALL
+            ''', params).df()
+        finally:
+            conn.close()
+
+        for name in active:
+            result[name] = _label_counts(counts, name)
+        return result
+
+    def weekly_keyword_counts(self, source, n_weeks=2):
+        """
+        최근 n_weeks 주차의 검색어별 검색량 (인기 검색어 랭킹)
+
+        Returns:
+            (weeks, weekly_stats[logweek, keyword, count]) - weeks는 전체 주차 목록 (오름차순)
+        """
+        conn = source.connect(['logweek', 'search_keyword', 'sessionid'])
+        try:
+            weeks = [row[0] for row in conn.execute(
+                "SELECT DISTINCT logweek FROM src WHERE logweek IS NOT NULL ORDER BY 1"
+            ).fetchall()]
+            if not weeks:
+                return [], pd.DataFrame(columns=['logweek', 'keyword', 'count'])
+            generations.checkpoint()
+            weekly_stats = conn.execute('''
+                SELECT logweek, search_keyword AS keyword, COUNT(sessionid) AS count
+                FROM src
+                WHERE logweek IN (SELECT UNNEST(?)) AND search_keyword IS NOT NULL
+                GROUP BY ALL
+                ORDER BY logweek, keyword
+            ''', [weeks[-n_weeks:]]).df()
+        finally:
+            conn.close()
+        return weeks, weekly_stats
+
+    def keyword_week_counts(self, source, keywords, n_weeks=8):
+        """
+        지정 검색어의 최근 n_weeks 주차 검색량 (검색어 그룹 추이 차트)
+
+        Returns:
+            (trend_data[Week, Keyword, Count], week_ranges[logweek, min, max])
+        """
+        keywords = list(keywords)
+        conn = source.connect(['logweek', 'search_keyword', 'sessionid', 'search_date'])
+        try:
+            trend_data = conn.execute('''
+                WITH recent AS (
+                    SELECT DISTINCT logweek FROM src WHERE logweek IS NOT NULL
+                    ORDER BY logweek DESC LIMIT ?
+                )
+                SELECT logweek AS "Week", search_keyword AS "Keyword", COUNT(sessionid) AS "Count"
+                FROM src
+                WHERE logweek IN (SELECT logweek FROM recent) AND search_keyword IN (SELECT UNNEST(?))
+                GROUP BY ALL
+                ORDER BY "Week", "Keyword"
+            ''', [n_weeks, keywords or ['']]).df()
+            generations.checkpoint()
+            week_ranges = conn.execute('''
+                SELECT logweek, MIN(search_date) AS "min", MAX(search_date) AS "max"
+                FROM src
+                WHERE logweek IS NOT NULL
+                GROUP BY logweek
+                ORDER BY logweek
+            ''').df()
+        finally:
+            conn.close()
+        return trend_data, week_ranges
+
+    def _failed(self, source):
+        """실패 검색어 필터를 failed 뷰로 만든 연결 (검색어 컬럼이 없으면 None)"""
+        view = _failed_view_sql(source.columns)
+        if view is None:
+            return None, False, False
+        sql, used, has_week, has_session = view
+        conn = source.connect(used)
+        conn.execute(f"CREATE TEMP VIEW failed AS {sql}")
+        return conn, has_week, has_session
+
+    @staticmethod
+    def _failed_count_sql(has_week, has_session, keys, where=""):
+        # 주차 × 세션 × 검색어 고유 조합 수 (DISTINCT는 NULL도 하나의 값으로 취급 → drop_duplicates와 동일)
+        if has_week and has_session:
+            return f'''
+                SELECT {keys}, COUNT(*) AS cnt
+                FROM (SELECT DISTINCT logweek, sessionid, search_keyword FROM failed {where})
+                GROUP BY ALL
+            '''
+        if has_session:
+            return f"SELECT {keys}, COUNT(DISTINCT sessionid) AS cnt FROM failed {where} GROUP BY ALL"
+        return f"SELECT {keys}, COUNT(*) AS cnt FROM failed {where} GROUP BY ALL"
+
+    def failed_keyword_counts(self, source):
+        """
+        실패 검색어별 실패 횟수 (전체 기간)
+
+        Returns:
+            DataFrame[search_keyword, cnt] 또는 검색어 컬럼이 없으면 None
+        """
+        conn, has_week, has_session = self._failed(source)
+        if conn is None:
+            return None
+        try:
+            return conn.execute(self._failed_count_sql(has_week, has_session, 'search_keyword')).df()
+        finally:
+            conn.close()
+
+    def failed_weekly_keyword_counts(self, source, n_weeks=2):
+        """
+        최근 n_weeks 주차의 실패 검색어별 실패 횟수
+
+        Returns:
+            (weeks, DataFrame[logweek, search_keyword, cnt]) 또는 검색어/주차 컬럼이 없으면 None
+        """
+        conn, has_week, has_session = self._failed(source)
+        if conn is None:
+            return None
+        try:
+            if not has_week:
+                return None
+            weeks = [row[0] for row in conn.execute(
+                "SELECT DISTINCT logweek FROM failed WHERE logweek IS NOT NULL ORDER BY 1"
+            ).fetchall()]
+            generations.checkpoint()
+            counts = conn.execute(
+                self._failed_count_sql(has_week, has_session, 'logweek, search_keyword',
+                                       "WHERE logweek IN (SELECT UNNEST(?))"),
+                [weeks[-n_weeks:]]
+            ).df()
+        finally:
+            conn.close()
+        return weeks, counts
+
+    def failed_sketches(self, source, precision=hll.PRECISION):
+        """
+        실패 검색어의 (주차, 접속 경로, 검색어)별 고유 세션 HLL 스케치
+
+        Returns:
+            DataFrame[logweek, (path), search_keyword, reg, rho] 또는 검색어/주차/세션 컬럼이 없으면 None
+        """
+        conn, has_week, has_session = self._failed(source)
+        if conn is None:
+            return None
+        try:
+            if not (has_week and has_session):
+                return None
+            columns = [row[0] for row in conn.execute("DESCRIBE failed").fetchall()]
+            keys = [key for key in ('logweek', 'path', 'search_keyword') if key in columns]
+            return conn.execute(hll.sketch_sql("failed", keys, 'sessionid', precision)).df()
+        finally:
+            conn.close()
+
+
+# ==========================================
+# HLL 스케치 집계 (DuckDBEngine.failed_sketches 결과)
+# ==========================================
+
+def _sketch_week_estimates(sketches, paths=None, weeks=None, precision=hll.PRECISION):
+    """선택한 접속 경로/주차를 합친 (logweek, search_keyword)별 추정 고유 세션 수"""
+    keys = ['logweek', 'search_keyword']
+    if paths is not None and 'path' in sketches.columns:
+        sketches = sketches[sketches['path'].isin([str(p).upper() for p in paths])]
+    if weeks is not None:
+        sketches = sketches[sketches['logweek'].isin(weeks)]
+    counts = hll.estimate(hll.merge(sketches, keys), keys, precision)
+    # 정확 집계와 같은 정수 건수로 반올림
+    counts['cnt'] = counts['estimate'].round().astype('int64')
+    return counts[keys + ['cnt']]
+
+
+def sketch_keyword_counts(sketches, paths=None, precision=hll.PRECISION):
+    """
+    failed_keyword_counts의 스케치 버전 (주차별 추정치의 합)
+
+    Returns:
+        DataFrame[search_keyword, cnt]
+    """
+    counts = _sketch_week_estimates(sketches, paths, precision=precision)
+    return counts.groupby('search_keyword', sort=False)['cnt'].sum().reset_index()
+
+
+def sketch_weekly_keyword_counts(sketches, n_weeks=2, paths=None, precision=hll.PRECISION):
+    """
+    failed_weekly_keyword_counts의 스케치 버전
+
+    Returns:
+        (weeks, DataFrame[logweek, search_keyword, cnt])
+    """
+    if paths is not None and 'path' in sketches.columns:
+        sketches = sketches[sketches['path'].isin([str(p).upper() for p in paths])]
+    weeks = sorted(sketches['logweek'].dropna().unique().tolist())
+    return weeks, _sketch_week_estimates(sketches, weeks=weeks[-n_weeks:], precision=precision)
+
+
+# ==========================================
+# pandas 엔진 (기존 구현)
+# ==========================================
+
+class PandasEngine:
+    name = 'pandas'
+
+    @staticmethod
+    def _frame(source, keyword=None):
+        df = as_source(source).to_pandas()
+        if 'search_date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['search_date']):
+            df = df.assign(search_date=pd.to_datetime(df['search_date'], errors='coerce'))
+        if keyword is not None:
+            df = df[df['search_keyword'] == keyword]
+        return df
+
+    def weekday_counts(self, source, keyword=None):
+        df = self._frame(source, keyword)
+        week_ranges = df.groupby('logweek')['search_date'].agg(['min', 'max']).reset_index()
+        daily_counts = df.groupby(['logweek', df["search_date"].dt.dayofweek]).agg(
+            session_count=('sessionid', 'count'),
+            actual_date=('search_date', 'min')
+        ).reset_index()
+        daily_counts.columns = ['logweek', 'day_num', 'Session Count', 'actual_date']
+        return daily_counts, week_ranges
+
+    def daily_counts(self, source, keyword=None):
+        df = self._frame(source, keyword)
+        daily = df.groupby('search_date')['sessionid'].count().reset_index()
+        daily.columns = ['Date', 'Count']
+        return daily.sort_values('Date')
+
+    def pie_counts(self, source, keyword=None):
+        df = self._frame(source, keyword)
+        result = {'path': {}, 'login': {}, 'gender': {}, 'age': {}}
+
+        target_col = 'pathcd' if 'pathcd' in df.columns else 'pathCd'
+        if target_col in df.columns:
+            result['path'] = df[target_col].map(PATH_LABELS).dropna().value_counts().to_dict()
+        if 'uidx' in df.columns:
+            status = df['uidx'].apply(lambda x: '로그인' if 'C' in str(x) else '비로그인')
+            result['login'] = status.value_counts().to_dict()
+        if 'gender' in df.columns:
+            result['gender'] = df['gender'].map(GENDER_LABELS).dropna().value_counts().to_dict()
+        if 'age' in df.columns:
+            result['age'] = df[df['age'] != '미분류']['age'].value_counts().to_dict()
+        return result
+
+    def weekly_keyword_counts(self, source, n_weeks=2):
+        df = self._frame(source)
+        weeks = sorted(df['logweek'].unique())
+        weekly_stats = df.groupby(['logweek', 'search_keyword'])['sessionid'].count().reset_index()
+        weekly_stats.columns = ['logweek', 'keyword', 'count']
+        return weeks, weekly_stats
+
+    def keyword_week_counts(self, source, keywords, n_weeks=8):
+        df = self._frame(source)
+        recent_weeks = sorted(df['logweek'].unique())[-n_weeks:]
+        mask = (df['search_keyword'].isin(keywords)) & (df['logweek'].isin(recent_weeks))
+        trend_data = df[mask].groupby(['logweek', 'search_keyword'])['sessionid'].count().reset_index()
+        trend_data.columns = ['Week', 'Keyword', 'Count']
+        week_ranges = df.groupby('logweek')['search_date'].agg(['min', 'max']).reset_index()
+        return trend_data, week_ranges
+
+    @staticmethod
+    def _aggregate_failures(df, keys):
+        if 'logweek' in df.columns and 'sessionid' in df.columns:
+            # 주차 × 세션 × 검색어당 1회
+            unique_failures = df.drop_duplicates(subset=['logweek', 'sessionid', 'search_keyword'])
+            return unique_failures.groupby(keys).size().reset_index(name='cnt')
+        if 'sessionid' in df.columns:
+            return df.groupby(keys)['sessionid'].nunique().reset_index(name='cnt')
+        return df.groupby(keys).size().reset_index(name='cnt')
+
+    def _failed(self, source):
+        import compute  # 순환 import 방지 (compute가 이 모듈을 사용)
+        return compute.get_filtered_failed_keywords_df(self._frame(source))
+
+    def failed_keyword_counts(self, source):
+        temp_df = self._failed(source)
+        if 'search_keyword' not in temp_df.columns:
+            return None
+        return self._aggregate_failures(temp_df, 'search_keyword')
+
+    def failed_weekly_keyword_counts(self, source, n_weeks=2):
+        temp_df = self._failed(source)
+        if 'search_keyword' not in temp_df.columns or 'logweek' not in temp_df.columns:
+            return None
+        weeks = sorted(temp_df['logweek'].unique())
+        recent = temp_df[temp_df['logweek'].isin(weeks[-n_weeks:])]
+        return weeks, self._aggregate_failures(recent, ['logweek', 'search_keyword'])
+
+    def failed_sketches(self, source, precision=hll.PRECISION):
+        # 스케치는 DuckDB SQL로만 생성 (pandas 엔진은 항상 정확 집계)
+        return None
+
+
+_ENGINES = {'duckdb': DuckDBEngine(), 'pandas': PandasEngine()}
+
+
+def get_engine(name=None):
+    """설정된 집계 엔진 (알 수 없는 이름은 duckdb)"""
+    return _ENGINES.get((name or AGG_ENGINE).lower(), _ENGINES['duckdb'])
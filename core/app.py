@@ -1,14 +1,11 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import data_loader
 import visualizations
 import os
 import io
 import glob
 import datetime
-import time
 import logging
 
 # [NEW] 터미널 로깅 설정
@@ -19,79 +16,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# [NEW] 성능 로깅 시스템 (터미널 전용)
-class PerformanceLogger:
-    """터미널 콘솔에만 출력하는 성능 로깅 시스템"""
-    
-    def __init__(self):
-        self.current_operation = None
-        self.operation_start = None
-    
-    def start_operation(self, operation_name):
-        """작업 시작"""
-        self.current_operation = operation_name
-        self.operation_start = time.time()
-        logger.info(f"━━━ {operation_name} 시작 ━━━")
-    
-    def log_step(self, step_name, elapsed=None):
-        """단계 기록"""
-        if elapsed is None and self.operation_start:
-            elapsed = time.time() - self.operation_start
-        
-        # 상태 이모지
-        if elapsed < 0.3:
-            status = "🟢"
-        elif elapsed < 1.0:
-            status = "🟡"
-        elif elapsed < 2.0:
-            status = "🟠"
-        else:
-            status = "🔴"
-        
-        logger.info(f"  {status} {step_name}: {elapsed:.3f}초")
-    
-    def end_operation(self):
-        """작업 종료"""
-        if self.operation_start is None:
-            return
-        
-        total_time = time.time() - self.operation_start
-        
-        # 상태 이모지
-        if total_time < 0.3:
-            status = "🟢"
-        elif total_time < 1.0:
-            status = "🟡"
-        elif total_time < 2.0:
-            status = "🟠"
-        else:
-            status = "🔴"
-        
-        logger.info(f"━━━ {self.current_operation} 완료: {status} {total_time:.2f}초 ━━━\n")
-        
-        self.current_operation = None
-        self.operation_start = None
-        
-        return total_time
-
-# 전역 로거 초기화
-perf_logger = PerformanceLogger()
-
-# Performance monitoring helper (간단한 타이머)
-class PerfTimer:
-    """간단한 성능 측정 도구 (터미널 출력)"""
-    def __init__(self, name):
-        self.name = name
-        self.start = None
-    
-    def __enter__(self):
-        self.start = time.time()
-        return self
-    
-    def __exit__(self, *args):
-        elapsed = time.time() - self.start
-        if elapsed > 0.5:  # 0.5초 이상 걸리는 작업만 로그
-            perf_logger.log_step(self.name, elapsed)
+# [UPDATED] 구조화 트레이싱 (PerformanceLogger/PerfTimer 대체)
+# 중첩 span + 세션 귀속 + 링 버퍼, 터미널 출력은 LoggingExporter가 담당
+import tracing
+from tracing import tracer
+# [NEW] st.cache_data 히트/미스/크기 측정 래퍼
+import cache_metrics
+# [NEW] 대용량 결과용 zero-copy 캐시 (히트 시 unpickle 사본 대신 뷰 반환)
+from frame_store import cache_frame, cache_handle
+# pandas 2.x: 캐시 결과를 얕은 뷰로 공유하므로 앱 시작 시 Copy-on-Write 활성화 (프로세스 전역 옵션, pandas 3은 기본값)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+# [NEW] 캐시 함수 인자는 경량 핸들 (스냅샷 id + 데이터 지문, 키워드 id), 대용량 입력은 레지스트리에서 조회
+import handles
+# [NEW] 활성 탭만 계산
+from lazy_tabs import lazy_tabs, is_open
+# [NEW] 다음에 볼 가능성이 높은 결과를 백그라운드에서 사전 계산
+import precompute
+# [NEW] 세그먼트/키워드 루프를 한 번의 DuckDB 멀티스레드 집계로 대체
+import parallel_agg
+# [NEW] 차트 집계를 SQL(DuckDB)로 실행 - pandas는 결과 테이블만 다룸
+import agg_engine
+# [NEW] 실패 검색어 고유 세션 HyperLogLog 추정 (DASHBOARD_DISTINCT_MODE=hll)
+import hll
+# [NEW] 스트리밍 모드: 원본 행을 메모리에 올리지 않고 parquet 원천에서 바로 집계
+import streaming
+# [NEW] 전체 어휘 검색어 자동완성 (접두어/초성/부분 문자열)
+import keyword_index
+# [NEW] 랭킹 테이블 벡터화 스타일 (표시 데이터는 get_ranking_table에서 캐싱)
+import tables
+# [NEW] graph_objects 기반 차트 생성 (Figure는 get_*_figure에서 캐싱, plotly는 첫 사용 시 import)
+import figures
+# [NEW] 사이드바 필터/탭별 프래그먼트 (위젯 변경 시 해당 영역만 다시 실행)
+import fragments
+# [NEW] 세션별 세대 토큰 (새 필터 요청 시 이전 요청의 로드/사전 계산을 중단)
+import generations
 
 # Must be the first streamlit command
 st.set_page_config(layout="wide", page_title="SRT Dashboard")
@@ -265,52 +224,97 @@ def load_custom_css():
 
 load_custom_css()
 
+# [NEW] 캐시 메트릭 엔드포인트 (DASHBOARD_METRICS_PORT 설정 시에만)
+cache_metrics.start_metrics_server()
+
 # [중요] 동기화는 캐시 외부에서 매번 실행하여 새 파일을 즉시 감지하도록 합니다.
 data_loader.sync_data_storage()
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def get_initial_df():
+# [NEW] 스트리밍 모드의 전체 기간 원천 (요약은 원천 객체별로 한 번만 계산되므로 원천을 캐싱)
+# [UPDATED] storage_key: 전체 파티션 지문 (동기화로 파티션이 바뀌면 새로 만들고 이전 항목은 제거)
+@cache_frame(ttl=3600, max_entries=1, show_spinner=False)
+def get_stream_source(storage_key):
+    return data_loader.parquet_source()
+
+@cache_frame(ttl=3600, max_entries=1, show_spinner=False)
+def get_initial_df(storage_key):
     # 실제 데이터 로드 및 전처리만 캐싱
-    raw = data_loader.load_data_range()
-    return data_loader.preprocess_data(raw)
+    # [UPDATED] 전처리 완료 Arrow 스냅샷을 mmap으로 로드 (없으면 생성)
+    return data_loader.load_preprocessed()
 
-# [NEW] 집계 데이터 캐싱 - 핵심 성능 개선
-@st.cache_data(ttl=3600)
-def get_daily_aggregated(data_id, keyword):
+# [NEW] 검색어 자동완성 색인 (데이터 스냅샷마다 1회 생성, 모든 세션 공유)
+@cache_frame(ttl=3600, max_entries=1, show_spinner=False)
+def get_keyword_index(storage_key):
+    """전체 기간 검색어를 검색량 순으로 색인"""
+    with tracer.span("검색어 색인 생성") as sp:
+        if STREAMING_MODE:
+            counts = streaming.keyword_counts(get_stream_source(storage_key))
+        else:
+            counts = streaming.keyword_counts(get_initial_df(storage_key))
+        index = keyword_index.KeywordIndex.from_counts(counts)
+        sp.set(keywords=len(index))
+    # [NEW] 접두어/자모/초성/n-gram 검색 색인은 백그라운드에서 미리 생성 (첫 키 입력이 기다리지 않음)
+    index.warm()
+    return index
+
+# [NEW] 차트 집계 원천: parquet 직접 스캔 (DASHBOARD_AGG_SOURCE=memory이면 세션의 필터링 DataFrame)
+AGG_SOURCE = os.getenv('DASHBOARD_AGG_SOURCE', 'parquet').lower()
+
+def get_agg_source():
     """
-    일자별 집계 데이터를 캐싱 (선형 차트용)
-    data_id: 데이터 고유 식별자 (날짜범위 + 행수)
+    현재 세션 필터(기간 + 접속 경로)의 집계 원천
+    parquet을 스캔할 수 없거나 pandas 엔진이면 세션의 필터링 DataFrame 사용
     """
-    # 세션 상태에서 필터링된 데이터 가져오기 (접속 경로 필터 적용됨)
     if 'cached_filtered_df' not in st.session_state:
-        return pd.DataFrame()
+        return None
     
-    df = st.session_state['cached_filtered_df']
+    filter_key = st.session_state.get('cached_path_filter_key', st.session_state.get('cached_date_range'))
+    cached = st.session_state.get('cached_agg_source')
+    if cached is not None and cached[0] == filter_key:
+        return cached[1]
     
-    if keyword != "전체":
-        df = df[df['search_keyword'] == keyword]
+    # [NEW] 스트리밍 모드에서는 세션의 필터링 데이터가 이미 parquet 원천
+    if not isinstance(st.session_state['cached_filtered_df'], pd.DataFrame):
+        source = st.session_state['cached_filtered_df']
+        st.session_state['cached_agg_source'] = (filter_key, source)
+        return source
     
-    if df.empty:
-        return pd.DataFrame()
+    source = None
+    if AGG_SOURCE == 'parquet' and agg_engine.get_engine().name == 'duckdb':
+        start_date, end_date = st.session_state.get('cached_date_range', (None, None))
+        source = data_loader.parquet_source(
+            start_date, end_date, paths=st.session_state.get('cached_selected_paths')
+        )
+    if source is None:
+        source = agg_engine.FrameSource(st.session_state['cached_filtered_df'])
     
-    # 집계
-    daily = df.groupby('search_date')['sessionid'].count().reset_index()
-    daily.columns = ['Date', 'Count']
-    return daily.sort_values('Date')
+    st.session_state['cached_agg_source'] = (filter_key, source)
+    return source
+
+# [NEW] 집계 데이터 캐싱 - 핵심 성능 개선
+# [UPDATED] 인자는 핸들만 (handle: handles.DataHandle, keyword_id: 스냅샷 어휘의 키워드 id)
+# 집계 원천/필터링 데이터는 handles 레지스트리에서 조회 → 해시 비용 없음, 히트 시 dict 조회 + 뷰
+# max_entries: 키워드 단위 200 (Top 100 목록 + 사전 계산 Top 20 × 여러 필터), 필터(핸들) 단위 8~16
+@cache_handle(ttl=3600, max_entries=200)
+def get_daily_aggregated(handle, keyword_id):
+    """
+    일자별 집계 데이터를 캐싱 (선형 차트용)
+    handle.data: 데이터 내용 지문 (data_loader.data_fingerprint: 파티션 + 필터 조건 + 스키마 버전)
+    """
+    # [UPDATED] 세션 필터의 집계 원천에서 SQL로 집계 (접속 경로 필터 적용됨)
+    source = handles.resolve(handle, 'source')
+    return agg_engine.get_engine().daily_counts(source, handles.keyword(handle.snapshot, keyword_id))
 
 # [NEW] 전체 키워드별 집계 데이터를 미리 계산
-@st.cache_data(ttl=3600)
-def precompute_all_keyword_aggregations(data_id):
+@cache_handle(ttl=3600, max_entries=4)
+def precompute_all_keyword_aggregations(handle):
     """
     모든 키워드의 집계 데이터를 한 번에 계산하여 딕셔너리로 반환
     키워드 선택 시 즉시 반환 가능
     """
-    if 'cached_filtered_df' not in st.session_state:
-        return {}
+    df = handles.resolve(handle, 'rows')
     
-    df = st.session_state['cached_filtered_df']
-    
-    if df.empty:
+    if not isinstance(df, pd.DataFrame) or df.empty:
         return {}
     
     result = {}
@@ -324,10 +328,17 @@ def precompute_all_keyword_aggregations(data_id):
         ).reset_index(),
         'week_ranges': df.groupby('logweek')['search_date'].agg(['min', 'max']).reset_index()
     }
+    generations.checkpoint()
     
     # 각 키워드별 집계
+    if parallel_agg.PARALLEL_AGG:
+        # [UPDATED] 키워드마다 전체 행을 마스킹하는 대신 한 번의 병렬 GROUP BY (결과 동일)
+        result.update(parallel_agg.keyword_daily_counts(df))
+        return result
+    
     unique_keywords = df['search_keyword'].unique()
     for keyword in unique_keywords:
+        generations.checkpoint()
         if keyword and keyword.strip():  # 빈 키워드 제외
             kw_df = df[df['search_keyword'] == keyword]
             if not kw_df.empty:
@@ -338,11 +349,14 @@ def precompute_all_keyword_aggregations(data_id):
     
     return result
 
-@st.cache_data(ttl=3600)
-def get_daily_aggregated_fast(data_id, keyword, precomputed):
+@cache_handle(ttl=3600, max_entries=200)
+def get_daily_aggregated_fast(handle, keyword_id):
     """
     미리 계산된 데이터에서 빠르게 가져오기
+    [UPDATED] 사전 계산 dict를 인자로 받아 해시하지 않고 핸들로 캐시에서 조회
     """
+    precomputed = precompute_all_keyword_aggregations(handle)
+    keyword = handles.keyword(handle.snapshot, keyword_id) or handles.ALL_KEYWORDS_LABEL
     if keyword not in precomputed:
         return pd.DataFrame()
     
@@ -354,261 +368,260 @@ def get_daily_aggregated_fast(data_id, keyword, precomputed):
     df['Date'] = pd.to_datetime(df['Date'])
     return df.sort_values('Date')
 
-@st.cache_data(ttl=3600)
-def get_weekly_aggregated(data_id, keyword):
+@cache_handle(ttl=3600, max_entries=200)
+def get_weekly_aggregated(handle, keyword_id):
     """
     주차별/요일별 집계 데이터를 캐싱 (막대형 차트용)
     """
-    if 'cached_filtered_df' not in st.session_state:
-        return pd.DataFrame(), pd.DataFrame()
-    
-    df = st.session_state['cached_filtered_df']
+    source = handles.resolve(handle, 'source')
     
-    if keyword != "전체":
-        df = df[df['search_keyword'] == keyword]
-    
-    if df.empty:
+    # [UPDATED] 요일별 집계 + 주차별 날짜 범위 (엔진, 스캔 1회)
+    daily_counts, week_ranges = agg_engine.get_engine().weekday_counts(
+        source, handles.keyword(handle.snapshot, keyword_id)
+    )
+    if daily_counts.empty:
         return pd.DataFrame(), pd.DataFrame()
     
-    # 주차별 날짜 범위
-    week_ranges = df.groupby('logweek')['search_date'].agg(['min', 'max']).reset_index()
     week_ranges['Label'] = week_ranges.apply(
         lambda x: f"{x['min'].strftime('%y/%m/%d')} ~ {x['max'].strftime('%y/%m/%d')}", axis=1
     )
     
-    # 요일별 집계
-    daily_counts = df.groupby(['logweek', df["search_date"].dt.dayofweek]).agg(
-        session_count=('sessionid', 'count'),
-        actual_date=('search_date', 'min')
-    ).reset_index()
-    daily_counts.columns = ['logweek', 'day_num', 'Session Count', 'actual_date']
-    
     return daily_counts, week_ranges
 
 # [NEW] 경량 차트 생성 함수 (집계된 데이터만 사용)
+# [UPDATED] px 대신 figures 모듈에서 graph_objects + numpy 배열로 직접 생성 (결과 모양 동일)
 def create_bar_chart_from_aggregated(daily_counts, week_ranges):
     """
     집계된 데이터로 막대형 차트 생성 (데이터 재처리 없음)
     visualizations.py의 plot_keyword_group_trend와 동일한 구조 사용
     """
-    import plotly.express as px
-    
-    if daily_counts.empty:
-        return None
-    
-    # 요일 매핑
-    days_ko = {0:'월', 1:'화', 2:'수', 3:'목', 4:'금', 5:'토', 6:'일'}
-    daily_counts['Day'] = daily_counts['day_num'].map(days_ko)
-    daily_counts['date_str'] = daily_counts['actual_date'].dt.strftime('%y/%m/%d')
-    
-    # 주차 레이블 매핑
-    week_label_map = dict(zip(week_ranges['logweek'], week_ranges['Label']))
-    daily_counts['Week Label'] = daily_counts['logweek'].map(week_label_map)
-    
-    # 정렬
-    daily_counts = daily_counts.sort_values(['logweek', 'day_num'])
-    
-    # 색상 맵 (visualizations.py와 동일한 방식)
-    sorted_weeks = sorted(daily_counts['logweek'].unique())
-    week_labels_sorted = [week_label_map[w] for w in sorted_weeks]
-    n_weeks = len(sorted_weeks)
-    color_map = {}
-    base_r, base_g, base_b = 94, 43, 184
-    
-    for i, week in enumerate(sorted_weeks):
-        if n_weeks > 1:
-            opacity = 0.2 + (0.8 * (i / (n_weeks - 1)))
-        else:
-            opacity = 1.0
-        label = week_label_map[week]
-        color_map[label] = f"rgba({base_r}, {base_g}, {base_b}, {opacity:.2f})"
-    
-    # 요일 순서
-    days_order = ["월", "화", "수", "목", "금", "토", "일"]
-    
-    # 차트 생성 (visualizations.py와 동일한 px.bar 구조)
-    fig = px.bar(
-        daily_counts,
-        x='Day',
-        y='Session Count',
-        color='Week Label',
-        barmode='group',
-        custom_data=['Week Label'],  # hover template용
-        category_orders={
-            "Week Label": week_labels_sorted,
-            "Day": days_order
-        },
-        color_discrete_map=color_map,
-        template="plotly_white"
-    )
-    
-    # Layout 설정 (범례 오른쪽 배치)
-    fig.update_layout(
-        font_family="Journey, sans-serif",
-        title={
-            'text': '요일별 검색량 추이',
-            'x': 0.5,
-            'xanchor': 'center',
-            'font': {'size': 18, 'weight': 700}
-        },
-        xaxis={
-            'title': {'text': "요일", 'font': {'size': 14}},
-            'tickfont': {'size': 12}
-        },
-        yaxis={
-            'title': {'text': "검색량", 'font': {'size': 14}},
-            'tickfont': {'size': 12}
-        },
-        legend={
-            'title': {
-                'text': '조회 기간', 
-                'font': {'size': 13, 'weight': 600},
-                'side': 'top'  # 제목을 상단에 배치
-            },
-            'orientation': 'v',  # 세로 방향
-            'yanchor': 'middle',
-            'y': 0.5,  # 중앙 정렬
-            'xanchor': 'left',
-            'x': 1.02,  # 차트 오른쪽 밖
-            'font': {'size': 12},
-            'itemsizing': 'constant',
-            'tracegroupgap': 8,  # 세로 배치 간격
-            'bgcolor': 'rgba(255, 255, 255, 0.8)'  # 반투명 배경만 유지
-        },
-        hovermode="closest",
-        height=480,
-        margin=dict(t=70, b=60, l=60, r=180)  # 오른쪽 마진 180px (범례 공간)
-    )
-    
-    # hover template 설정 (visualizations.py와 동일)
-    fig.update_traces(
-        hovertemplate="date: %{customdata[0]}<br>count: %{y:,.0f}<extra></extra>"
-    )
-    
-    return fig
+    return figures.weekday_bar(daily_counts, week_ranges)
 
 def create_line_chart_from_aggregated(daily_agg):
     """
     집계된 데이터로 선형 차트 생성 (데이터 재처리 없음)
     """
-    import plotly.graph_objects as go
-    
-    if daily_agg.empty:
-        return None
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=daily_agg['Date'],
-        y=daily_agg['Count'],
-        mode='lines+markers',
-        name='검색량',
-        line=dict(color='#5E2BB8', width=3, shape='spline'),
-        marker=dict(size=8, color='#5E2BB8'),
-        hovertemplate='날짜: %{x|%Y/%m/%d}<br>검색량: %{y:,.0f}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        font_family="Journey, sans-serif",
-        title='일자별 검색량 추이',
-        title_x=0.5,
-        title_xanchor='center',
-        xaxis_title="날짜",
-        yaxis_title="검색량",
-        yaxis=dict(rangemode='tozero'),
-        template="plotly_white",
-        hovermode="closest",
-        showlegend=False
-    )
-    
-    return fig
+    return figures.daily_line(daily_agg)
 
 # [NEW] 파이 차트용 집계 데이터 캐싱
-@st.cache_data(ttl=3600)
-def get_pie_aggregated(data_id, keyword):
+@cache_handle(ttl=3600, max_entries=200)
+def get_pie_aggregated(handle, keyword_id):
     """
     파이 차트용 집계 데이터를 한 번에 캐싱
     """
-    if 'cached_filtered_df' not in st.session_state:
-        return {}, {}, {}, {}
-    
-    df = st.session_state['cached_filtered_df']
-    
-    if keyword != "전체":
-        df = df[df['search_keyword'] == keyword]
+    source = handles.resolve(handle, 'source')
     
-    if df.empty:
-        return {}, {}, {}, {}
-    
-    # 1. 경로 (pathcd) 집계
-    path_map = {'MDA': '앱', 'DCM': '모바일웹', 'DCP': 'PC'}
-    target_col = 'pathcd' if 'pathcd' in df.columns else 'pathCd'
-    if target_col in df.columns:
-        df_temp = df.copy()
-        df_temp['Path_Label'] = df_temp[target_col].map(path_map)
-        path_counts = df_temp.dropna(subset=['Path_Label'])['Path_Label'].value_counts().to_dict()
-    else:
-        path_counts = {}
-    
-    # 2. 로그인 상태 집계
-    if 'uidx' in df.columns:
-        df_temp = df.copy()
-        df_temp['status'] = df_temp['uidx'].apply(lambda x: '로그인' if 'C' in str(x) else '비로그인')
-        login_counts = df_temp['status'].value_counts().to_dict()
-    else:
-        login_counts = {}
-    
-    # 3. 성별 집계
-    if 'gender' in df.columns:
-        gender_map = {'F': '여성', 'M': '남성'}
-        df_temp = df.copy()
-        df_temp['Gender_Label'] = df_temp['gender'].map(gender_map)
-        gender_counts = df_temp.dropna(subset=['Gender_Label'])['Gender_Label'].value_counts().to_dict()
-    else:
-        gender_counts = {}
-    
-    # 4. 연령 집계
-    if 'age' in df.columns:
-        age_counts = df[df['age'] != '미분류']['age'].value_counts().to_dict()
-    else:
-        age_counts = {}
-    
-    return path_counts, login_counts, gender_counts, age_counts
+    # [UPDATED] 경로/로그인/성별/연령 비중을 한 번의 GROUP BY로 집계
+    counts = agg_engine.get_engine().pie_counts(source, handles.keyword(handle.snapshot, keyword_id))
+    return counts['path'], counts['login'], counts['gender'], counts['age']
 
 def create_pie_chart(data_dict, title, color_sequence):
     """
     집계된 데이터로 파이 차트 생성 (빠른 렌더링)
     """
-    import plotly.express as px
-    
-    if not data_dict:
-        return None
-    
-    df = pd.DataFrame(list(data_dict.items()), columns=['Category', 'Count'])
-    
-    fig = px.pie(
-        df, values='Count', names='Category',
-        color_discrete_sequence=color_sequence,
-        hole=0.4,
-        template="plotly_white"
+    return figures.donut(data_dict, title, color_sequence)
+
+# [NEW] 차트 Figure 캐싱 - 같은 집계 지문 + 차트 옵션이면 재실행마다 다시 만들지 않음
+# 캐시된 Figure는 세션 간 공유 (st.plotly_chart는 직렬화만 하므로 수정되지 않음)
+CHART_TYPES = ("막대형", "선형")
+
+PIE_CHARTS = (
+    ("채널 비중", ("#5E2BB8", "#8A63D2", "#B59CE6")),
+    ("로그인 비중", ("#5E2BB8", "#B59CE6")),
+    ("성별 비중", ("#5E2BB8", "#B59CE6")),
+    ("연령 비중", ("#B59CE6", "#8A63D2", "#7445C7", "#5E2BB8")),
+)
+
+def show_chart(fig, chart):
+    """
+    Figure 출력 + 전송 크기 기록 (차트 이름별 메트릭: ?admin=1, /metrics)
+    """
+    cache_metrics.record_payload(chart, figures.payload_bytes(fig))
+    st.plotly_chart(fig, use_container_width=True)
+
+@cache_handle(ttl=3600, max_entries=200)
+def get_chart_figure(handle, keyword_id, chart_type):
+    """
+    메인 차트 Figure (막대형: 요일별 검색량, 선형: 일자별 검색량)
+    데이터가 없으면 None
+    """
+    if chart_type == "막대형":
+        daily_counts, week_ranges = get_weekly_aggregated(handle, keyword_id)
+        generations.checkpoint()
+        return create_bar_chart_from_aggregated(daily_counts, week_ranges)
+    daily = get_daily_aggregated(handle, keyword_id)
+    generations.checkpoint()
+    return create_line_chart_from_aggregated(daily)
+
+@cache_handle(ttl=3600, max_entries=200)
+def get_pie_figures(handle, keyword_id):
+    """
+    파이 차트 4개 Figure (PIE_CHARTS 순서, 데이터가 없는 항목은 None)
+    """
+    counts = get_pie_aggregated(handle, keyword_id)
+    generations.checkpoint()
+    return tuple(
+        create_pie_chart(data_dict, title, list(colors))
+        for data_dict, (title, colors) in zip(counts, PIE_CHARTS)
     )
-    
-    fig.update_layout(
-        font_family="Journey, sans-serif",
-        title_text=title,
-        title_x=0.5,
-        title_xanchor="center",
-        margin=dict(t=40, b=30, l=10, r=10),  # 하단 여백 증가 (15 → 30)
-        height=300,  # 크기 약간 증가 (280 → 300)
-        showlegend=False,
-        autosize=True
+
+@cache_handle(ttl=3600, max_entries=32)
+def get_keyword_trend_figure(handle, kind, keywords, title):
+    """
+    상위 키워드 최근 8주 추이 Figure
+    kind: 'popular' (인기 검색어) 또는 'failed' (실패 검색어), keywords: 키워드 튜플
+    """
+    df = get_failed_trend_df(handle) if kind == 'failed' else handles.resolve(handle, 'rows')
+    return visualizations.plot_keyword_group_trend(df, list(keywords), title=title)
+
+# [NEW] 탭 구성 (지연 탭 + 백그라운드 예열에서 공용)
+TAB_LABELS = ["주간 트렌드", "인기 검색어", "속성별 검색어", "연령별 검색어", "실패 검색어"]
+
+# Left -> Right Order: Overseas, Domestic, Hotel, Tour
+SEARCH_TYPE_CATEGORIES = [
+    ("해외여행", "package"),
+    ("국내여행", "domestic"),
+    ("호텔", "hotel"),
+    ("투어/입장권", "localTour")
+]
+
+AGE_CATEGORIES = ["20대 이하", "30대", "40대", "50대 이상"]
+
+SEARCH_TYPES = tuple(search_type for _, search_type in SEARCH_TYPE_CATEGORIES)
+
+# [NEW] 탭별 랭킹 계산 캐싱 - 탭을 열 때 또는 백그라운드 예열 시 1회만 계산
+# [UPDATED] 필터링 데이터는 핸들로 레지스트리에서 조회 (같은 지문이면 세션 간 공유)
+@cache_handle(ttl=3600, max_entries=16)
+def get_popular_stats(handle):
+    """
+    인기 검색어 랭킹 (인기 검색어 탭)
+    """
+    return visualizations.calculate_popular_keywords_stats(handles.resolve(handle, 'rows'))
+
+@cache_handle(ttl=3600, max_entries=16)
+def get_segment_stats(handle, column, values):
+    """
+    세그먼트 전체의 인기 검색어 랭킹을 한 번에 계산 (속성별/연령별 탭)
+    values: 세그먼트 값 튜플 → {value: 랭킹}
+    """
+    return parallel_agg.segment_popular_stats(handles.resolve(handle, 'rows'), column, values)
+
+# [NEW] 실패 검색어 HLL 스케치 (DASHBOARD_DISTINCT_MODE=hll)
+@cache_handle(ttl=3600, max_entries=8)
+def get_failed_sketches(date_handle):
+    """
+    기간 단위 실패 검색어 스케치 (접속 경로 필터 전 데이터)
+    접속 경로 선택이 바뀌어도 다시 스캔하지 않고 경로별 스케치를 합쳐서 추정
+    """
+    return agg_engine.get_engine().failed_sketches(agg_engine.as_source(handles.resolve(date_handle, 'rows')))
+
+@cache_handle(ttl=3600, max_entries=16)
+def get_failed_stats(handle, sketch_key):
+    """
+    실패 검색어 랭킹
+    sketch_key: 스케치 모드이면 (기간 핸들, 선택 경로 튜플), 아니면 None → 정확 집계 (failed_sketch_key)
+    """
+    # [UPDATED] 스케치 모드이면 스케치 합집합으로 추정 (기본은 정확 집계)
+    # 세션 상태를 읽지 않음 → 사전 계산 스레드에서도 같은 키는 같은 결과
+    sketches, paths = None, None
+    if sketch_key is not None:
+        date_handle, paths = sketch_key
+        sketches = get_failed_sketches(date_handle)
+    return visualizations.calculate_failed_keywords_stats(
+        handles.resolve(handle, 'rows'), sketches=sketches, paths=paths
     )
-    fig.update_traces(textposition='inside', textinfo='percent+label')
-    return fig
+
+@cache_handle(ttl=3600, max_entries=8)
+def get_failed_trend_df(handle):
+    """
+    실패 검색어 추이 차트용 필터링 데이터
+    """
+    df = handles.resolve(handle, 'rows')
+    # [NEW] 스트리밍 모드: 필터링된 행 대신 실패 검색어 SQL 뷰 (추이 차트가 원천에서 바로 집계)
+    if not isinstance(df, pd.DataFrame):
+        return agg_engine.FailedSource(df)
+    return visualizations.get_filtered_failed_keywords_df(df)
+
+# [NEW] 랭킹 테이블 표시 데이터 캐싱 - 랭킹 결과당 한 번만 서식/셀 스타일 계산 (탭 전환 시 재사용)
+@cache_handle(ttl=3600, max_entries=64)
+def get_ranking_table(handle, kind, segment, sketch_key=None):
+    """
+    랭킹 테이블 (tables.RankingTable, 랭킹이 비어 있으면 None)
+    kind: 'popular' | 'search_type' | 'age' | 'failed', segment: 속성/연령 값 (그 외 None)
+    sketch_key: 'failed'의 스케치 인자 (get_failed_stats와 동일)
+    """
+    if kind == 'failed':
+        stats = get_failed_stats(handle, sketch_key)
+        if stats is None or stats.empty:
+            return None
+        return tables.ranking_table(stats, keyword_col='search_keyword', count_col='cnt', count_label='실패 횟수')
+    if kind == 'search_type':
+        stats = get_segment_stats(handle, 'search_type', SEARCH_TYPES)[segment]
+    elif kind == 'age':
+        stats = get_segment_stats(handle, 'age', tuple(AGE_CATEGORIES))[segment]
+    else:
+        stats = get_popular_stats(handle)
+    if stats is None or stats.empty:
+        return None
+    generations.checkpoint()
+    return tables.ranking_table(stats)
+
+def show_ranking_table(table):
+    """캐시된 랭킹 테이블 출력 (Styler만 새로 생성)"""
+    st.dataframe(tables.style(table), use_container_width=True, height=800, hide_index=True)
+
+# 사전 계산할 상위 키워드 수 (파이 차트/일자별 추이)
+PRECOMPUTE_TOP_KEYWORDS = 20
+
+def precompute_keyword_charts(handle, df, n=PRECOMPUTE_TOP_KEYWORDS):
+    """
+    상위 n개 키워드의 막대/선형/파이 차트 집계와 Figure를 미리 캐싱
+    (job 취소 시 중단, 새 세대가 시작되면 키워드/차트마다 checkpoint에서 중단)
+    """
+    top_keywords = streaming.top_keywords(df, n)
+    for keyword in [handles.ALL_KEYWORDS_LABEL] + top_keywords:
+        if precompute.cancelled():
+            return
+        generations.checkpoint()
+        keyword_id = handles.keyword_id(handle.snapshot, keyword)
+        # [UPDATED] 집계 + Figure까지 캐싱 (막대형/선형 전환 시 바로 표시)
+        for chart_type in CHART_TYPES:
+            get_chart_figure(handle, keyword_id, chart_type)
+        get_pie_figures(handle, keyword_id)
+
+def precompute_ranking_tables(handle, kind, segments):
+    """
+    세그먼트별 랭킹 테이블 사전 계산 (세그먼트마다 checkpoint)
+    """
+    for segment in segments:
+        generations.checkpoint()
+        get_ranking_table(handle, kind, segment)
+
+def precompute_tasks(handle, df, open_labels=()):
+    """
+    사전 계산 작업 목록 (라벨, callable) - 이미 열려 있는 탭은 제외, 앞쪽이 우선
+    (df는 상위 키워드 계산용, 각 작업의 입력은 handle로 레지스트리에서 조회)
+    """
+    # [UPDATED] 랭킹 + 표시용 테이블까지 계산
+    tasks = []
+    if "인기 검색어" not in open_labels:
+        tasks.append(("인기 검색어", lambda: get_ranking_table(handle, 'popular', None)))
+    if "속성별 검색어" not in open_labels:
+        tasks.append(("속성별 검색어", lambda: precompute_ranking_tables(handle, 'search_type', SEARCH_TYPES)))
+    if "연령별 검색어" not in open_labels:
+        tasks.append(("연령별 검색어", lambda: precompute_ranking_tables(handle, 'age', AGE_CATEGORIES)))
+    if "실패 검색어" not in open_labels:
+        sketch_key = failed_sketch_key(handle)
+        tasks += [
+            ("실패 검색어", lambda: get_ranking_table(handle, 'failed', None, sketch_key)),
+            ("실패 검색어 추이", lambda: get_failed_trend_df(handle)),
+        ]
+    tasks.append((f"Top {PRECOMPUTE_TOP_KEYWORDS} 키워드 차트", lambda: precompute_keyword_charts(handle, df)))
+    return tasks
 
 # [NEW] Fragment를 사용한 차트 렌더링 - 부분 재실행으로 속도 향상
-@st.fragment
-def render_charts(data_id, selected_keyword, plot_df):
+@fragments.fragment("주간 트렌드 차트")
+def render_charts(handle, selected_keyword, plot_df):
     """
     차트만 재실행하는 프래그먼트 (전체 페이지 재실행 방지)
     키워드/차트 타입 변경 시에도 이 부분만 재실행 → 초고속
@@ -625,96 +638,46 @@ def render_charts(data_id, selected_keyword, plot_df):
             key="chart_type_radio_fragment"  # 고유 키
         )
     
+    register_handle_inputs(handle)
+    keyword_id = handles.keyword_id(handle.snapshot, selected_keyword)
+    
     # 메인 차트 (막대형 또는 선형)
+    # [UPDATED] 집계 + Figure 모두 캐싱 → 차트 타입 전환은 캐시 조회만 (다시 생성하지 않음)
     if not plot_df.empty:
-        with PerfTimer(f"차트 렌더링 ({chart_type})"):
-            if chart_type == "막대형":
-                # 집계 데이터 가져오기 (캐싱됨)
-                daily_counts, week_ranges = get_weekly_aggregated(data_id, selected_keyword)
-                
-                if not daily_counts.empty:
-                    fig1 = create_bar_chart_from_aggregated(daily_counts, week_ranges)
-                    if fig1:
-                        st.plotly_chart(fig1, use_container_width=True)
-                    else:
-                        st.info("시각화할 데이터가 없습니다.")
-                else:
-                    st.info("시각화할 데이터가 없습니다.")
+        with tracer.span("차트 렌더링", chart_type=chart_type, keyword=selected_keyword):
+            fig = get_chart_figure(handle, keyword_id, chart_type)
+            if fig:
+                show_chart(fig, f"주간 트렌드/{chart_type}")
             else:
-                # 선형 차트
-                daily_agg = get_daily_aggregated(data_id, selected_keyword)
-                
-                if not daily_agg.empty:
-                    fig_line = create_line_chart_from_aggregated(daily_agg)
-                    if fig_line:
-                        st.plotly_chart(fig_line, use_container_width=True)
-                    else:
-                        st.info("시각화할 데이터가 없습니다.")
-                else:
-                    st.info("시각화할 데이터가 없습니다.")
+                st.info("시각화할 데이터가 없습니다.")
     else:
         st.info("시각화할 데이터가 없습니다.")
     
     # 파이 차트 (하단)
     if not plot_df.empty:
-        with PerfTimer("파이 차트 집계"):
-            path_counts, login_counts, gender_counts, age_counts = get_pie_aggregated(data_id, selected_keyword)
+        with tracer.span("파이 차트 집계", keyword=selected_keyword):
+            pie_figures = get_pie_figures(handle, keyword_id)
         
         # 4개 컬럼 레이아웃
-        pie_col1, pie_col2, pie_col3, pie_col4 = st.columns(4)
-        
-        with pie_col1:
-            fig_path = create_pie_chart(
-                path_counts, 
-                "채널 비중",
-                ["#5E2BB8", "#8A63D2", "#B59CE6"]
-            )
-            if fig_path: st.plotly_chart(fig_path, use_container_width=True)
-        
-        with pie_col2:
-            fig_login = create_pie_chart(
-                login_counts,
-                "로그인 비중",
-                ["#5E2BB8", "#B59CE6"]
-            )
-            if fig_login: st.plotly_chart(fig_login, use_container_width=True)
-        
-        with pie_col3:
-            fig_gender = create_pie_chart(
-                gender_counts,
-                "성별 비중",
-                ["#5E2BB8", "#B59CE6"]
-            )
-            if fig_gender: st.plotly_chart(fig_gender, use_container_width=True)
-        
-        with pie_col4:
-            fig_age = create_pie_chart(
-                age_counts,
-                "연령 비중",
-                ["#B59CE6", "#8A63D2", "#7445C7", "#5E2BB8"]
-            )
-            if fig_age: st.plotly_chart(fig_age, use_container_width=True)
-
-# Base DataFrame for initial scale
-# 커스텀 스피너로 로딩 시간 표시
-import os
-data_exists = os.path.exists("data_storage") and len(glob.glob("data_storage/*.parquet")) > 0
+        for pie_col, fig_pie, (pie_title, _) in zip(st.columns(4), pie_figures, PIE_CHARTS):
+            with pie_col:
+                if fig_pie: show_chart(fig_pie, f"주간 트렌드/{pie_title}")
 
-if data_exists:
-    # 캐시된 데이터가 있으면 빠름 (2-3초)
-    with st.spinner("데이터를 메모리에 로드하고 있습니다... (예상 시간: 2-3초)"):
-        df_full = get_initial_df()
-else:
-    # Hugging Face에서 다운로드하면 느림 (10-15초)
-    with st.spinner("Hugging Face에서 데이터를 다운로드하고 있습니다... (예상 시간: 10-15초)"):
-        df_full = get_initial_df()
+# [NEW] 사이드바 필터 패널 프래그먼트 - 위젯 변경 시 패널만 다시 실행
+# 기간/파티션/접속 경로 결과가 실제로 바뀐 경우에만 전체 재실행 (종료일 선택 전 중간 상태는 패널만 갱신)
+@fragments.fragment("필터 설정")
+def render_filters(storage_key, df_full):
+    """
+    필터 패널 (with st.sidebar 안에서 호출)
+    결과는 세션 상태로 본문에 전달: filtered_df (필터링 데이터), filter_key (기간 + 파티션 + 접속 경로, 미완성이면 None)
+    """
+    st.header("필터 설정")
 
-if df_full is not None and not df_full.empty:
-    # Sidebar Filters
-    st.sidebar.header("필터 설정")
-    
     # [UPDATED] 데이터셋의 실제 날짜 범위 사용
-    if '검색일' in df_full.columns:
+    if STREAMING_MODE:
+        latest_data_date = df_full.max_date.date()
+        earliest_data_date = df_full.min_date.date()
+    elif '검색일' in df_full.columns:
         latest_data_date = df_full['검색일'].max().date()
         earliest_data_date = df_full['검색일'].min().date()
     elif 'search_date' in df_full.columns:
@@ -724,74 +687,102 @@ if df_full is not None and not df_full.empty:
         # Fallback: 현재 날짜 기준
         latest_data_date = datetime.date.today()
         earliest_data_date = latest_data_date - datetime.timedelta(days=56)
-    
+
     # 기간 선택 UI 설정 (실제 데이터 범위 사용)
     actual_min = earliest_data_date
     actual_max = latest_data_date
-    
-    selected_dates = st.sidebar.date_input(
+
+    selected_dates = st.date_input(
         f"분석 기간 선택",
         value=(actual_min, actual_max),
         min_value=actual_min,
         max_value=actual_max,
         help=f"데이터 기간: {actual_min} ~ {actual_max}"
     )
-    
+    # [UPDATED] 전체 실행이면 '재실행' 루트, 패널만 다시 실행 중이면 '부분 재실행' 루트
+    run_span = tracer.current()
+    # [NEW] 이번 실행에서 시작한 요청 세대 (필터 결과를 새로 계산할 때만)
+    generation = None
+
     # Ensure range is selected
     if isinstance(selected_dates, tuple) and len(selected_dates) == 2:
         start_date, end_date = selected_dates
-        
+
         # [OPTIMIZED] 날짜 범위가 변경된 경우에만 데이터 로드
         date_range_key = (start_date, end_date)
+        # [NEW] 기간과 겹치는 파티션이 동기화로 바뀐 경우에도 다시 로드 (다른 기간의 파티션 변경은 무시)
+        partition_key = data_loader.partition_fingerprint(start_date, end_date)
         if 'cached_date_range' not in st.session_state or \
-           st.session_state['cached_date_range'] != date_range_key:
+           st.session_state['cached_date_range'] != date_range_key or \
+           st.session_state.get('cached_partition_key') != partition_key:
+            # [NEW] 새 요청 세대 시작 → 이전 필터로 예약된 사전 계산은 즉시 취소 (작업 스레드 반환)
+            generation = generations.begin()
+            run_span.set(generation=generation.number)
+
             # DuckDB를 통해 선택된 범위만 고속 로드
-            raw_filtered = data_loader.load_data_range(start_date, end_date)
-            filtered_df = data_loader.preprocess_data(raw_filtered)
-            
+            # [UPDATED] 로드/전처리 단계 사이에서 새 재실행 요청이 오면 중단 (세션 상태는 갱신하지 않음)
+            with tracer.span("기간 데이터 로드", start=str(start_date), end=str(end_date)) as sp:
+                if STREAMING_MODE:
+                    # [NEW] 행을 읽지 않고 기간 필터가 걸린 parquet 원천만 구성
+                    filtered_df = data_loader.parquet_source(start_date, end_date)
+                else:
+                    raw_filtered = data_loader.load_data_range(start_date, end_date)
+                    filtered_df = data_loader.preprocess_data(raw_filtered)
+                sp.set(rows=streaming.row_count(filtered_df))
+
+            run_span.set(date_range=f"{start_date}~{end_date}")
+
             # 원본 데이터를 세션 상태에 저장 (접속 경로 필터링 전)
             st.session_state['cached_base_df'] = filtered_df
             st.session_state['cached_date_range'] = date_range_key
+            st.session_state['cached_partition_key'] = partition_key
         else:
             # 캐시된 원본 데이터 사용 (빠름!)
             filtered_df = st.session_state['cached_base_df']
-        
-        trend_df = filtered_df
     else:
-        st.sidebar.warning("종료일을 선택해주세요.")
+        st.warning("종료일을 선택해주세요.")
         filtered_df = pd.DataFrame()
-        trend_df = pd.DataFrame()
+        date_range_key = partition_key = None
+
+    st.info(f"선택 기간 데이터: {streaming.row_count(filtered_df):,}건")
 
-    st.sidebar.info(f"선택 기간 데이터: {len(filtered_df):,}건")
-    
     # 접속 경로 필터
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("접속 경로")
-    
-    col1, col2, col3 = st.sidebar.columns(3)
-    
+    st.markdown("---")
+    st.subheader("접속 경로")
+
+    col1, col2, col3 = st.columns(3)
+
     with col1:
         filter_app = st.checkbox("앱", value=True, key="filter_app")
     with col2:
         filter_mweb = st.checkbox("모바일웹", value=True, key="filter_mweb")
     with col3:
         filter_pc = st.checkbox("PC", value=True, key="filter_pc")
-    
+
+    # 현재 필터 상태
+    current_filter_state = (filter_app, filter_mweb, filter_pc)
+
     # [OPTIMIZED] 접속 경로 필터 적용 (캐시 활용)
     if not filtered_df.empty:
         path_col = 'pathcd' if 'pathcd' in filtered_df.columns else 'pathCd'
         if path_col in filtered_df.columns:
-            # 현재 필터 상태
-            current_filter_state = (filter_app, filter_mweb, filter_pc)
-            cache_key = f"{st.session_state.get('cached_date_range', '')}_{current_filter_state}"
-            
+            # [UPDATED] 파티션 지문 포함 → 바뀐 파티션과 겹치는 기간이면 다시 필터링
+            cache_key = f"{st.session_state.get('cached_date_range', '')}_{st.session_state.get('cached_partition_key', '')}_{current_filter_state}"
+
+            run_span.set(paths=''.join('1' if f else '0' for f in current_filter_state))
+
             # 필터 상태가 변경된 경우에만 재필터링
             if 'cached_path_filter_key' not in st.session_state or \
                st.session_state['cached_path_filter_key'] != cache_key:
-                
-                # 성능 측정 시작
-                filter_start = time.time()
-                
+
+                # [NEW] 접속 경로만 바뀐 경우에도 새 세대 (기간이 바뀌었으면 위에서 이미 시작)
+                if generation is None:
+                    generation = generations.begin()
+                    run_span.set(generation=generation.number)
+
+                filter_span = tracer.span("접속 경로 필터링").start()
+                filter_span.cache_miss()
+
                 selected_paths = []
                 if filter_app:
                     selected_paths.append('MDA')
@@ -799,577 +790,439 @@ if df_full is not None and not df_full.empty:
                     selected_paths.append('DCM')
                 if filter_pc:
                     selected_paths.append('DCP')
-                
-                if selected_paths:
+
+                # [NEW] 집계 엔진의 parquet 스캔에 같은 경로 필터 적용
+                st.session_state['cached_selected_paths'] = selected_paths
+
+                if selected_paths and STREAMING_MODE:
+                    # [NEW] 접속 경로 필터도 parquet 원천의 SQL 조건으로
+                    start_date, end_date = st.session_state['cached_date_range']
+                    filtered_df = data_loader.parquet_source(start_date, end_date, paths=selected_paths)
+                elif selected_paths:
                     # 원본 데이터에서 필터링 (인덱스 활용으로 빠름!)
                     mask = filtered_df[path_col].isin(selected_paths)
                     filtered_df = filtered_df[mask]
-                    trend_df = filtered_df
                 else:
                     # 아무것도 선택하지 않으면 빈 데이터프레임
                     filtered_df = pd.DataFrame()
-                    trend_df = pd.DataFrame()
-                
+
                 # 필터링 결과 캐싱
                 st.session_state['cached_filtered_df'] = filtered_df
                 st.session_state['cached_path_filter_key'] = cache_key
-                
-                # 성능 로깅
-                filter_time = time.time() - filter_start
-                if filter_time > 0.1:
-                    logger.info(f"  🔵 접속 경로 필터링: {filter_time:.3f}초 ({len(filtered_df):,}건)")
+
+                filter_span.set(rows=streaming.row_count(filtered_df)).end()
             else:
                 # 캐시된 필터링 결과 사용 (매우 빠름! ~0.001초)
                 filtered_df = st.session_state['cached_filtered_df']
-                trend_df = filtered_df
-                logger.info(f"  🟢 접속 경로 필터 캐시 사용 (즉시 반영)")
-        
+                run_span.cache_hit()
+
         # 필터 적용 후 데이터 건수 업데이트
-        st.sidebar.info(f"필터 적용 후: {len(filtered_df):,}건")
+        st.info(f"필터 적용 후: {streaming.row_count(filtered_df):,}건")
 
-    # Main Dashboard
-    if not filtered_df.empty:
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "주간 트렌드", 
-            "인기 검색어", 
-            "속성별 검색어", 
-            "연령별 검색어", 
-            "실패 검색어"
-        ])
-
-        with tab1:
-            # [NEW] 키워드 검색 성능 로깅 시작
-            perf_logger.start_operation(f"키워드 검색")
-            
-            # 타이틀 스타일 (가독성 개선)
-            st.markdown("""
-                <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                    <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                        분석할 키워드 검색
-                    </p>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # [OPTIMIZED] 인기 키워드 목록 캐싱 (필터 변경 시에만 재계산)
-            filter_cache_key = st.session_state.get('cached_path_filter_key', '')
-            
+    # [NEW] 본문으로 결과 전달 - 필터 결과가 바뀌었으면 전체 재실행 (본문 프래그먼트에 새 핸들 전달)
+    filter_key = (date_range_key, partition_key, current_filter_state) if date_range_key else None
+    st.session_state['filtered_df'] = filtered_df
+    st.session_state['filter_key'] = filter_key
+    if fragments.is_fragment_rerun() and filter_key is not None and \
+       filter_key != st.session_state.get('rendered_filter_key'):
+        st.rerun()
+
+# [NEW] 핸들 입력은 세션 상태가 강한 참조로 보유 (레지스트리는 약한 참조)
+def register_handle_inputs(handle, rows=None):
+    """
+    핸들에 세션의 필터링 데이터/집계 원천 등록
+    (스케치 모드이면 기간 핸들에 접속 경로 필터 전 데이터도 등록 → failed_sketch_key)
+
+    전체 실행에서는 rows와 함께 호출해 세션 상태에 보관하고,
+    프래그먼트 부분 재실행에서는 (본문 하단의 등록이 실행되지 않으므로) 세션 상태의 값으로 다시 등록
+    """
+    if rows is not None:
+        inputs = {(handle, 'rows'): rows, (handle, 'source'): get_agg_source()}
+        sketch_key = None
+        if agg_engine.DISTINCT_MODE == 'hll' and 'cached_base_df' in st.session_state:
+            # 접속 경로 조건 없는 기간 핸들 (경로 선택과 무관하게 스케치 공유)
+            date_handle = handles.DataHandle(
+                handle.snapshot, data_loader.data_fingerprint(*st.session_state.get('cached_date_range', (None, None)))
+            )
+            paths = st.session_state.get('cached_selected_paths')
+            inputs[(date_handle, 'rows')] = st.session_state['cached_base_df']
+            sketch_key = (date_handle, tuple(paths) if paths is not None else None)
+        st.session_state['handle_inputs'] = (handle, inputs, sketch_key)
+    registered = st.session_state.get('handle_inputs')
+    if registered is None or registered[0] != handle:
+        return
+    for (target, kind), value in registered[1].items():
+        handles.register(target, kind, value)
+
+def failed_sketch_key(handle):
+    """실패 검색어 랭킹의 스케치 인자 (스케치 모드가 아니면 None → 정확 집계)"""
+    registered = st.session_state.get('handle_inputs')
+    if registered is None or registered[0] != handle:
+        return None
+    return registered[2]
+
+# [NEW] 탭별 프래그먼트 - 탭 안의 위젯은 해당 탭만 다시 실행
+# 인자는 핸들만 (필터링 데이터는 레지스트리, 랭킹/차트는 결과 캐시에서 조회)
+@fragments.fragment("주간 트렌드")
+def render_weekly_tab(handle):
+    register_handle_inputs(handle)
+    trend_df = handles.resolve(handle, 'rows')
+
+    # 타이틀 스타일 (가독성 개선)
+    st.markdown("""
+        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                분석할 키워드 검색
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # [OPTIMIZED] 인기 키워드 목록 캐싱 (필터 변경 시에만 재계산)
+    filter_cache_key = st.session_state.get('cached_path_filter_key', '')
+
+    # [NEW] 검색어 입력 시 전체 어휘에서 자동완성 (입력이 없으면 기존처럼 현재 기간 Top 100)
+    previous_query = st.session_state.get('last_keyword_query', '')
+    keyword_query = st.text_input(
+        "검색어 입력",
+        value=previous_query,
+        placeholder="검색어 입력 (초성 검색 가능, 예: ㅈㅈ → 제주)",
+        label_visibility="collapsed"
+    ).strip()
+    st.session_state['last_keyword_query'] = keyword_query
+
+    if keyword_query:
+        with tracer.span("키워드 자동완성", query=keyword_query) as sp:
+            matches = get_keyword_index(handle.snapshot).search(keyword_query, keyword_index.MAX_RESULTS)
+            search_options = ["전체"] + matches
+            sp.set(matches=len(matches))
+        if not matches:
+            st.caption(f"'{keyword_query}'와(과) 일치하는 검색어가 없습니다.")
+    else:
+        with tracer.span("키워드 목록 (Top 100)") as sp:
             if 'cached_keyword_list' not in st.session_state or \
                st.session_state.get('cached_keyword_list_key') != filter_cache_key:
-                t1 = time.time()
                 # 현재 기간의 상위 100개 키워드만 사용
-                top_keywords = trend_df['search_keyword'].value_counts().head(100).index.tolist()
+                top_keywords = streaming.top_keywords(trend_df, 100)
                 search_options = ["전체"] + top_keywords
-                
+
                 # 키워드 목록 캐싱
                 st.session_state['cached_keyword_list'] = search_options
                 st.session_state['cached_keyword_list_key'] = filter_cache_key
-                
-                perf_logger.log_step("키워드 목록 생성 (Top 100)", time.time() - t1)
+                sp.cache_miss().set(rows=streaming.row_count(trend_df))
             else:
                 # 캐시된 키워드 목록 사용 (즉시!)
                 search_options = st.session_state['cached_keyword_list']
-                perf_logger.log_step("키워드 목록 캐시 사용", 0.001)
-            
-            selected_keyword = st.selectbox(
-                "분석할 키워드 검색", # ID용
-                options=search_options,
-                index=0,
-                label_visibility="collapsed", # 기본 레이블 숨김
-                help="현재 기간의 인기 검색어 Top 100 중 선택하세요."
-            )
-            perf_logger.log_step("Selectbox 렌더링")
-            
-            # Keyword Filter (최적화: 메모리 내 빠른 필터링)
-            t2 = time.time()
-            if selected_keyword != "전체":
-                plot_df = trend_df[trend_df['search_keyword'] == selected_keyword].copy()
-                if plot_df.empty:
-                    st.warning(f"선택하신 기간 내에 '{selected_keyword}'에 대한 데이터가 없습니다.")
-                    plot_df = pd.DataFrame()  # 빈 DataFrame으로 설정
-                else:
-                    st.success(f"'{selected_keyword}' 분석 결과입니다. ({len(plot_df):,}건)")
+                sp.cache_hit()
+
+    # [NEW] 다른 탭을 보는 동안 위젯이 렌더링되지 않아도 선택 키워드 유지
+    # 새 검색어를 입력하면 가장 검색량이 많은 일치 항목 선택
+    last_keyword = st.session_state.get('last_selected_keyword')
+    if keyword_query and keyword_query != previous_query and len(search_options) > 1:
+        default_index = 1
+    elif last_keyword in search_options:
+        default_index = search_options.index(last_keyword)
+    else:
+        default_index = 0
+    selected_keyword = st.selectbox(
+        "분석할 키워드 검색", # ID용
+        options=search_options,
+        index=default_index,
+        label_visibility="collapsed", # 기본 레이블 숨김
+        help="검색어를 입력하면 전체 검색어 중 일치하는 항목(검색량 순)을, 비워 두면 현재 기간의 인기 검색어 Top 100을 보여줍니다."
+    )
+    st.session_state['last_selected_keyword'] = selected_keyword
+    tracer.current().set(keyword=selected_keyword)
+
+    # Keyword Filter (최적화: 메모리 내 빠른 필터링)
+    # [UPDATED] 차트는 집계 원천에서 키워드별로 집계하므로 여기서는 행 수만 확인 (행 사본 생성 없음)
+    with tracer.span("키워드 필터링", keyword=selected_keyword) as sp:
+        if selected_keyword != "전체":
+            keyword_rows = streaming.keyword_rows(trend_df, selected_keyword)
+            if keyword_rows == 0:
+                st.warning(f"선택하신 기간 내에 '{selected_keyword}'에 대한 데이터가 없습니다.")
+                plot_df = pd.DataFrame()  # 빈 DataFrame으로 설정
             else:
+                st.success(f"'{selected_keyword}' 분석 결과입니다. ({keyword_rows:,}건)")
                 plot_df = trend_df
-            perf_logger.log_step(f"데이터 필터링 ({selected_keyword})", time.time() - t2)
+        else:
+            keyword_rows = streaming.row_count(trend_df)
+            plot_df = trend_df
+        sp.set(rows=keyword_rows)
 
-            # [CRITICAL OPTIMIZATION] 데이터 식별자 생성 (캐싱 키)
-            data_id = f"{st.session_state.get('cached_date_range', '')}_{len(trend_df)}"
-            
-            # [NEW] Fragment를 사용한 부분 재실행 최적화
-            t3 = time.time()
-            render_charts(data_id, selected_keyword, plot_df)
-            perf_logger.log_step("차트 렌더링 (전체)", time.time() - t3)
-            
-            # 로깅 종료 (터미널에만 출력)
-            perf_logger.end_operation()
+    # [NEW] Fragment를 사용한 부분 재실행 최적화
+    with tracer.span("주간 트렌드 탭", tab="주간 트렌드"):
+        render_charts(handle, selected_keyword, plot_df)
 
-        with tab2:
-            # st.header("인기 검색어") 제거됨
-            
-            # Calculate Stats using trend_df (needed to find 'Previous Week' for rank change)
-            # calculate_popular_keywords_stats automatically picks the latest week in the passed df as 'Current', which matches selected_week
-            stats_df = visualizations.calculate_popular_keywords_stats(trend_df)
-            
-            if stats_df is not None and not stats_df.empty:
-                col1, col2 = st.columns([1, 2])
-            
-                with col1:
-                    st.markdown("""
-                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                                Top 100 검색어 순위
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                
-                    # Format Table for display - Strictly Top 100
-                    display_df = stats_df[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy().head(100)
-                
-                    # Integer casting for numeric columns
-                    display_df['rank'] = display_df['rank'].astype(int)
-                    display_df['count'] = display_df['count'].astype(int)
-                    display_df['count_change'] = display_df['count_change'].astype(int)
-                
-                    display_df.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
-                
-                    # Apply Pandas Styling with NEW badge support
-                    def color_rank_change(val):
-                        if val == 'NEW':
-                            return 'font-weight: bold'  # JavaScript가 색상 처리
-                        elif isinstance(val, (int, float)) and val < 0:
-                            return 'color: #DC3545'  # Bootstrap red
-                        elif isinstance(val, (int, float)) and val > 0:
-                            return ''  # 양수는 기본 색상 (테마 자동 적응)
-                        else:
-                            return ''
-                    
-                    def highlight_new_row(row):
-                        """NEW가 있는 행 전체에 배경색 적용"""
-                        if row['순위 변화'] == 'NEW':
-                            return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                        return [''] * len(row)
-                        
-                    def color_negative_red(val):
-                        if val < 0:
-                            return 'color: #DC3545'  # Bootstrap red
-                        elif val > 0:
-                            return ''  # 양수는 기본 색상 (테마 자동 적응)
-                        return ''
-                    
-                    def format_with_plus(val):
-                        if val > 0:
-                            return f"+{val:,}"
-                        return f"{val:,}"
-                    
-                    def format_rank_change(val):
-                        if val == 'NEW':
-                            return 'NEW'
-                        elif isinstance(val, (int, float)):
-                            if val > 0:
-                                return f"+{int(val):,}"
-                            return f"{int(val):,}"
-                        return str(val)
-                    
-                    def format_comma(val):
-                        return f"{val:,}"
-
-                    # [Updated Styling] Column-specific alignment using CSS selectors
-                    styled_df = display_df.style.apply(highlight_new_row, axis=1)\
-                        .map(color_negative_red, subset=['전주 대비 변화'])\
-                        .map(color_rank_change, subset=['순위 변화'])\
-                        .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
-                        .set_properties(**{
-                            'font-weight': 'normal',
-                            'font-family': 'Journey, sans-serif'
-                        })\
-                        .set_table_styles([
-                            # 헤더 스타일
-                            {
-                                'selector': 'th', 
-                                'props': [
-                                    ('background-color', '#5E2BB8'), 
-                                    ('color', 'white'), 
-                                    ('text-align', 'center !important'),
-                                    ('font-weight', 'normal'),
-                                    ('font-family', 'Journey, sans-serif')
-                                ]
-                            },
-                            # 순위 컬럼 (1번째) - 가운데
-                            {
-                                'selector': 'td.col0',
-                                'props': [('text-align', 'center !important')]
-                            },
-                            # 검색어 컬럼 (2번째) - 왼쪽
-                            {
-                                'selector': 'td.col1',
-                                'props': [('text-align', 'left !important')]
-                            },
-                            # 검색량 컬럼 (3번째) - 오른쪽
-                            {
-                                'selector': 'td.col2',
-                                'props': [('text-align', 'right !important')]
-                            },
-                            # 전주 대비 변화 컬럼 (4번째) - 오른쪽
-                            {
-                                'selector': 'td.col3',
-                                'props': [('text-align', 'right !important')]
-                            },
-                            # 순위 변화 컬럼 (5번째) - 가운데
-                            {
-                                'selector': 'td.col4',
-                                'props': [('text-align', 'center !important')]
-                            }
-                        ])
-
-                    # Display table
-                    st.dataframe(
-                        styled_df, 
-                        use_container_width=True, 
-                        height=800, 
-                        hide_index=True
-                    )
-                
-                with col2:
-                    # Add spacer to align with Table Header on the left
-                    st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
-                
-                    # Top 1-5 Chart (Use trend_df for 8-week history)
-                    top5_keywords = stats_df.sort_values('rank').head(5)['keyword'].tolist()
-                    if top5_keywords:
-                        fig_top5 = visualizations.plot_keyword_group_trend(
-                            trend_df, top5_keywords, title="1~5위 키워드별 검색량 추이"
-                        )
-                        st.plotly_chart(fig_top5, use_container_width=True)
-                
-                    # Top 6-10 Chart
-                    next5_keywords = stats_df.sort_values('rank').iloc[5:10]['keyword'].tolist()
-                    if next5_keywords:
-                        fig_next5 = visualizations.plot_keyword_group_trend(
-                            trend_df, next5_keywords, title="6~10위 키워드별 검색량 추이"
-                        )
-                        st.plotly_chart(fig_next5, use_container_width=True)
+@fragments.fragment("인기 검색어")
+def render_popular_tab(handle):
+    register_handle_inputs(handle)
+    trend_df = handles.resolve(handle, 'rows')
+    # st.header("인기 검색어") 제거됨
+
+    # Calculate Stats using trend_df (needed to find 'Previous Week' for rank change)
+    # calculate_popular_keywords_stats automatically picks the latest week in the passed df as 'Current', which matches selected_week
+    with tracer.span("인기 검색어 랭킹", tab="인기 검색어") as sp:
+        stats_df = get_popular_stats(handle)
+        sp.set(rows=streaming.row_count(trend_df))
+
+    if stats_df is not None and not stats_df.empty:
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            st.markdown("""
+                <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                    <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                        Top 100 검색어 순위
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+
+            # [UPDATED] Top 100 표시 데이터/셀 스타일은 랭킹당 1회 계산 후 캐싱 (tables.ranking_table)
+            show_ranking_table(get_ranking_table(handle, 'popular', None))
+
+        with col2:
+            # Add spacer to align with Table Header on the left
+            st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
+
+            # Top 1-5 Chart (Use trend_df for 8-week history)
+            top5_keywords = stats_df.sort_values('rank').head(5)['keyword'].tolist()
+            if top5_keywords:
+                fig_top5 = get_keyword_trend_figure(
+                    handle, 'popular', tuple(top5_keywords), "1~5위 키워드별 검색량 추이"
+                )
+                show_chart(fig_top5, "인기 검색어/1~5위 추이")
+
+            # Top 6-10 Chart
+            next5_keywords = stats_df.sort_values('rank').iloc[5:10]['keyword'].tolist()
+            if next5_keywords:
+                fig_next5 = get_keyword_trend_figure(
+                    handle, 'popular', tuple(next5_keywords), "6~10위 키워드별 검색량 추이"
+                )
+                show_chart(fig_next5, "인기 검색어/6~10위 추이")
+    else:
+        st.info("데이터가 충분하지 않습니다.")
+
+@fragments.fragment("속성별 검색어")
+def render_search_type_tab(handle):
+    register_handle_inputs(handle)
+    trend_df = handles.resolve(handle, 'rows')
+    # st.header("속성별 인기 검색어 (Top 100)") 제거됨
+
+    # 4 Categories as requested
+    # Left -> Right Order: Overseas, Domestic, Hotel, Tour
+    categories = SEARCH_TYPE_CATEGORIES
+
+    # Layout: 4 Columns equal width
+    cols = st.columns(4)
+
+    for i, (label, search_type) in enumerate(categories):
+        with cols[i]:
+            # 섹션 제목 (가독성 개선)
+            st.markdown(f"""
+                <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                    <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                        {label}
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+
+            # Filter Trend DF for specific category history
+            with tracer.span("속성별 랭킹", tab="속성별 검색어", search_type=search_type) as sp:
+                # Calculate Stats
+                table = get_ranking_table(handle, 'search_type', search_type)
+                sp.set(rows=streaming.row_count(trend_df))
+
+            if table is not None:
+                show_ranking_table(table)
             else:
-                st.info("데이터가 충분하지 않습니다.")
+                st.info("데이터 없음")
 
-        with tab3:
-            # st.header("속성별 인기 검색어 (Top 100)") 제거됨
-        
-            # 4 Categories as requested
-            # Left -> Right Order: Overseas, Domestic, Hotel, Tour
-            categories = [
-                ("해외여행", "package"),
-                ("국내여행", "domestic"),
-                ("호텔", "hotel"),
-                ("투어/입장권", "localTour")
-            ]
-        
-            # Layout: 4 Columns equal width
-            cols = st.columns(4)
-        
-            # Helper functions for Styling
-            def color_negative_red(val):
-                if val < 0:
-                    return 'color: #DC3545'  # Bootstrap red
-                elif val > 0:
-                    return ''  # 양수는 기본 색상 (테마 자동 적응)
-                return ''
-            
-            def format_with_plus(val):
-                if val > 0: return f"+{val:,}"
-                return f"{val:,}"
-            
-            def format_comma(val):
-                return f"{val:,}"
-
-            for i, (label, search_type) in enumerate(categories):
-                with cols[i]:
-                    # 섹션 제목 (가독성 개선)
-                    st.markdown(f"""
-                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                                {label}
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                
-                    # Filter Trend DF for specific category history
-                    type_df = trend_df[trend_df['search_type'] == search_type]
-                
-                    # Calculate Stats
-                    stats = visualizations.calculate_popular_keywords_stats(type_df)
-                
-                    if stats is not None and not stats.empty:
-                        # Select & Format
-                        display = stats[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy()
-                    
-                        display['rank'] = display['rank'].astype(int)
-                        display['count'] = display['count'].astype(int)
-                        display['count_change'] = display['count_change'].astype(int)
-                    
-                        display.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
-                    
-                        def color_rank_change(val):
-                            if val == 'NEW':
-                                return 'font-weight: bold'  # JavaScript가 색상 처리
-                            elif isinstance(val, (int, float)) and val < 0:
-                                return 'color: #DC3545'  # Bootstrap red
-                            elif isinstance(val, (int, float)) and val > 0:
-                                return ''  # 양수는 기본 색상 (테마 자동 적응)
-                            else:
-                                return ''
-                        
-                        def highlight_new_row(row):
-                            """NEW가 있는 행 전체에 배경색 적용"""
-                            if row['순위 변화'] == 'NEW':
-                                return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                            return [''] * len(row)
-                    
-                        def format_rank_change(val):
-                            if val == 'NEW':
-                                return 'NEW'
-                            elif isinstance(val, (int, float)):
-                                if val > 0:
-                                    return f"+{int(val):,}"
-                                return f"{int(val):,}"
-                            return str(val)
-                    
-                        styled = display.style.apply(highlight_new_row, axis=1)\
-                            .map(color_negative_red, subset=['전주 대비 변화'])\
-                            .map(color_rank_change, subset=['순위 변화'])\
-                            .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
-                            .set_properties(**{
-                                'font-weight': 'normal',
-                                'font-family': 'Journey, sans-serif'
-                            })\
-                            .set_table_styles([
-                                {
-                                    'selector': 'th', 
-                                    'props': [
-                                        ('background-color', '#5E2BB8'), 
-                                        ('color', 'white'), 
-                                        ('text-align', 'center !important'),
-                                        ('font-weight', 'normal'),
-                                        ('font-family', 'Journey, sans-serif')
-                                    ]
-                                },
-                                {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
-                                {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
-                                {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
-                                {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
-                                {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
-                            ])
-                    
-                        st.dataframe(
-                            styled, 
-                            use_container_width=True, 
-                            height=800, 
-                            hide_index=True
-                        )
-                    else:
-                        st.info("데이터 없음")
-
-        with tab4:
-            # st.header("연령별 인기 검색어") 제거됨
-        
-            # 4 Age Categories
-            age_categories = ["20대 이하", "30대", "40대", "50대 이상"]
-        
-            # Layout: 4 Columns
-            age_cols = st.columns(4)
-        
-            for i, age_label in enumerate(age_categories):
-                with age_cols[i]:
-                    # 섹션 제목 (가독성 개선)
-                    st.markdown(f"""
-                        <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                            <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                                {age_label}
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                
-                    # Filter Trend DF for specific age
-                    age_df = trend_df[trend_df['age'] == age_label]
-                
-                    # Calculate Stats
-                    age_stats = visualizations.calculate_popular_keywords_stats(age_df)
-                
-                    if age_stats is not None and not age_stats.empty:
-                        # Select & Format
-                        age_display = age_stats[['rank', 'keyword', 'count', 'count_change', 'rank_change_display']].copy().head(100)
-                    
-                        age_display['rank'] = age_display['rank'].astype(int)
-                        age_display['count'] = age_display['count'].astype(int)
-                        age_display['count_change'] = age_display['count_change'].astype(int)
-                    
-                        age_display.columns = ['순위', '검색어', '검색량', '전주 대비 변화', '순위 변화']
-                    
-                        # Styles matching previous tabs
-                        def color_rank_change(val):
-                            if val == 'NEW':
-                                return 'font-weight: bold'  # JavaScript가 색상 처리
-                            elif isinstance(val, (int, float)) and val < 0:
-                                return 'color: #DC3545'  # Bootstrap red
-                            elif isinstance(val, (int, float)) and val > 0:
-                                return ''  # 양수는 기본 색상 (테마 자동 적응)
-                            return ''
-                        
-                        def highlight_new_row(row):
-                            """NEW가 있는 행 전체에 배경색 적용"""
-                            if row['순위 변화'] == 'NEW':
-                                return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                            return [''] * len(row)
-                    
-                        def format_rank_change(val):
-                            if val == 'NEW': return 'NEW'
-                            elif isinstance(val, (int, float)):
-                                if val > 0: return f"+{int(val):,}"
-                                return f"{int(val):,}"
-                            return str(val)
-                    
-                        age_styled = age_display.style.apply(highlight_new_row, axis=1)\
-                            .map(color_negative_red, subset=['전주 대비 변화'])\
-                            .map(color_rank_change, subset=['순위 변화'])\
-                            .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '검색량': format_comma})\
-                            .set_properties(**{
-                                'font-weight': 'normal',
-                                'font-family': 'Journey, sans-serif'
-                            })\
-                            .set_table_styles([
-                                {
-                                    'selector': 'th', 
-                                    'props': [
-                                        ('background-color', '#5E2BB8'), 
-                                        ('color', 'white'), 
-                                        ('text-align', 'center !important'),
-                                        ('font-weight', 'normal'),
-                                        ('font-family', 'Journey, sans-serif')
-                                    ]
-                                },
-                                {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
-                                {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
-                                {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
-                                {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
-                                {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
-                            ])
-                    
-                        st.dataframe(age_styled, use_container_width=True, height=800, hide_index=True)
-                    else:
-                        st.info(f"{age_label} 데이터 없음")
-
-        with tab5:
-            # Reuse styling functions globally within this tab
-            def color_rank_change(val):
-                if val == 'NEW':
-                    return 'font-weight: bold'  # JavaScript가 색상 처리
-                elif isinstance(val, (int, float)) and val < 0:
-                    return 'color: #DC3545'  # Bootstrap red
-                elif isinstance(val, (int, float)) and val > 0:
-                    return ''  # 양수는 기본 색상 (테마 자동 적응)
-                return ''
-            
-            def highlight_new_row(row):
-                """NEW가 있는 행 전체에 배경색 적용"""
-                if row['순위 변화'] == 'NEW':
-                    return ['background-color: rgba(94, 43, 184, 0.08)'] * len(row)
-                return [''] * len(row)
-            
-            def color_negative_red(val):
-                if val < 0:
-                    return 'color: #DC3545'  # Bootstrap red
-                elif val > 0:
-                    return ''  # 양수는 기본 색상 (테마 자동 적응)
-                return ''
-            def format_with_plus(val):
-                return f"+{val:,}" if val > 0 else f"{val:,}"
-            def format_rank_change(val):
-                if val == 'NEW': return 'NEW'
-                return f"+{int(val):,}" if isinstance(val, (int, float)) and val > 0 else f"{int(val):,}"
-            def format_comma(val):
-                return f"{val:,}"
-
-            # Column setup: Left (Table), Right (Charts) - 1:2 ratio matching 인기 검색어 tab
-            col1, col2 = st.columns([1, 2])
-        
-            # --- LEFT: 이번 주 실패 검색어 Top 100 ---
-            with col1:
-                st.markdown("""
-                    <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
-                        <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
-                            이번 주 실패 검색어 Top 100
-                        </p>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-                failed_stats_df = visualizations.calculate_failed_keywords_stats(trend_df)
-            
-                if failed_stats_df is not None and not failed_stats_df.empty:
-                    # Formatting Table
-                    display_this = failed_stats_df.copy().head(100)
-                    display_this['rank'] = display_this['rank'].astype(int)
-                    display_this['cnt'] = display_this['cnt'].astype(int)
-                    display_this['count_change'] = display_this['count_change'].astype(int)
-                
-                    display_this = display_this[['rank', 'search_keyword', 'cnt', 'count_change', 'rank_change_display']]
-                    display_this.columns = ['순위', '검색어', '실패 횟수', '전주 대비 변화', '순위 변화']
-                
-                    this_styled = display_this.style.apply(highlight_new_row, axis=1)\
-                        .map(color_negative_red, subset=['전주 대비 변화'])\
-                        .map(color_rank_change, subset=['순위 변화'])\
-                        .format({'전주 대비 변화': format_with_plus, '순위 변화': format_rank_change, '실패 횟수': format_comma})\
-                        .set_properties(**{
-                            'font-weight': 'normal',
-                            'font-family': 'Journey, sans-serif'
-                        })\
-                        .set_table_styles([
-                            {
-                                'selector': 'th', 
-                                'props': [
-                                    ('background-color', '#5E2BB8'), 
-                                    ('color', 'white'), 
-                                    ('text-align', 'center !important'),
-                                    ('font-weight', 'normal'),
-                                    ('font-family', 'Journey, sans-serif')
-                                ]
-                            },
-                            {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},
-                            {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},
-                            {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},
-                            {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},
-                            {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}
-                        ])
-                    st.dataframe(this_styled, use_container_width=True, height=800, hide_index=True)
-                else:
-                    st.info("이번 주 실패 검색어 데이터가 없습니다.")
-        
-            # --- RIGHT: 실패 검색어 트렌드 차트 ---
-            with col2:
-                # Add spacer to align with Table Header on the left
-                st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
-            
-                if failed_stats_df is not None and not failed_stats_df.empty:
-                    # 실패 검색어 필터링된 데이터프레임 가져오기
-                    failed_trend_df = visualizations.get_filtered_failed_keywords_df(trend_df)
-                
-                    # Top 1-5 Failed Keywords Chart
-                    top5_failed = failed_stats_df.sort_values('rank').head(5)['search_keyword'].tolist()
-                    if top5_failed:
-                        fig_top5_failed = visualizations.plot_keyword_group_trend(
-                            failed_trend_df, top5_failed, title="1~5위 실패검색어 추이"
-                        )
-                        st.plotly_chart(fig_top5_failed, use_container_width=True)
-                
-                    # Top 6-10 Failed Keywords Chart
-                    next5_failed = failed_stats_df.sort_values('rank').iloc[5:10]['search_keyword'].tolist()
-                    if next5_failed:
-                        fig_next5_failed = visualizations.plot_keyword_group_trend(
-                            failed_trend_df, next5_failed, title="6~10위 실패검색어 추이"
-                        )
-                        st.plotly_chart(fig_next5_failed, use_container_width=True)
-                else:
-                    st.info("차트를 표시할 데이터가 없습니다.")
+@fragments.fragment("연령별 검색어")
+def render_age_tab(handle):
+    register_handle_inputs(handle)
+    trend_df = handles.resolve(handle, 'rows')
+    # st.header("연령별 인기 검색어") 제거됨
+
+    # 4 Age Categories
+    age_categories = AGE_CATEGORIES
+
+    # Layout: 4 Columns
+    age_cols = st.columns(4)
+
+    for i, age_label in enumerate(age_categories):
+        with age_cols[i]:
+            # 섹션 제목 (가독성 개선)
+            st.markdown(f"""
+                <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                    <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                        {age_label}
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+
+            # Filter Trend DF for specific age
+            with tracer.span("연령별 랭킹", tab="연령별 검색어", age=age_label) as sp:
+                # Calculate Stats
+                age_table = get_ranking_table(handle, 'age', age_label)
+                sp.set(rows=streaming.row_count(trend_df))
+
+            if age_table is not None:
+                show_ranking_table(age_table)
+            else:
+                st.info(f"{age_label} 데이터 없음")
+
+@fragments.fragment("실패 검색어")
+def render_failed_tab(handle):
+    register_handle_inputs(handle)
+    trend_df = handles.resolve(handle, 'rows')
+    # Column setup: Left (Table), Right (Charts) - 1:2 ratio matching 인기 검색어 tab
+    col1, col2 = st.columns([1, 2])
+
+    # --- LEFT: 이번 주 실패 검색어 Top 100 ---
+    with col1:
+        st.markdown("""
+            <div style='text-align: left; margin-bottom: 5px; margin-top: 10px;'>
+                <p class='section-title' style='font-family: Journey; font-size: 1.3rem; font-weight: bold; color: #2a3f5f;'>
+                    이번 주 실패 검색어 Top 100
+                </p>
+            </div>
+        """, unsafe_allow_html=True)
+
+        with tracer.span("실패 검색어 랭킹", tab="실패 검색어") as sp:
+            sketch_key = failed_sketch_key(handle)
+            failed_stats_df = get_failed_stats(handle, sketch_key)
+            sp.set(rows=streaming.row_count(trend_df))
+
+        if failed_stats_df is not None and not failed_stats_df.empty:
+            # [UPDATED] 표시 데이터/셀 스타일은 랭킹당 1회 계산 후 캐싱
+            show_ranking_table(get_ranking_table(handle, 'failed', None, sketch_key))
+            # [NEW] 스케치 모드 표시 (실패 횟수는 추정치)
+            if agg_engine.DISTINCT_MODE == 'hll':
+                st.caption(f"실패 횟수는 HyperLogLog 추정치입니다 (상대 오차 약 ±{hll.relative_error():.1%})")
+        else:
+            st.info("이번 주 실패 검색어 데이터가 없습니다.")
+
+    # --- RIGHT: 실패 검색어 트렌드 차트 ---
+    with col2:
+        # Add spacer to align with Table Header on the left
+        st.markdown("<div style='height: 38px;'></div>", unsafe_allow_html=True)
+
+        if failed_stats_df is not None and not failed_stats_df.empty:
+            # 실패 검색어 필터링된 데이터프레임 가져오기
+            with tracer.span("실패 검색어 필터", tab="실패 검색어") as sp:
+                failed_trend_df = get_failed_trend_df(handle)
+                sp.set(rows=streaming.row_count(failed_trend_df))
+
+            # Top 1-5 Failed Keywords Chart
+            top5_failed = failed_stats_df.sort_values('rank').head(5)['search_keyword'].tolist()
+            if top5_failed:
+                fig_top5_failed = get_keyword_trend_figure(
+                    handle, 'failed', tuple(top5_failed), "1~5위 실패검색어 추이"
+                )
+                show_chart(fig_top5_failed, "실패 검색어/1~5위 추이")
+
+            # Top 6-10 Failed Keywords Chart
+            next5_failed = failed_stats_df.sort_values('rank').iloc[5:10]['search_keyword'].tolist()
+            if next5_failed:
+                fig_next5_failed = get_keyword_trend_figure(
+                    handle, 'failed', tuple(next5_failed), "6~10위 실패검색어 추이"
+                )
+                show_chart(fig_next5_failed, "실패 검색어/6~10위 추이")
+        else:
+            st.info("차트를 표시할 데이터가 없습니다.")
+
+# 탭 라벨 순서대로 본문 프래그먼트
+TAB_RENDERERS = (render_weekly_tab, render_popular_tab, render_search_type_tab, render_age_tab, render_failed_tab)
+
+# [NEW] 본문 프래그먼트 - 탭 전환은 탭 바 + 선택 탭만 다시 실행 (사이드바/데이터 로드는 건너뜀)
+@fragments.fragment("대시보드")
+def render_dashboard(handle):
+    register_handle_inputs(handle)
+    # [UPDATED] 지연 탭: 선택된 탭 본문만 실행
+    tabs = lazy_tabs(TAB_LABELS, key="active_tab")
+
+    for tab, render_tab in zip(tabs, TAB_RENDERERS):
+        with tab:
+            if is_open(tab):
+                render_tab(handle)
+
+    # [UPDATED] 첫 화면 출력 후 닫힌 탭의 랭킹 + Top 20 키워드 차트 집계를 사전 계산
+    # 필터가 바뀌면 fingerprint가 달라져 이전 job은 취소됨
+    open_labels = [label for label, tab in zip(TAB_LABELS, tabs) if is_open(tab)]
+    precompute.schedule(f"filters:{handle.data}",
+                        precompute_tasks(handle, handles.resolve(handle, 'rows'), open_labels))
+
+# Base DataFrame for initial scale
+# 커스텀 스피너로 로딩 시간 표시
+import os
+data_exists = os.path.exists("data_storage") and len(glob.glob("data_storage/*.parquet")) > 0
+# [NEW] 전체 파티션 지문 (증분 동기화로 파티션이 바뀌면 전체 데이터 캐시 교체)
+storage_key = data_loader.partition_fingerprint()
+
+# [NEW] 재실행 단위 루트 span (세션 ID로 귀속)
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    _script_ctx = get_script_run_ctx()
+    tracing.set_session(_script_ctx.session_id if _script_ctx else None)
+except ImportError:
+    pass
+# [NEW] 새 요청으로 중단된 이전 재실행의 span은 interrupted=True로 종료 후 새 루트 시작
+tracer.end_interrupted()
+rerun_span = tracer.start_root("재실행")
+
+# [NEW] 스트리밍 모드는 로컬 parquet + DuckDB 엔진에서만 사용 (그 외에는 기존 메모리 모드)
+STREAMING_MODE = streaming.STREAMING and data_exists and agg_engine.get_engine().name == 'duckdb' \
+    and get_stream_source(storage_key) is not None
+
+if STREAMING_MODE:
+    # 전체 행 대신 요약(행 수/기간/검색어 빈도)만 메모리에 유지
+    with st.spinner("데이터 요약을 계산하고 있습니다..."), tracer.span("초기 데이터 로드", mode="streaming"):
+        df_full = streaming.summary(get_stream_source(storage_key))
+elif data_exists:
+    # 캐시된 데이터가 있으면 빠름 (2-3초)
+    with st.spinner("데이터를 메모리에 로드하고 있습니다... (예상 시간: 2-3초)"), tracer.span("초기 데이터 로드"):
+        df_full = get_initial_df(storage_key)
+else:
+    # Hugging Face에서 다운로드하면 느림 (10-15초)
+    with st.spinner("Hugging Face에서 데이터를 다운로드하고 있습니다... (예상 시간: 10-15초)"), \
+            tracer.span("초기 데이터 로드", source="huggingface"):
+        df_full = get_initial_df(storage_key)
+
+if df_full is not None and not df_full.empty:
+    # Sidebar Filters
+    # [UPDATED] 필터 패널은 프래그먼트 (결과는 세션 상태로 전달)
+    with st.sidebar:
+        render_filters(storage_key, df_full)
+    filtered_df = st.session_state['filtered_df']
+    trend_df = filtered_df
+    st.session_state['rendered_filter_key'] = st.session_state['filter_key']
+
+    # Main Dashboard
+    if not filtered_df.empty:
+        # [CRITICAL OPTIMIZATION] 데이터 식별자 생성 (캐싱 키)
+        # [UPDATED] 기간 + 행 수 문자열 대신 내용 지문 (원천 파티션 + 기간/접속 경로 조건 + 스키마 버전), 모든 탭에서 공용
+        fingerprint = data_loader.data_fingerprint(
+            *st.session_state.get('cached_date_range', (None, None)),
+            paths=st.session_state.get('cached_selected_paths') if 'cached_path_filter_key' in st.session_state else None
+        )
+        # [NEW] 캐시 함수용 핸들 (스냅샷 id + 지문) → 세션의 필터링 데이터/집계 원천/어휘 등록
+        handle = handles.DataHandle(storage_key, fingerprint)
+        register_handle_inputs(handle, trend_df)
+        handles.register_vocabulary(storage_key, get_keyword_index(storage_key))
+
+        # [UPDATED] 탭 바 + 탭 본문은 프래그먼트 (탭 전환/탭 안 위젯은 전체 재실행 없이 처리)
+        render_dashboard(handle)
     else:
+        precompute.cancel()
         st.warning("⚠️ 선택하신 기간에는 데이터가 존재하지 않습니다. 좌측 필터에서 다른 날짜를 선택해 주세요.")
-
 else:
     st.error("데이터를 불러올 수 없습니다. 데이터 파일을 확인해주세요.")
+
+# [NEW] 관리자용 캐시 통계 (?admin=1)
+if st.query_params.get("admin") == "1":
+    with st.expander("🔧 캐시 통계 (관리자)", expanded=False):
+        cache_metrics.render_admin_panel()
+        st.subheader("사전 계산 작업")
+        st.dataframe(pd.DataFrame(precompute.scheduler.jobs()), use_container_width=True, hide_index=True)
+
+rerun_span.end()
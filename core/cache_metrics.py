@@ -0,0 +1,410 @@
+"""
+st.cache_data 캐시 효과 측정
+
+@st.cache_data를 그대로 감싸서 함수별/인자 형태별로 다음을 기록합니다.
+- 히트/미스 횟수, 조회 지연
+- 절약된 계산 시간 (히트 시 해당 키의 마지막 계산 시간)
+- 직렬화 크기 (pickle protocol 5, 대용량 버퍼는 복사 없이 크기만 합산)
+- 재계산 (같은 키가 다시 미스 → TTL 만료 또는 메모리 축출로 분류)
+- 한 번도 히트되지 않은 키 (예: 매번 달라지는 캐시 키)
+
+[NEW] 차트 전송 크기: record_payload(chart, nbytes) → 차트별 렌더링 횟수, 누적/최근/최대 바이트
+
+관리자 화면: 앱 URL에 ?admin=1 → render_admin_panel()
+메트릭 엔드포인트: DASHBOARD_METRICS_PORT 설정 시 /metrics (Prometheus 텍스트), /metrics.json,
+    /charts.json (차트 전송 크기)
+
+사용법:
+    @metered_cache_data(ttl=3600)
+    def get_weekly_aggregated(fingerprint, keyword):
+        ...
+"""
+
+import collections
+import functools
+import http.server
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+
+import streamlit as st
+
+try:
+    from tracing import tracer
+except ImportError:  # 루트 app.py에서 core.cache_metrics로 import된 경우
+    from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# 함수당 추적할 최대 키 수 (오래된 키부터 제거)
+MAX_KEYS_PER_FUNCTION = 256
+
+
+def _serialized_size(value):
+    """pickle 직렬화 크기 (out-of-band 버퍼는 복사하지 않고 길이만 합산)"""
+    buffers = []
+    try:
+        payload = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    except Exception:
+        return None
+    return len(payload) + sum(buf.raw().nbytes for buf in buffers)
+
+
+def _describe_arg(value):
+    """인자 형태 요약 (대용량 인자는 값 대신 타입/크기만)"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return repr(value) if len(value) <= 80 else f"str[{len(value)}]"
+    if hasattr(value, '_fields'):  # 핸들 (NamedTuple)
+        return repr(tuple(value))
+    if hasattr(value, 'shape'):
+        return f"{type(value).__name__}{tuple(value.shape)}"
+    if isinstance(value, (dict, list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def _arg_key(args, kwargs):
+    parts = [_describe_arg(a) for a in args]
+    parts += [f"{k}={_describe_arg(v)}" for k, v in sorted(kwargs.items())]
+    return f"({', '.join(parts)})"
+
+
+class _KeyStats:
+    __slots__ = ('hits', 'misses', 'recomputes', 'expired', 'evicted',
+                 'last_compute_s', 'saved_s', 'size_bytes', 'last_miss_at')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.recomputes = 0
+        self.expired = 0
+        self.evicted = 0
+        self.last_compute_s = 0.0
+        self.saved_s = 0.0
+        self.size_bytes = None
+        self.last_miss_at = None
+
+
+class FunctionStats:
+    """캐시 함수 하나의 누적 통계"""
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.compute_s = 0.0
+        self.saved_s = 0.0
+        self.lookup_s = 0.0
+        self.keys = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key_stats(self, key):
+        stats = self.keys.get(key)
+        if stats is None:
+            stats = self.keys[key] = _KeyStats()
+            if len(self.keys) > MAX_KEYS_PER_FUNCTION:
+                self.keys.popitem(last=False)
+        else:
+            self.keys.move_to_end(key)
+        return stats
+
+    def record_miss(self, key, compute_s, size_bytes):
+        now = time.time()
+        with self._lock:
+            self.misses += 1
+            self.compute_s += compute_s
+            stats = self._key_stats(key)
+            if stats.misses:
+                # 같은 키가 다시 계산됨 → TTL 경과 여부로 만료/축출 구분
+                stats.recomputes += 1
+                if self.ttl is not None and now - stats.last_miss_at >= self.ttl:
+                    stats.expired += 1
+                else:
+                    stats.evicted += 1
+            stats.misses += 1
+            stats.last_compute_s = compute_s
+            stats.size_bytes = size_bytes
+            stats.last_miss_at = now
+
+    def record_hit(self, key, lookup_s):
+        with self._lock:
+            self.hits += 1
+            self.lookup_s += lookup_s
+            stats = self._key_stats(key)
+            stats.hits += 1
+            saved = max(stats.last_compute_s - lookup_s, 0.0)
+            stats.saved_s += saved
+            self.saved_s += saved
+
+    def snapshot(self):
+        with self._lock:
+            keys = [
+                {
+                    'key': key,
+                    'hits': s.hits,
+                    'misses': s.misses,
+                    'recomputes': s.recomputes,
+                    'expired': s.expired,
+                    'evicted': s.evicted,
+                    'last_compute_s': s.last_compute_s,
+                    'saved_s': s.saved_s,
+                    'size_bytes': s.size_bytes,
+                }
+                for key, s in self.keys.items()
+            ]
+            calls = self.hits + self.misses
+            return {
+                'function': self.name,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / calls if calls else None,
+                'compute_s': self.compute_s,
+                'saved_s': self.saved_s,
+                'avg_hit_lookup_s': self.lookup_s / self.hits if self.hits else None,
+                'entries_bytes': sum(k['size_bytes'] or 0 for k in keys),
+                'keys_tracked': len(keys),
+                'keys_never_hit': sum(1 for k in keys if k['hits'] == 0),
+                'recomputes': sum(k['recomputes'] for k in keys),
+                'keys': keys,
+            }
+
+
+class CacheMetricsRegistry:
+    def __init__(self):
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    def function(self, name, ttl):
+        with self._lock:
+            if name not in self._functions:
+                self._functions[name] = FunctionStats(name, ttl)
+            return self._functions[name]
+
+    def snapshot(self):
+        with self._lock:
+            functions = list(self._functions.values())
+        return [f.snapshot() for f in functions]
+
+    def reset(self):
+        with self._lock:
+            self._functions = {name: FunctionStats(name, f.ttl) for name, f in self._functions.items()}
+
+
+registry = CacheMetricsRegistry()
+
+
+# [NEW] 차트별 브라우저 전송 크기 (st.plotly_chart가 보내는 Figure JSON)
+class ChartPayloadStats:
+    def __init__(self):
+        self._charts = {}
+        self._lock = threading.Lock()
+
+    def record(self, chart, nbytes):
+        with self._lock:
+            stats = self._charts.setdefault(chart, {'renders': 0, 'bytes': 0, 'last_bytes': 0, 'max_bytes': 0})
+            stats['renders'] += 1
+            stats['bytes'] += nbytes
+            stats['last_bytes'] = nbytes
+            stats['max_bytes'] = max(stats['max_bytes'], nbytes)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                dict(chart=chart, avg_bytes=stats['bytes'] / stats['renders'], **stats)
+                for chart, stats in sorted(self._charts.items())
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._charts = {}
+
+
+chart_payloads = ChartPayloadStats()
+
+
+def record_payload(chart, nbytes):
+    """차트 1회 렌더링의 전송 크기 기록 (현재 span에도 payload_bytes로 남김)"""
+    chart_payloads.record(chart, nbytes)
+    tracer.current().set(payload_bytes=nbytes)
+
+
+def _ttl_seconds(ttl):
+    if ttl is None:
+        return None
+    if hasattr(ttl, 'total_seconds'):
+        return ttl.total_seconds()
+    return float(ttl)
+
+
+def metered(cache_decorator, ttl=None, measure_size=True):
+    """
+    임의의 Streamlit 캐시 데코레이터(st.cache_data(...), st.cache_resource(...))에 측정 계층 추가
+
+    Args:
+        cache_decorator: 이미 인자가 적용된 캐시 데코레이터
+        ttl: 통계용 TTL (초 또는 timedelta)
+        measure_size: 미스 시 직렬화 크기 측정 여부 (callable이면 해당 함수로 크기 계산)
+    """
+    if callable(measure_size):
+        size_of = measure_size
+    else:
+        size_of = _serialized_size if measure_size else (lambda value: None)
+
+    def decorator(func):
+        stats = registry.function(f"{func.__module__}.{func.__qualname__}", _ttl_seconds(ttl))
+        state = threading.local()
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            state.computed = (time.perf_counter() - started, size_of(result))
+            return result
+
+        cached = cache_decorator(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state.computed = None
+            started = time.perf_counter()
+            result = cached(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            key = _arg_key(args, kwargs)
+            if state.computed is not None:
+                compute_s, size_bytes = state.computed
+                stats.record_miss(key, compute_s, size_bytes)
+                tracer.current().cache_miss()
+            else:
+                stats.record_hit(key, elapsed)
+                tracer.current().cache_hit()
+            return result
+
+        wrapper.clear = cached.clear
+        wrapper.cache_stats = stats
+        return wrapper
+    return decorator
+
+
+def metered_cache_data(ttl=None, measure_size=True, **cache_kwargs):
+    """st.cache_data(ttl=..., **cache_kwargs) + 히트/미스/크기 측정"""
+    return metered(st.cache_data(ttl=ttl, **cache_kwargs), ttl=ttl, measure_size=measure_size)
+
+
+def snapshot():
+    """전체 캐시 함수 통계 (히트율 낮은 순)"""
+    return sorted(registry.snapshot(), key=lambda f: (f['hit_rate'] is not None, f['hit_rate'] or 0))
+
+
+def to_prometheus(functions=None):
+    """Prometheus 텍스트 노출 형식"""
+    functions = snapshot() if functions is None else functions
+    metrics = [
+        ('dashboard_cache_hits_total', 'counter', 'hits'),
+        ('dashboard_cache_misses_total', 'counter', 'misses'),
+        ('dashboard_cache_compute_seconds_total', 'counter', 'compute_s'),
+        ('dashboard_cache_saved_seconds_total', 'counter', 'saved_s'),
+        ('dashboard_cache_recomputes_total', 'counter', 'recomputes'),
+        ('dashboard_cache_entry_bytes', 'gauge', 'entries_bytes'),
+        ('dashboard_cache_keys_never_hit', 'gauge', 'keys_never_hit'),
+    ]
+    lines = []
+    for metric, kind, field in metrics:
+        lines.append(f"# TYPE {metric} {kind}")
+        for f in functions:
+            lines.append(f'{metric}{{function="{f["function"]}"}} {f[field]}')
+    # [NEW] 차트 전송 크기
+    charts = chart_payloads.snapshot()
+    for metric, kind, field in [
+        ('dashboard_chart_renders_total', 'counter', 'renders'),
+        ('dashboard_chart_payload_bytes_total', 'counter', 'bytes'),
+        ('dashboard_chart_payload_last_bytes', 'gauge', 'last_bytes'),
+        ('dashboard_chart_payload_max_bytes', 'gauge', 'max_bytes'),
+    ]:
+        lines.append(f"# TYPE {metric} {kind}")
+        for c in charts:
+            lines.append(f'{metric}{{chart="{c["chart"]}"}} {c[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            body, content_type = to_prometheus().encode(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(snapshot(), ensure_ascii=False).encode(), 'application/json'
+        elif self.path == '/charts.json':
+            body, content_type = json.dumps(chart_payloads.snapshot(), ensure_ascii=False).encode(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server = None
+
+
+def start_metrics_server(port=None):
+    """
+    메트릭 HTTP 엔드포인트 시작 (프로세스당 1회, DASHBOARD_METRICS_PORT 미설정 시 무시)
+
+    Returns:
+        int | None: 실제 바인딩된 포트
+    """
+    global _server
+    port = port if port is not None else os.getenv('DASHBOARD_METRICS_PORT')
+    if port is None:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = http.server.ThreadingHTTPServer(('0.0.0.0', int(port)), _MetricsHandler)
+            except OSError as e:
+                # 다른 워커 프로세스가 이미 포트를 점유한 경우
+                logger.warning(f"Metrics endpoint not started on :{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name='cache-metrics', daemon=True).start()
+            print(f"✓ Cache metrics endpoint: http://0.0.0.0:{_server.server_address[1]}/metrics")
+        return _server.server_address[1]
+
+
+def render_admin_panel():
+    """관리자용 캐시 통계 화면 (?admin=1)"""
+    import pandas as pd
+
+    functions = snapshot()
+    st.subheader("캐시 효과 (st.cache_data / cache_frame)")
+    if not functions:
+        st.info("아직 기록된 캐시 호출이 없습니다.")
+        return
+
+    summary = pd.DataFrame([{k: v for k, v in f.items() if k != 'keys'} for f in functions])
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    for f in functions:
+        with st.expander(f"{f['function']} — 키 {f['keys_tracked']}개 (미히트 {f['keys_never_hit']}개)"):
+            st.dataframe(pd.DataFrame(f['keys']), use_container_width=True, hide_index=True)
+
+    # [NEW] 차트 전송 크기
+    charts = chart_payloads.snapshot()
+    if charts:
+        st.subheader("차트 전송 크기 (Figure JSON)")
+        st.dataframe(pd.DataFrame(charts), use_container_width=True, hide_index=True)
+
+    if st.button("통계 초기화"):
+        registry.reset()
+        chart_payloads.reset()
@@ -0,0 +1,508 @@
+"""
+Streamlit 없이 쓰는 집계/랭킹 계산 모듈
+
+visualizations.py와 data_loader.py는 import 시점에 streamlit(및 wordcloud/matplotlib)을 불러오므로
+배치 작업, 벤치마크, API 서버가 랭킹 계산 하나를 쓰려 해도 Streamlit 런타임까지 올라왔습니다.
+여기에는 pandas/pyarrow/DuckDB(agg_engine)만 쓰는 계산 로직을 모으고,
+UI 쪽(visualizations, data_loader, app)은 이 모듈을 감싸는 얇은 래퍼만 둡니다.
+
+- 원천: scan() → agg_engine.ParquetSource (data_storage/*.parquet 직접 스캔, 전처리/기간/경로 필터 포함)
+  또는 메모리의 DataFrame (agg_engine.as_source)
+- 랭킹: 인기 검색어(calculate_popular_keywords_stats), 실패 검색어(calculate_failed_keywords_stats) 등
+  (visualizations에서 옮겨옴, visualizations는 같은 이름으로 다시 내보냄)
+- 취소: 집계 → 랭킹 후처리 등 단계 사이에서 generations.checkpoint() (새 필터 요청이 오면 중단, Streamlit 밖에서는 무시)
+- 캐시: memoize(ttl, max_entries) - 인자 튜플 → 결과 LRU (TTL 만료, 같은 키 동시 요청은 한 번만 계산)
+  Streamlit 해셔/세션 없이 동작, UI의 frame_store.cache_handle은 이 위에 측정 + zero-copy 뷰를 얹은 것
+
+사용법 (Streamlit 없이):
+    import compute
+    source = compute.scan('data_storage', '2025-10-01', '2025-10-21', paths=('MDA', 'DCM'))
+    top = compute.calculate_popular_keywords_stats(source)
+
+    @compute.memoize(ttl=3600, max_entries=8)
+    def weekly_report(start_date, end_date):
+        return compute.calculate_failed_keywords_stats(compute.scan('data_storage', start_date, end_date))
+"""
+
+import collections
+import functools
+import glob
+import os
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import agg_engine
+    import generations
+except ImportError:  # 루트 app.py에서 core.compute로 import된 경우
+    from core import agg_engine
+    from core import generations
+
+# 앱 호환성을 위한 영문 별칭 (한글 컬럼 → 영문 컬럼)
+COLUMN_ALIASES = {
+    '검색일': 'search_date',
+    '검색어': 'search_keyword',
+    '검색량': 'total_count',
+    '검색결과수': 'result_total_count',
+    '검색실패율': 'fail_rate',
+    '검색순위': 'rank',
+    '속성': 'pathcd',
+    '연령대': 'age',
+    '성별': 'gender',
+    '탭': 'tab',
+    '검색타입': 'search_type'
+}
+
+# Hugging Face 원본 샤드의 영문 컬럼 → 앱 컬럼 (샤드는 그대로 저장하고 읽을 때 변환)
+HF_COLUMN_MAPPING = {
+    'logday': '검색일',
+    'search_keyword': '검색어',
+    'total_count': '검색량',
+    'result_total_count': '검색결과수',
+    'pathcd': '속성',
+    'age': '연령대',
+    'gender': '성별',
+    'tab': '탭',
+    'search_type': '검색타입'
+}
+
+
+# ==========================================
+# 캐시
+# ==========================================
+
+def ttl_seconds(ttl):
+    """TTL(초 또는 timedelta) → 초 (None이면 만료 없음)"""
+    if ttl is None:
+        return None
+    if hasattr(ttl, 'total_seconds'):
+        return ttl.total_seconds()
+    return float(ttl)
+
+
+class Memo:
+    """
+    인자 튜플 → 결과 LRU (TTL 만료, 같은 키의 동시 요청은 한 번만 계산)
+    만료된 항목은 새 결과를 저장할 때 정리
+
+    st.cache_data/st.cache_resource와 같은 데코레이터 형태 (cache_metrics.metered로 감쌀 수 있도록 .clear 제공)
+    """
+
+    def __init__(self, func, ttl=None, max_entries=None):
+        self._func = func
+        self._ttl = ttl_seconds(ttl)
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._computing = {}
+        self._lock = threading.Lock()
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args):
+        key = args
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and (self._ttl is None or time.monotonic() - entry[0] < self._ttl):
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                pending = self._computing.get(key)
+                if pending is None:
+                    pending = self._computing[key] = threading.Event()
+                    break
+            # 다른 스레드(세션/사전 계산)가 같은 키를 계산 중이면 완료를 기다렸다가 다시 조회
+            pending.wait()
+        try:
+            value = self._func(*args)
+            with self._lock:
+                now = time.monotonic()
+                # 만료된 항목은 다시 조회되지 않으면 남아 있으므로 저장할 때 함께 정리
+                if self._ttl is not None:
+                    for expired in [k for k, (stored_at, _) in self._entries.items() if now - stored_at >= self._ttl]:
+                        del self._entries[expired]
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+                while self._max_entries is not None and len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._computing.pop(key, None)
+            pending.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def memoize(ttl=None, max_entries=None):
+    """
+    프로세스 내 결과 캐시 데코레이터 (위치 인자만, 모두 해시 가능한 값)
+
+    결과를 복사하지 않고 그대로 반환하므로 호출자는 결과를 수정하지 않아야 합니다.
+
+    Args:
+        ttl: 캐시 유지 시간 (초 또는 timedelta)
+        max_entries: 최대 보관 항목 수 (오래 안 쓴 것부터 제거)
+    """
+    def decorator(func):
+        return Memo(func, ttl=ttl, max_entries=max_entries)
+    return decorator
+
+
+# ==========================================
+# 원천
+# ==========================================
+
+def scan(store_dir='data_storage', start_date=None, end_date=None, paths=None):
+    """
+    store_dir/*.parquet 직접 스캔 원천
+    (data_loader.load_data_range() + preprocess_data() + 접속 경로 필터 결과와 같은 행)
+
+    Args:
+        store_dir: parquet 파티션 폴더
+        start_date: 시작 날짜 (None이면 전체)
+        end_date: 종료 날짜 (None이면 전체)
+        paths: 접속 경로 코드 목록 (예: ['MDA', 'DCM'], None이면 전체)
+
+    Returns:
+        agg_engine.ParquetSource
+
+    Raises:
+        FileNotFoundError: parquet 파일이 없을 때
+        ValueError, duckdb.Error: 스키마를 해석할 수 없을 때
+    """
+    parquet_pattern = os.path.join(store_dir, '*.parquet')
+    if not glob.glob(parquet_pattern):
+        raise FileNotFoundError(f"{store_dir}: parquet 파일이 없습니다.")
+    return agg_engine.ParquetSource(
+        parquet_pattern, aliases=COLUMN_ALIASES, renames=HF_COLUMN_MAPPING,
+        start_date=start_date, end_date=end_date, paths=paths
+    )
+
+
+# ==========================================
+# 인기 검색어 랭킹
+# ==========================================
+
+def calculate_popular_keywords_stats(df):
+    """
+    Generates the Top 20 stats table: Rank, Keyword(search_keyword), Volume, WoW Change, Rank Change.
+    Focuses on the latest 2 weeks present in the data.
+    """
+    source = agg_engine.as_source(df)
+    target_keyword_col = 'search_keyword'
+    if target_keyword_col not in source.columns:
+        return None
+
+    if 'logweek' not in source.columns:
+        return None
+        
+    # [UPDATED] Aggregation (엔진: 최근 2주차만 집계)
+    weeks, weekly_stats = agg_engine.get_engine().weekly_keyword_counts(source, n_weeks=2)
+    if len(weeks) < 1:
+        return None
+    generations.checkpoint()
+    
+    return rank_weekly_keyword_counts(weekly_stats, weeks)
+
+def rank_weekly_keyword_counts(weekly_stats, weeks):
+    """
+    [NEW] 주차별 키워드 집계(logweek, keyword, count)로 Top 100 랭킹 표 생성
+    calculate_popular_keywords_stats와 병렬 집계 경로(parallel_agg)가 공유하는 후처리
+    """
+    this_week = weeks[-1]
+    prev_week = weeks[-2] if len(weeks) > 1 else None
+    
+    # Current Week Stats
+    current_data = weekly_stats[weekly_stats['logweek'] == this_week].copy()
+    # Rank: Descending count (High count = Rank 1), Tie-break: Alphabetical (Unique Rank)
+    current_data = current_data.sort_values(by=['count', 'keyword'], ascending=[False, True])
+    current_data['rank'] = range(1, len(current_data) + 1)
+    
+    # Previous Week Stats
+    if prev_week is not None:
+        prev_data = weekly_stats[weekly_stats['logweek'] == prev_week].copy()
+        # Rank: Descending count, Tie-break: Alphabetical
+        prev_data = prev_data.sort_values(by=['count', 'keyword'], ascending=[False, True])
+        prev_data['prev_rank'] = range(1, len(prev_data) + 1)
+        prev_data = prev_data[['keyword', 'count', 'prev_rank']]
+        prev_data.columns = ['keyword', 'prev_count', 'prev_rank']
+        
+        # Merge
+        merged = pd.merge(current_data, prev_data, on='keyword', how='left')
+        merged['prev_count'] = merged['prev_count'].fillna(0)
+        generations.checkpoint()
+        
+        # Calculate Changes
+        merged['count_change'] = merged['count'] - merged['prev_count']
+        
+        # Rank Change: Prev - Curr (Positive = Improved/Up)
+        # Mark as "NEW" if not in previous Top 100
+        merged['rank_change_val'] = merged.apply(
+            lambda row: 0 if pd.isna(row['prev_rank']) or row['prev_rank'] > 100 else row['prev_rank'] - row['rank'],
+            axis=1
+        )
+        merged['rank_change_display'] = merged.apply(
+            lambda row: 'NEW' if pd.isna(row['prev_rank']) or row['prev_rank'] > 100 else row['prev_rank'] - row['rank'],
+            axis=1
+        )
+    else:
+        merged = current_data
+        merged['count_change'] = 0
+        merged['rank_change_val'] = 0
+        merged['rank_change_display'] = 0
+        
+    # Filter Top 100 by Current Rank (Expanded from 20)
+    top_20 = merged.sort_values('rank').head(100)
+    
+    # Select and Rename Columns for App
+    # Return: rank, keyword, count, count_change, rank_change_val, rank_change_display
+    return top_20[['rank', 'keyword', 'count', 'count_change', 'rank_change_val', 'rank_change_display']]
+
+
+# ==========================================
+# 실패 검색어 랭킹
+# ==========================================
+
+def preprocess_failed_keyword_data(df):
+    """
+    Apply IP exclusion and Regex filters as requested by user.
+    """
+    temp_df = df.copy()
+    
+    # IP Exclusion
+    if 'userip' in temp_df.columns:
+        blocked_ips = [
+            '112.223.61.10','112.223.61.11','112.223.61.12','112.223.61.13','112.223.61.14',
+            '112.223.61.16','112.223.61.17','112.223.61.18','112.223.61.39','112.223.61.40',
+            '112.220.71.243','112.220.71.244'
+        ]
+        temp_df['userip'] = temp_df['userip'].astype(str).str.strip()
+        temp_df = temp_df[~temp_df['userip'].isin(blocked_ips)]
+        generations.checkpoint()
+        
+    # Regex Filters on search_keyword
+    if 'search_keyword' not in temp_df.columns:
+        return temp_df
+        
+    temp_df = temp_df[temp_df['search_keyword'].notna()]
+    temp_df['search_keyword'] = temp_df['search_keyword'].astype(str)
+    
+    kw = temp_df['search_keyword']
+    
+    # 1. Special Characters (Only allow Alphanumeric + Korean + Whitespace)
+    mask_special = ~kw.str.contains(r'[^ㄱ-ㅎㅏ-ㅣ가-힣a-zA-Z0-9\s]', regex=True)
+    
+    # 2. H Code (H + 11 alnum)
+    mask_h_code = ~kw.str.match(r'^[Hh][a-zA-Z0-9]{11}$')
+    
+    # 3. Numeric Only
+    mask_numeric = ~kw.str.match(r'^[0-9]+$')
+    
+    # 4. Product Code (Alpha + 13+ alnum)
+    mask_prod_code = ~kw.str.match(r'^[A-Za-z][A-Za-z0-9]{13,}$')
+    
+    generations.checkpoint()
+    
+    # 5. DB/디비
+    mask_db = ~kw.str.contains(r'[Dd][Bb]|디비', regex=True)
+    
+    # 6. Alpha3+Num (Space separated)
+    # Updated regex to handle "Start or Space" correctly using python regex syntax
+    mask_alpha_num = ~kw.str.contains(r'(?:^|\s)[A-Za-z]{3}[0-9]+(?:\s|$)', regex=True)
+    
+    # 7. Spam
+    mask_spam = ~kw.str.contains(r'텔레|출장|마사지', regex=True)
+    
+    # 8. Kanji Only
+    # (raw 문자열의 \u 이스케이프는 Arrow 문자열 컬럼의 RE2 엔진에서 오류 → 실제 문자로 지정)
+    mask_kanji = ~kw.str.match('^[\u4E00-\u9FFF]+$')
+    
+    # 9. Alpha3+Num6+
+    mask_complex = ~kw.str.contains(r'[A-Za-z]{3}[0-9]{6,}', regex=True)
+    
+    # 10. Empty
+    mask_empty = kw != ''
+    
+    final_mask = (
+        mask_special & mask_h_code & mask_numeric & mask_prod_code & 
+        mask_db & mask_alpha_num & mask_spam & mask_kanji & 
+        mask_complex & mask_empty
+    )
+    
+    return temp_df[final_mask]
+
+def get_failed_keywords(df, sketches=None, paths=None):
+    """
+    #5: Weekly failed search terms with advanced filtering (Strict User Request)
+    Conditions:
+    - total_count = 0
+    - result_total_count = 0
+    - search_type = 'all'
+    - quick_link_yn = 'N'
+    - userip excluded
+    - regex filters (kept for data quality)
+    - distinct sessionid count
+    sketches/paths: HLL 스케치(agg_engine.DuckDBEngine.failed_sketches)가 주어지면 선택 경로의 추정치 사용
+    """
+    # [NEW] 스케치 모드: 저장된 스케치의 합집합으로 추정 (df 재스캔 없음)
+    if sketches is not None:
+        results = agg_engine.sketch_keyword_counts(sketches, paths)
+    # [UPDATED] 1~3. 필터(경로/서비스/페이지/결과 0건/검색 타입/바로가기/IP/정규식)와
+    # 5. (logweek, sessionid, search_keyword) 고유 조합 집계를 엔진에서 수행
+    # (e.g., Session A fails on "Test" in W1 and W2 -> Count 2)
+    else:
+        results = agg_engine.get_engine().failed_keyword_counts(agg_engine.as_source(df))
+    if results is None:
+        return pd.DataFrame()
+    generations.checkpoint()
+    
+    # Sort by Count DESC, Keyword ASC
+    results = results.sort_values(by=['cnt', 'search_keyword'], ascending=[False, True])
+    
+    # Add Rank
+    results['rn'] = range(1, len(results) + 1)
+    
+    # 6. Limit 120
+    results = results.head(120)
+    
+    # Rename for UI
+    results = results[['rn', 'search_keyword', 'cnt']]
+    results.columns = ['순위', '검색어', '실패 횟수']
+    
+    return results
+
+def get_filtered_failed_keywords_df(df):
+    """
+    실패 검색어 필터링을 적용한 데이터프레임 반환
+    (차트용으로 사용)
+    """
+    temp_df = df.copy()
+    
+    # 1. Normalize Column Names
+    col_map = {
+        'totalCount': 'total_count',
+        'resultTotalCount': 'result_total_count',
+        'searchType': 'search_type',
+        'quickLinkYn': 'quick_link_yn',
+        'userIp': 'userip',
+        'userId': 'sessionid',
+        'pathCd': 'pathCd'
+    }
+    rename_dict = {k: v for k, v in col_map.items() if k in temp_df.columns}
+    temp_df = temp_df.rename(columns=rename_dict)
+    
+    # Check required
+    if 'search_keyword' not in temp_df.columns:
+        return pd.DataFrame()
+
+    # 2. Base Filters
+    # pathcd/pathCd IN ('DCM', 'MDA', 'DCP')
+    path_col = 'pathcd' if 'pathcd' in temp_df.columns else ('pathCd' if 'pathCd' in temp_df.columns else None)
+    if path_col:
+        temp_df = temp_df[temp_df[path_col].astype(str).str.upper().isin(['DCM', 'MDA', 'DCP'])]
+        
+    # service = 'totalsearch'
+    if 'service' in temp_df.columns:
+        temp_df = temp_df[temp_df['service'].astype(str).str.lower() == 'totalsearch']
+        
+    # page = 1
+    if 'page' in temp_df.columns:
+        temp_df['page'] = pd.to_numeric(temp_df['page'], errors='coerce')
+        temp_df = temp_df[temp_df['page'] == 1]
+        
+    # total_count == 0
+    if 'total_count' in temp_df.columns:
+         temp_df['total_count'] = pd.to_numeric(temp_df['total_count'], errors='coerce').fillna(-1)
+         temp_df = temp_df[temp_df['total_count'] == 0]
+    
+    # result_total_count == 0
+    if 'result_total_count' in temp_df.columns:
+        temp_df['result_total_count'] = pd.to_numeric(temp_df['result_total_count'], errors='coerce').fillna(-1)
+        temp_df = temp_df[temp_df['result_total_count'] == 0]
+        
+    # search_type == 'all'
+    if 'search_type' in temp_df.columns:
+        temp_df = temp_df[temp_df['search_type'].astype(str).str.lower() == 'all']
+        
+    # quick_link_yn != 'Y' (Treat NaN/Empty as 'N')
+    if 'quick_link_yn' in temp_df.columns:
+        temp_df = temp_df[temp_df['quick_link_yn'].fillna('N').astype(str).str.upper() != 'Y']
+
+    # 3. Apply Preprocessing (IPs + Regex)
+    generations.checkpoint()
+    temp_df = preprocess_failed_keyword_data(temp_df)
+    
+    return temp_df
+
+def calculate_failed_keywords_stats(df, sketches=None, paths=None):
+    """
+    Generates Failed Keywords Ranking with WoW comparison.
+    Columns: Rank, Keyword, Count, Count Change, Rank Change
+    sketches/paths: HLL 스케치가 주어지면 선택 경로의 추정 실패 횟수로 랭킹 (get_failed_keywords와 동일)
+    """
+    # [UPDATED] 1~5. 필터 적용 후 최근 2주차의 (logweek, sessionid, search_keyword) 고유 조합 집계 (엔진)
+    if sketches is not None:
+        aggregated = agg_engine.sketch_weekly_keyword_counts(sketches, n_weeks=2, paths=paths)
+    else:
+        aggregated = agg_engine.get_engine().failed_weekly_keyword_counts(agg_engine.as_source(df), n_weeks=2)
+    if aggregated is None:
+        return pd.DataFrame()
+    weeks, week_counts = aggregated
+    if len(weeks) < 1:
+        return pd.DataFrame()
+    generations.checkpoint()
+        
+    this_week = weeks[-1]
+    prev_week = weeks[-2] if len(weeks) > 1 else None
+    
+    def week_data(week):
+        return week_counts.loc[week_counts['logweek'] == week, ['search_keyword', 'cnt']]
+
+    # 6. Current Week Stats
+    current_data = week_data(this_week)
+    # Rank
+    current_data = current_data.sort_values(by=['cnt', 'search_keyword'], ascending=[False, True])
+    current_data['rank'] = range(1, len(current_data) + 1)
+    
+    # 7. Previous Week Stats
+    if prev_week is not None:
+        prev_data = week_data(prev_week)
+        prev_data = prev_data.sort_values(by=['cnt', 'search_keyword'], ascending=[False, True])
+        prev_data['prev_rank'] = range(1, len(prev_data) + 1)
+        
+        prev_data = prev_data[['search_keyword', 'cnt', 'prev_rank']]
+        prev_data.columns = ['search_keyword', 'prev_count', 'prev_rank']
+        
+        # Merge
+        merged = pd.merge(current_data, prev_data, on='search_keyword', how='left')
+        merged['prev_count'] = merged['prev_count'].fillna(0)
+        generations.checkpoint()
+        
+        # Calculate Changes
+        merged['count_change'] = merged['cnt'] - merged['prev_count']
+        
+        # Rank Change: Prev - Curr (Positive = Improved/Up)
+        # Mark as "NEW" if not in previous Top 100
+        merged['rank_change_val'] = merged.apply(
+            lambda row: 0 if pd.isna(row['prev_rank']) or row['prev_rank'] > 100 else row['prev_rank'] - row['rank'],
+            axis=1
+        )
+        merged['rank_change_display'] = merged.apply(
+            lambda row: 'NEW' if pd.isna(row['prev_rank']) or row['prev_rank'] > 100 else row['prev_rank'] - row['rank'],
+            axis=1
+        )
+    else:
+        merged = current_data
+        merged['count_change'] = 0
+        merged['rank_change_val'] = 0
+        merged['rank_change_display'] = 0
+        
+    # 8. Limit 100 and Formatting
+    top_120 = merged.head(100).copy()
+    
+    # Rename columns for internal consistency (will be renamed to Korean in app.py)
+    # Output: rank, search_keyword, cnt, count_change, rank_change_val, rank_change_display
+    return top_120[['rank', 'search_keyword', 'cnt', 'count_change', 'rank_change_val', 'rank_change_display']]
@@ -1,133 +1,267 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import os
 import glob
-import duckdb
+import json
+import hashlib
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from huggingface_hub import hf_hub_download
+from frame_store import cache_frame
+import hf_sync
+# [NEW] Streamlit 없는 계산 모듈 (parquet 원천 구성, 컬럼 매핑 공유)
+import compute
+from compute import COLUMN_ALIASES, HF_COLUMN_MAPPING
+# [NEW] DuckDB는 parquet 로드 시 import (스냅샷 mmap 경로에서는 불필요)
+from lazy_imports import lazy
+duckdb = lazy('duckdb')
+# [NEW] 협조적 취소: 긴 로드/전처리 단계 사이에서 새 재실행 요청 확인
+import generations
 
 # Data storage directory
 DATA_STORAGE_DIR = "data_storage"
 
-@st.cache_data(ttl=3600)
-def load_data_from_huggingface():
+# [NEW] 전처리 완료 Arrow IPC 스냅샷 (프로세스 간 mmap 공유)
+SNAPSHOT_DIR = os.path.join(DATA_STORAGE_DIR, ".snapshot")
+SNAPSHOT_FILE = os.path.join(SNAPSHOT_DIR, "preprocessed.arrow")
+# 전처리 로직이 바뀌면 올려서 기존 스냅샷을 무효화
+SNAPSHOT_VERSION = 1
+
+# [NEW] 집계 결과의 컬럼/로직이 바뀌면 올려서 모든 집계 캐시(data_fingerprint)를 무효화
+SCHEMA_VERSION = 1
+
+def _huggingface_config():
     """
-    Hugging Face Hub에서 데이터 다운로드 및 로드
+    Hugging Face 데이터셋 설정 (Streamlit Secrets → 환경 변수 → 기본값)
     
     Returns:
-        pd.DataFrame: 로드된 데이터프레임
+        dict: repo_id, pattern(샤드 경로 패턴), token
     """
+    config = {}
     try:
-        # Streamlit Secrets에서 설정 가져오기
         if hasattr(st, 'secrets') and 'huggingface' in st.secrets:
-            repo_id = st.secrets['huggingface'].get('repo_id', 'kdragonkorea/search-data')
-            filename = st.secrets['huggingface'].get('filename', 'data_20261001_20261130.parquet')
-            token = st.secrets['huggingface'].get('token', None)
-        else:
-            # 기본값 사용
-            repo_id = 'kdragonkorea/search-data'
-            filename = 'data_20261001_20261130.parquet'
-            token = None
-        
-        print(f"Loading dataset from Hugging Face Hub...")
-        print(f"  Repository: {repo_id}")
-        print(f"  Filename: {filename}")
-        
-        # Hugging Face Hub에서 파일 다운로드
-        file_path = hf_hub_download(
-            repo_id=repo_id,
-            filename=filename,
-            repo_type="dataset",
-            token=token
-        )
-        
-        print(f"✓ Downloaded to: {file_path}")
-        
-        # Parquet 파일 로드
-        df = pd.read_parquet(file_path)
-        print(f"✓ Successfully loaded {len(df):,} rows, {len(df.columns)} columns")
-        
-        # 컬럼명 매핑 (원본 데이터 → 앱에서 사용하는 컬럼명)
-        column_mapping = {
-            'logday': '검색일',
-            'search_keyword': '검색어',
-            'total_count': '검색량',
-            'result_total_count': '검색결과수',
-            'pathcd': '속성',
-            'age': '연령대',
-            'gender': '성별',
-            'tab': '탭',
-            'search_type': '검색타입'
-        }
-        
-        # 컬럼명 변경
-        df = df.rename(columns=column_mapping)
-        print(f"✓ Column mapping applied")
-        
-        # 필요한 컬럼 선택 (매핑된 컬럼 + 추가 필요 컬럼)
-        required_columns = list(column_mapping.values())
-        additional_columns = ['uidx', 'sessionid', 'logweek', 'pathcd']  # 파이차트용 추가 컬럼
-        
-        # 존재하는 컬럼만 선택
-        available_columns = [col for col in required_columns + additional_columns if col in df.columns]
-        # 중복 제거
-        available_columns = list(dict.fromkeys(available_columns))
-        
-        if available_columns:
-            df = df[available_columns]
-            print(f"✓ Selected {len(available_columns)} columns")
-        
-        return df
-        
-    except Exception as e:
-        print(f"✗ Error loading from Hugging Face: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+            config = dict(st.secrets['huggingface'])
+    except Exception:
+        pass  # secrets.toml이 없는 환경
+    # pattern이 없으면 기존 단일 파일 설정(filename)을 샤드 1개로 사용
+    pattern = config.get('pattern') or os.getenv('DASHBOARD_HF_PATTERN') or \
+        config.get('filename', 'data_20261001_20261130.parquet')
+    return {
+        'repo_id': config.get('repo_id', 'kdragonkorea/search-data'),
+        'pattern': pattern,
+        'token': config.get('token', None),
+    }
+
+def _rename_hf_columns(df):
+    """영문 원본 컬럼을 앱 컬럼으로 변경 (이미 한글 컬럼이 있으면 유지)"""
+    renames = {k: v for k, v in HF_COLUMN_MAPPING.items() if k in df.columns and v not in df.columns}
+    return df.rename(columns=renames) if renames else df
+
+# 같은 프로세스의 여러 세션이 동시에 동기화하지 않도록 (진행 중이면 건너뜀)
+_sync_lock = threading.Lock()
 
 def sync_data_storage():
     """
     데이터 저장소 동기화
-    - 로컬 parquet 파일이 없으면 Hugging Face에서 다운로드
-    - 다운로드한 파일을 data_storage/에 캐싱
+    - 로컬 parquet 파일이 없거나 이전 동기화가 중단되었으면 Hugging Face에서 샤드 다운로드
+    - [UPDATED] 샤드를 병렬로 받아 검증 후 data_storage/에 그대로 배치 (pandas 디코딩/재저장 없음)
+    - [UPDATED] 증분 동기화: DASHBOARD_HF_SYNC_INTERVAL초마다 원격 목록을 확인해 새/변경 샤드만 받음
+      (매니페스트 없이 직접 넣은 parquet만 있으면 동기화하지 않음)
+    - [UPDATED] 로컬 파일이 있으면 동기화는 백그라운드 스레드에서 실행하고 바로 반환
+      (원격 목록 확인/다운로드/검증이 사용자 재실행을 막지 않음, 로컬 파일이 없는 첫 실행만 완료까지 대기)
+    - 변경된 파티션은 partition_fingerprint()가 달라져 해당 기간의 캐시만 무효화됨
+      (백그라운드 동기화가 샤드를 배치하고 매니페스트에 기록한 뒤의 재실행부터 반영)
     """
     os.makedirs(DATA_STORAGE_DIR, exist_ok=True)
     
     # Check for existing parquet files
     parquet_files = glob.glob(f"{DATA_STORAGE_DIR}/*.parquet")
     
-    if parquet_files:
+    if parquet_files and not hf_sync.sync_due(DATA_STORAGE_DIR):
         print(f"Found {len(parquet_files)} existing parquet file(s) in {DATA_STORAGE_DIR}/")
         return
     
-    print(f"No parquet files found in {DATA_STORAGE_DIR}/")
-    print("Attempting to download from Hugging Face...")
-    
-    # Hugging Face에서 데이터 로드
-    df = load_data_from_huggingface()
-    
-    if df is not None:
-        # 로컬에 캐싱
-        output_file = f"{DATA_STORAGE_DIR}/data_huggingface.parquet"
-        df.to_parquet(output_file, index=False)
-        print(f"✓ Cached to {output_file}")
-        print(f"  Size: {os.path.getsize(output_file) / (1024*1024):.1f}MB")
-    else:
-        print("\n⚠ Failed to load data from Hugging Face")
+    if not _sync_lock.acquire(blocking=False):
+        return  # 다른 세션/백그라운드 스레드가 동기화 중 (기존 파일로 계속 진행)
+    # Secrets는 스크립트 스레드에서 읽어 전달
+    config = _huggingface_config()
+    if parquet_files:
+        print(f"Found {len(parquet_files)} existing parquet file(s) in {DATA_STORAGE_DIR}/")
+        threading.Thread(
+            target=_sync_from_huggingface, args=(parquet_files, config), name='hf-sync', daemon=True
+        ).start()
+        return
+    _sync_from_huggingface(parquet_files, config)
+
+def _sync_from_huggingface(parquet_files, config):
+    """Hugging Face 샤드 동기화 본문 (호출자가 획득한 _sync_lock을 끝나면 해제)"""
+    try:
+        if parquet_files and hf_sync.sync_pending(DATA_STORAGE_DIR):
+            print("Resuming interrupted Hugging Face sync in the background...")
+        elif parquet_files:
+            print("Checking Hugging Face for new or changed shards in the background...")
+        else:
+            print(f"No parquet files found in {DATA_STORAGE_DIR}/")
+            print("Attempting to download from Hugging Face...")
+        
+        print(f"  Repository: {config['repo_id']}")
+        print(f"  Pattern: {config['pattern']}")
+        result = hf_sync.sync(config['repo_id'], config['pattern'], token=config['token'], store_dir=DATA_STORAGE_DIR)
+        updated = result['added'] + result['changed'] + result['removed']
+        if updated:
+            print(f"✓ Updated partitions: {', '.join(sorted(updated))}")
+    except Exception as e:
+        print(f"\n⚠ Failed to load data from Hugging Face: {e}")
         print("  Please check:")
         print("  1. Repository ID is correct")
-        print("  2. Filename is correct")
+        print("  2. Filename/pattern is correct")
         print("  3. Token is valid (for private datasets)")
         print("  4. Dataset exists and is accessible")
+    finally:
+        _sync_lock.release()
+
+# [NEW] 파티션(로컬 parquet 파일) 목록과 기간별 지문
+# 파일별 (크기, 수정시각) → 날짜 범위 (parquet 통계만 읽음, 같은 파일은 다시 읽지 않음)
+_partition_dates = {}
+
+def _stat_date(value):
+    """parquet 통계 값(20261001, '20261001', date 등) → Timestamp"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = str(int(value))
+    if isinstance(value, str):
+        return pd.to_datetime(value, format='%Y%m%d', errors='coerce')
+    return pd.Timestamp(value)
+
+def _read_partition_dates(path):
+    """parquet 행 그룹 통계의 날짜 최소/최대 (통계가 없으면 (None, None) → 모든 기간과 겹침)"""
+    try:
+        metadata = pq.ParquetFile(path).metadata
+    except Exception as e:
+        print(f"Warning: Could not read parquet metadata {path}: {e}")
+        return None, None
+    names = metadata.schema.names
+    date_col = next((col for col in ('검색일', 'logday', 'search_date') if col in names), None)
+    if date_col is None:
+        return None, None
+    index = names.index(date_col)
+    min_date = max_date = None
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(index).statistics
+        if stats is None or not stats.has_min_max:
+            return None, None
+        low, high = _stat_date(stats.min), _stat_date(stats.max)
+        if low is None or high is None or pd.isna(low) or pd.isna(high):
+            return None, None
+        min_date = low if min_date is None else min(min_date, low)
+        max_date = high if max_date is None else max(max_date, high)
+    return min_date, max_date
+
+def list_partitions():
+    """
+    로컬 파티션 목록
+    
+    Returns:
+        list[dict]: name, size, mtime_ns, min_date, max_date (날짜는 Timestamp 또는 None)
+    """
+    partitions = []
+    for path in sorted(glob.glob(f"{DATA_STORAGE_DIR}/*.parquet")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # 동기화 중 삭제된 파일
+        key = (os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+        if key not in _partition_dates:
+            _partition_dates[key] = _read_partition_dates(path)
+        min_date, max_date = _partition_dates[key]
+        partitions.append({
+            'name': key[0], 'size': key[1], 'mtime_ns': key[2],
+            'min_date': min_date, 'max_date': max_date,
+        })
+    return partitions
+
+def _overlapping_partitions(start_date=None, end_date=None):
+    """기간과 겹치는 파티션 (날짜 통계가 없는 파티션은 항상 포함)"""
+    start = pd.to_datetime(start_date) if start_date is not None else None
+    end = pd.to_datetime(end_date) if end_date is not None else None
+    parts = []
+    for part in list_partitions():
+        if start is not None and part['max_date'] is not None and part['max_date'] < start:
+            continue
+        if end is not None and part['min_date'] is not None and part['min_date'] > end:
+            continue
+        parts.append(part)
+    return parts
+
+def _digest(payload):
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode()).hexdigest()[:16]
+
+def partition_fingerprint(start_date=None, end_date=None):
+    """
+    기간과 겹치는 파티션들의 지문 (캐시 키용)
+    
+    새 일자가 추가되거나 샤드가 바뀌어도, 그 파티션과 겹치지 않는 기간의 지문은 그대로이므로
+    해당 기간의 세션 데이터/집계 캐시는 계속 재사용됩니다.
+    
+    Args:
+        start_date: 시작 날짜 (None이면 전체)
+        end_date: 종료 날짜 (None이면 전체)
+    
+    Returns:
+        str: 16자리 hex
+    """
+    entries = [[part['name'], part['size'], part['mtime_ns']]
+               for part in _overlapping_partitions(start_date, end_date)]
+    return _digest({'version': SNAPSHOT_VERSION, 'partitions': entries})
+
+# [NEW] 집계 캐시 키 (기존 data_id = 기간 + 행 수 문자열 대체)
+def data_fingerprint(start_date=None, end_date=None, paths=None):
+    """
+    필터 결과 데이터의 내용 지문 (원천 파티션 + 필터 조건 + 스키마 버전)
+    
+    - 행 수가 같은 다른 필터 결과는 서로 다른 지문 (기존 data_id의 충돌 방지)
+    - 선택 기간이 달라도 실제 데이터가 같으면 같은 지문
+      (기간을 데이터가 있는 범위로 정규화, 예: 데이터 시작일 이전부터 선택)
+    - 세션 상태가 아닌 데이터 내용으로 결정되므로 같은 필터를 고른 모든 세션이 캐시를 공유
+    
+    Args:
+        start_date: 시작 날짜 (None이면 전체)
+        end_date: 종료 날짜 (None이면 전체)
+        paths: 접속 경로 코드 목록 (None이면 경로 필터 없음)
+    
+    Returns:
+        str: 16자리 hex
+    """
+    start = pd.to_datetime(start_date) if start_date is not None else None
+    end = pd.to_datetime(end_date) if end_date is not None else None
+    parts = _overlapping_partitions(start, end)
+    # 날짜 통계가 모든 파티션에 있을 때만 데이터 범위로 정규화
+    if parts and all(part['min_date'] is not None for part in parts):
+        data_min = min(part['min_date'] for part in parts)
+        data_max = max(part['max_date'] for part in parts)
+        start = data_min if start is None or start < data_min else start
+        end = data_max if end is None or end > data_max else end
+    return _digest({
+        'schema': SCHEMA_VERSION,
+        'preprocess': SNAPSHOT_VERSION,
+        'partitions': [[part['name'], part['size'], part['mtime_ns']] for part in parts],
+        'range': [start.date().isoformat() if start is not None else None,
+                  end.date().isoformat() if end is not None else None],
+        'paths': sorted(paths) if paths is not None else None,
+    })
 
-@st.cache_data(ttl=3600)
 def load_data():
     """
     데이터 로드 (캐싱 적용)
     
     우선순위:
     1. 로컬 data_storage/ 디렉토리의 parquet 파일
-    2. Hugging Face Hub에서 직접 로드
+    2. Hugging Face Hub에서 샤드 동기화 후 로컬 파일
+    
+    [UPDATED] 캐시 키는 전체 파티션 지문 (동기화로 파티션이 바뀌면 다시 로드, 이전 결과는 제거)
     
     Returns:
         pd.DataFrame: 로드된 데이터프레임
@@ -135,35 +269,36 @@ def load_data():
     # 로컬 파일 확인
     parquet_files = glob.glob(f"{DATA_STORAGE_DIR}/*.parquet")
     
-    if parquet_files:
-        # 로컬 파일 사용
-        print(f"Loading data from {len(parquet_files)} local parquet file(s)...")
-        
-        # DuckDB로 빠르게 로드
-        conn = duckdb.connect()
-        parquet_pattern = f"{DATA_STORAGE_DIR}/*.parquet"
-        query = f"SELECT * FROM read_parquet('{parquet_pattern}')"
-        df = conn.execute(query).df()
-        conn.close()
-        
-        print(f"✓ Loaded {len(df):,} rows from local storage")
-    else:
-        # Hugging Face에서 직접 로드
-        print("No local files found. Loading from Hugging Face Hub...")
-        df = load_data_from_huggingface()
-        
-        if df is None:
+    if not parquet_files:
+        # [UPDATED] Hugging Face 샤드를 로컬 저장소로 동기화한 뒤 같은 경로로 로드
+        print("No local files found. Syncing from Hugging Face Hub...")
+        sync_data_storage()
+        parquet_files = glob.glob(f"{DATA_STORAGE_DIR}/*.parquet")
+        if not parquet_files:
             st.error("데이터를 불러올 수 없습니다. Hugging Face 설정을 확인해주세요.")
             st.stop()
-        
-        # 로컬에 캐싱 (다음 실행 시 빠르게 로드)
-        try:
-            os.makedirs(DATA_STORAGE_DIR, exist_ok=True)
-            output_file = f"{DATA_STORAGE_DIR}/data_huggingface.parquet"
-            df.to_parquet(output_file, index=False)
-            print(f"✓ Cached to {output_file} for faster loading next time")
-        except Exception as e:
-            print(f"Warning: Could not cache data locally: {e}")
+    
+    return _load_storage(partition_fingerprint())
+
+@cache_frame(ttl=3600, max_entries=1)
+def _load_storage(storage_key):
+    """로컬 parquet 전체 로드 (storage_key: partition_fingerprint(), 캐시 키 역할)"""
+    parquet_files = glob.glob(f"{DATA_STORAGE_DIR}/*.parquet")
+    
+    # 로컬 파일 사용
+    print(f"Loading data from {len(parquet_files)} local parquet file(s)...")
+    
+    # DuckDB로 빠르게 로드
+    conn = duckdb.connect()
+    parquet_pattern = f"{DATA_STORAGE_DIR}/*.parquet"
+    query = f"SELECT * FROM read_parquet('{parquet_pattern}')"
+    df = conn.execute(query).df()
+    conn.close()
+    
+    # Hugging Face 원본 샤드는 영문 컬럼
+    df = _rename_hf_columns(df)
+    
+    print(f"✓ Loaded {len(df):,} rows from local storage")
     
     # 데이터 타입 변환 (중요: 숫자형을 문자열로 변환 후 날짜 파싱)
     if '검색일' in df.columns:
@@ -189,21 +324,7 @@ def load_data():
     # 앱 호환성을 위한 영문 컬럼명 추가 (기존 한글 컬럼 유지)
     df = df.copy()
     
-    column_aliases = {
-        '검색일': 'search_date',
-        '검색어': 'search_keyword',
-        '검색량': 'total_count',
-        '검색결과수': 'result_total_count',
-        '검색실패율': 'fail_rate',
-        '검색순위': 'rank',
-        '속성': 'pathcd',
-        '연령대': 'age',
-        '성별': 'gender',
-        '탭': 'tab',
-        '검색타입': 'search_type'
-    }
-    
-    for korean, english in column_aliases.items():
+    for korean, english in COLUMN_ALIASES.items():
         if korean in df.columns and english not in df.columns:
             df[english] = df[korean]
     
@@ -228,6 +349,8 @@ def preprocess_data(df):
     
     Returns:
         pd.DataFrame: 전처리된 데이터프레임
+
+    [NEW] 단계 사이마다 generations.checkpoint() → 더 새로운 재실행 요청이 있으면 중단 (결과는 버려짐)
     """
     if df is None or len(df) == 0:
         return df
@@ -238,12 +361,14 @@ def preprocess_data(df):
         if df['검색일'].dtype in ['int64', 'float64']:
             df['검색일'] = df['검색일'].astype(str).str.replace('.0', '', regex=False)
         df['검색일'] = pd.to_datetime(df['검색일'], format='%Y%m%d', errors='coerce')
+    generations.checkpoint()
     
     # 숫자형 컬럼 변환
     numeric_columns = ['검색순위', '검색량', '검색실패율', '검색결과수']
     for col in numeric_columns:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')
+    generations.checkpoint()
     
     # 검색실패율 계산 (검색결과수가 0이면 실패)
     if '검색결과수' in df.columns and '검색실패율' not in df.columns:
@@ -252,6 +377,7 @@ def preprocess_data(df):
     # 검색순위 생성 (날짜별, 검색량 기준)
     if '검색순위' not in df.columns and '검색량' in df.columns and '검색일' in df.columns:
         df['검색순위'] = df.groupby('검색일')['검색량'].rank(ascending=False, method='dense')
+        generations.checkpoint()
     
     # 결측값 처리 (컬럼이 존재하는 경우만)
     if '검색어' in df.columns:
@@ -260,22 +386,9 @@ def preprocess_data(df):
     # 앱 호환성을 위한 영문 컬럼명 추가 (기존 한글 컬럼 유지)
     # SettingWithCopyWarning 방지를 위해 copy() 사용
     df = df.copy()
+    generations.checkpoint()
     
-    column_aliases = {
-        '검색일': 'search_date',
-        '검색어': 'search_keyword',
-        '검색량': 'total_count',
-        '검색결과수': 'result_total_count',
-        '검색실패율': 'fail_rate',
-        '검색순위': 'rank',
-        '속성': 'pathcd',
-        '연령대': 'age',
-        '성별': 'gender',
-        '탭': 'tab',
-        '검색타입': 'search_type'
-    }
-    
-    for korean, english in column_aliases.items():
+    for korean, english in COLUMN_ALIASES.items():
         if korean in df.columns and english not in df.columns:
             df[english] = df[korean]
     
@@ -291,9 +404,109 @@ def preprocess_data(df):
     
     return df
 
+def _arrow_string_dtype():
+    """
+    Arrow 문자열 버퍼를 그대로 쓰는 pandas dtype (결측은 NaN, pandas 3의 기본 str과 동일)
+
+    pandas 2.x의 기본 변환은 문자열 컬럼을 object 배열로 복사하므로 명시적으로 지정
+    """
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)  # pandas 2.3+
+    except TypeError:
+        return pd.StringDtype('pyarrow_numpy')  # pandas 2.1~2.2
+
+
+def _read_snapshot(fingerprint):
+    """
+    스냅샷을 메모리 매핑으로 읽기 (지문이 다르면 None)
+
+    압축하지 않은 IPC 파일이므로 컬럼 버퍼가 mmap 영역을 그대로 가리킵니다.
+    같은 호스트의 여러 워커 프로세스가 OS 페이지 캐시를 공유합니다.
+    """
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    try:
+        source = pa.memory_map(SNAPSHOT_FILE, 'r')
+        table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid) as e:
+        print(f"Warning: Could not read snapshot {SNAPSHOT_FILE}: {e}")
+        return None
+
+    metadata = table.schema.metadata or {}
+    if metadata.get(b'source_fingerprint', b'').decode() != fingerprint:
+        print("Snapshot is stale (source parquet changed), rebuilding...")
+        return None
+
+    aliases = json.loads(metadata.get(b'column_aliases', b'{}').decode())
+    # split_blocks: 컬럼별 블록 유지 → 2D 블록 통합 시 발생하는 복사 방지
+    # types_mapper: 문자열 컬럼(검색어/속성/uidx 등)도 mmap 버퍼를 그대로 사용 (object 배열 변환 없음)
+    string_dtype = _arrow_string_dtype()
+    df = table.to_pandas(
+        split_blocks=True,
+        types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get,
+    )
+    for english, korean in aliases.items():
+        df[english] = df[korean]
+    return df
+
+
+def _write_snapshot(df, fingerprint):
+    """전처리 결과를 압축 없는 Arrow IPC 파일로 원자적 저장"""
+    # 영문 별칭 컬럼은 한글 원본과 동일한 값이므로 저장하지 않고 로드 시 다시 연결
+    aliases = {
+        english: korean
+        for korean, english in COLUMN_ALIASES.items()
+        if korean in df.columns and english in df.columns and df[english].equals(df[korean])
+    }
+    stored = df.drop(columns=list(aliases))
+
+    try:
+        table = pa.Table.from_pandas(stored, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'source_fingerprint': fingerprint.encode(),
+            b'column_aliases': json.dumps(aliases, ensure_ascii=False).encode(),
+        })
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_file = f"{SNAPSHOT_FILE}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_file, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        # 여러 워커가 동시에 만들어도 완성된 파일만 보이도록 교체
+        os.replace(tmp_file, SNAPSHOT_FILE)
+        print(f"✓ Snapshot written to {SNAPSHOT_FILE} ({os.path.getsize(SNAPSHOT_FILE) / (1024*1024):.1f}MB)")
+    except Exception as e:
+        print(f"Warning: Could not write snapshot: {e}")
+
+
+def load_preprocessed():
+    """
+    전처리까지 끝난 전체 데이터 로드 (스냅샷 우선)
+
+    우선순위:
+    1. data_storage/.snapshot/preprocessed.arrow (원본 파티션 지문이 같을 때, mmap)
+    2. load_data() + preprocess_data() 후 스냅샷 생성
+
+    Returns:
+        pd.DataFrame: 전처리된 데이터프레임
+    """
+    fingerprint = partition_fingerprint()
+    df = _read_snapshot(fingerprint)
+    if df is not None:
+        print(f"✓ Memory-mapped snapshot: {len(df):,} rows")
+        return df
+
+    df = preprocess_data(load_data())
+    # 로컬 parquet이 있을 때만 스냅샷 생성 (지문 기준이 없으면 무효화할 수 없음)
+    if glob.glob(f"{DATA_STORAGE_DIR}/*.parquet"):
+        _write_snapshot(df, partition_fingerprint())
+    return df
+
+
 def load_data_range(start_date=None, end_date=None):
     """
     날짜 범위로 데이터 필터링
+    (load_data()가 공유 저장소의 뷰를 반환하므로 전체 범위 조회는 복사 없이 반환)
     
     Args:
         start_date: 시작 날짜 (None이면 전체)
@@ -303,6 +516,7 @@ def load_data_range(start_date=None, end_date=None):
         pd.DataFrame: 필터링된 데이터프레임
     """
     df = load_data()
+    generations.checkpoint()
     
     if start_date is None and end_date is None:
         return df
@@ -319,6 +533,28 @@ def load_data_range(start_date=None, end_date=None):
     
     return df
 
+# [NEW] 집계 엔진이 parquet을 직접 스캔하는 원천 (메모리의 DataFrame 대신)
+def parquet_source(start_date=None, end_date=None, paths=None):
+    """
+    data_storage/*.parquet 직접 스캔 원천
+    (load_data_range() + preprocess_data() + 접속 경로 필터 결과와 같은 행)
+    
+    Args:
+        start_date: 시작 날짜 (None이면 전체)
+        end_date: 종료 날짜 (None이면 전체)
+        paths: 접속 경로 코드 목록 (예: ['MDA', 'DCM'], None이면 전체)
+    
+    Returns:
+        agg_engine.ParquetSource | None: 로컬 parquet이 없거나 스키마를 해석할 수 없으면 None
+    """
+    if not glob.glob(f"{DATA_STORAGE_DIR}/*.parquet"):
+        return None
+    try:
+        return compute.scan(DATA_STORAGE_DIR, start_date, end_date, paths)
+    except (ValueError, duckdb.Error) as e:
+        print(f"Warning: Could not scan parquet directly: {e}")
+        return None
+
 def get_data_info():
     """
     데이터 정보 반환
@@ -0,0 +1,461 @@
+"""
+Plotly 차트 생성 (graph_objects + numpy 배열)
+
+plotly.express는 입력 DataFrame을 다시 그룹/정렬하고 trace마다 pandas 연산을 수행해
+차트 1개에 수십 ms가 걸립니다. 여기서는 집계 테이블의 컬럼을 numpy 배열로 꺼내
+trace/layout dict를 직접 만들고 graph_objects.Figure로 한 번만 검증합니다.
+(결과 모양은 기존 px.bar/px.pie 차트와 동일: trace 순서, 색상, hover, 카테고리 순서)
+
+- Streamlit 없이 동작 (compute와 같은 계층), 캐싱은 호출하는 쪽(app.py의 cache_handle)에서 담당
+- 반환한 Figure는 캐시에서 세션 간 공유되므로 호출자가 수정하지 않아야 합니다.
+  (st.plotly_chart는 figure.to_dict() 사본을 직렬화하므로 그대로 전달해도 안전)
+
+[NEW] 전송 크기 축소 (기간이 길어져도 차트당 JSON이 커지지 않도록)
+- 선형 차트: 점이 MAX_LINE_POINTS보다 많으면 LTTB로 다운샘플링 (처음/끝, 봉우리/골짜기 유지)
+- 요일별 막대: 주차가 MAX_BAR_GROUPS보다 많으면 월 단위로 합산 (범례 = 월)
+- 숫자/날짜 배열은 numpy 배열 그대로 전달 → plotly가 base64 typed array로 인코딩
+  (날짜는 epoch ms float64, 막대 hover 레이블은 점별 customdata 대신 trace의 hovertemplate에 포함)
+- template: plotly_white 중 사용하는 trace 종류(bar/scatter/pie)의 기본값만 포함 (모양 동일)
+- payload_bytes(fig): st.plotly_chart가 보내는 JSON 크기 (Figure당 한 번만 직렬화)
+
+환경 변수:
+    DASHBOARD_CHART_MAX_POINTS=400    선형 차트 최대 점 수 (0이면 다운샘플링 안 함)
+    DASHBOARD_CHART_MAX_GROUPS=12     요일별 막대 차트 최대 주차 수 (초과 시 월 단위, 0이면 합산 안 함)
+
+사용법:
+    fig = figures.weekday_bar(daily_counts, week_ranges)
+    st.plotly_chart(fig, use_container_width=True)
+"""
+
+import functools
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+try:
+    from lazy_imports import lazy
+except ImportError:  # 루트 app.py에서 core.figures로 import된 경우
+    from core.lazy_imports import lazy
+
+go = lazy('plotly.graph_objects')
+pio = lazy('plotly.io')
+
+MAX_LINE_POINTS = int(os.getenv('DASHBOARD_CHART_MAX_POINTS', '400'))
+MAX_BAR_GROUPS = int(os.getenv('DASHBOARD_CHART_MAX_GROUPS', '12'))
+
+BRAND_RGB = (94, 43, 184)  # #5E2BB8
+DAYS_KO = np.array(["월", "화", "수", "목", "금", "토", "일"])
+
+
+@functools.lru_cache(maxsize=None)
+def _template(*trace_types):
+    """plotly_white에서 사용하는 trace 종류의 기본값만 남긴 template (polar/geo 등 미사용 축 설정 제외)"""
+    template = pio.templates['plotly_white'].to_plotly_json()
+    layout = {k: v for k, v in template['layout'].items() if k not in ('polar', 'ternary', 'scene', 'geo')}
+    return {'data': {t: template['data'][t] for t in trace_types}, 'layout': layout}
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 다운샘플링 → 남길 점의 인덱스
+
+    처음/끝 점은 유지하고, 나머지를 threshold - 2개 구간으로 나눠 구간마다
+    이전 선택 점/다음 구간 평균과 만드는 삼각형 넓이가 가장 큰 점 1개를 고릅니다.
+    """
+    n = len(y)
+    if threshold < 3 or n <= threshold:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def _epoch_ms(dates):
+    """날짜 → epoch ms (float64 typed array로 전송, date 축에서 그대로 해석됨)"""
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[ms]').astype(np.int64).astype(float)
+
+
+_payload_sizes = {}  # id(Figure) → (weakref, JSON 바이트)
+
+
+def payload_bytes(fig):
+    """Figure를 브라우저로 보낼 때의 JSON 크기 (st.plotly_chart와 같은 직렬화, Figure당 1회 계산)"""
+    key = id(fig)
+    entry = _payload_sizes.get(key)
+    if entry is not None and entry[0]() is fig:
+        return entry[1]
+    size = len(pio.to_json(fig, validate=False).encode())
+    _payload_sizes[key] = (weakref.ref(fig, lambda _: _payload_sizes.pop(key, None)), size)
+    return size
+
+
+def _week_colors(labels, min_opacity):
+    """최근 주차일수록 진한 브랜드 색상 (오래된 주차 min_opacity → 최신 1.0)"""
+    n = len(labels)
+    colors = {}
+    for i, label in enumerate(labels):
+        opacity = min_opacity + ((1 - min_opacity) * (i / (n - 1))) if n > 1 else 1.0
+        colors[label] = f"rgba({BRAND_RGB[0]}, {BRAND_RGB[1]}, {BRAND_RGB[2]}, {opacity:.2f})"
+    return colors
+
+
+def _week_labels(week_ranges, sep=' ~ '):
+    """주차 → 'yy/mm/dd ~ yy/mm/dd' 레이블"""
+    return {
+        week: f"{low.strftime('%y/%m/%d')}{sep}{high.strftime('%y/%m/%d')}"
+        for week, low, high in zip(week_ranges['logweek'], week_ranges['min'], week_ranges['max'])
+    }
+
+
+def _grouped_bar(groups, colors):
+    """
+    그룹형 막대 trace 목록 (px.bar(color=..., barmode='group')과 같은 trace 구성)
+    hover: "date: {그룹 레이블}<br>count: {값}" (레이블은 trace마다 같으므로 점별 customdata 없이 template에 포함)
+
+    groups: [(레이블, x 배열, y 배열)]
+    """
+    traces = []
+    for label, x, y in groups:
+        traces.append({
+            'type': 'bar',
+            'name': label,
+            'legendgroup': label,
+            'offsetgroup': label,
+            'alignmentgroup': 'True',
+            'orientation': 'v',
+            'showlegend': True,
+            'textposition': 'auto',
+            'marker': {'color': colors[label], 'pattern': {'shape': ''}},
+            'x': x,
+            'y': y,
+            'hovertemplate': f"date: {label}<br>count: %{{y:,.0f}}<extra></extra>",
+            'xaxis': 'x',
+            'yaxis': 'y',
+        })
+    return traces
+
+
+def _rollup_months(daily_counts):
+    """
+    주차 × 요일 → 월 × 요일 검색량 (주차가 MAX_BAR_GROUPS보다 많을 때)
+
+    Returns:
+        (월 집계 — 그룹 키는 logweek 컬럼에 월 번호, 월 번호 → 'YYYY년 MM월' 레이블)
+    """
+    dates = daily_counts['actual_date']
+    monthly = daily_counts.assign(logweek=dates.dt.year * 12 + dates.dt.month - 1).groupby(
+        ['logweek', 'day_num'], as_index=False
+    ).agg(**{'Session Count': ('Session Count', 'sum'), 'actual_date': ('actual_date', 'min')})
+    labels = {month: f"{month // 12}년 {month % 12 + 1:02d}월" for month in monthly['logweek'].unique()}
+    return monthly, labels
+
+
+def _weekday_periods(daily_counts, week_ranges):
+    """요일별 막대의 그룹 (주차, 많으면 월) → (집계, 그룹 → 레이블, 월 단위 여부)"""
+    if MAX_BAR_GROUPS and daily_counts['logweek'].nunique() > MAX_BAR_GROUPS:
+        monthly, labels = _rollup_months(daily_counts)
+        return monthly, labels, True
+    return daily_counts, _week_labels(week_ranges), False
+
+
+def _weekday_groups(daily_counts, week_order, labels, with_dates=False):
+    """주차 × 요일 집계 → 주차별 (레이블, 요일, 검색량[, 날짜 'yy/mm/dd'])"""
+    weeks = daily_counts['logweek'].to_numpy()
+    day_nums = daily_counts['day_num'].to_numpy().astype(int)
+    counts = daily_counts['Session Count'].to_numpy()
+    dates = daily_counts['actual_date'].dt.strftime('%y/%m/%d').to_numpy() if with_dates else None
+    groups = []
+    for week in week_order:
+        rows = np.flatnonzero(weeks == week)
+        rows = rows[np.argsort(day_nums[rows], kind='stable')]
+        group = (labels[week], DAYS_KO[day_nums[rows]], counts[rows])
+        groups.append(group + (dates[rows],) if with_dates else group)
+    return groups
+
+
+def weekday_bar(daily_counts, week_ranges):
+    """
+    요일별 검색량 추이 (주간 트렌드 탭 막대형, 범례 오른쪽)
+
+    daily_counts: logweek, day_num, Session Count, actual_date
+    week_ranges: logweek, min, max
+    """
+    if daily_counts.empty:
+        return None
+    daily_counts, labels, _ = _weekday_periods(daily_counts, week_ranges)
+    week_order = sorted(daily_counts['logweek'].unique())
+    sorted_labels = [labels[week] for week in week_order]
+    traces = _grouped_bar(
+        _weekday_groups(daily_counts, week_order, labels),
+        _week_colors(sorted_labels, 0.2),
+    )
+
+    layout = {
+        'template': _template('bar'),
+        'barmode': 'group',
+        'font': {'family': "Journey, sans-serif"},
+        'title': {
+            'text': '요일별 검색량 추이',
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18, 'weight': 700}
+        },
+        'xaxis': {
+            'anchor': 'y', 'domain': [0.0, 1.0],
+            'categoryorder': 'array', 'categoryarray': list(DAYS_KO),
+            'title': {'text': "요일", 'font': {'size': 14}},
+            'tickfont': {'size': 12}
+        },
+        'yaxis': {
+            'anchor': 'x', 'domain': [0.0, 1.0],
+            'title': {'text': "검색량", 'font': {'size': 14}},
+            'tickfont': {'size': 12}
+        },
+        'legend': {
+            'title': {
+                'text': '조회 기간',
+                'font': {'size': 13, 'weight': 600},
+                'side': 'top'  # 제목을 상단에 배치
+            },
+            'orientation': 'v',  # 세로 방향
+            'yanchor': 'middle',
+            'y': 0.5,  # 중앙 정렬
+            'xanchor': 'left',
+            'x': 1.02,  # 차트 오른쪽 밖
+            'font': {'size': 12},
+            'itemsizing': 'constant',
+            'tracegroupgap': 8,  # 세로 배치 간격
+            'bgcolor': 'rgba(255, 255, 255, 0.8)'  # 반투명 배경만 유지
+        },
+        'hovermode': "closest",
+        'height': 480,
+        'margin': {'t': 70, 'b': 60, 'l': 60, 'r': 180}  # 오른쪽 마진 180px (범례 공간)
+    }
+    return go.Figure({'data': traces, 'layout': layout})
+
+
+def weekly_trend_bar(daily_counts, week_ranges):
+    """
+    요일별 검색량 추이 (visualizations.plot_weekly_trend, 범례 하단 + 막대별 날짜 hover)
+    """
+    daily_counts, labels, monthly = _weekday_periods(daily_counts, week_ranges)
+    week_order = sorted(daily_counts['logweek'].unique(), key=lambda week: labels[week])
+    sorted_labels = [labels[week] for week in sorted(daily_counts['logweek'].unique())]
+    colors = _week_colors(sorted_labels, 0.2)
+    traces = []
+    for label, x, y, dates in _weekday_groups(daily_counts, week_order, labels, with_dates=True):
+        trace = {
+            'type': 'bar',
+            'name': label,
+            'x': x,
+            'y': y,
+            'marker': {'color': colors[label]},
+        }
+        if monthly:
+            # 월 단위 막대는 하루가 아니므로 월 레이블 표시
+            trace['hovertemplate'] = f"date: {label}<br>count: %{{y:,.0f}}<extra></extra>"
+        else:
+            trace['customdata'] = dates
+            trace['hovertemplate'] = "date: %{customdata}<br>count: %{y:,.0f}<extra></extra>"
+        traces.append(trace)
+
+    layout = {
+        'template': _template('bar'),
+        'barmode': 'group',
+        'font': {'family': "Journey, sans-serif"},
+        'title': {
+            'text': '요일별 검색량 추이',
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        'xaxis': {
+            'title': {'text': "요일"},
+            'categoryorder': 'array',
+            'categoryarray': list(DAYS_KO),
+            'domain': [0, 1]  # 전체 폭 사용
+        },
+        'yaxis': {
+            'title': {'text': "검색량"},
+            'domain': [0, 0.75]  # 상단 75%만 사용 (더 많은 범례 공간)
+        },
+        'hovermode': "closest",
+        'height': 550,
+        'margin': {'t': 60, 'b': 160, 'l': 60, 'r': 60},  # 하단 마진 160px
+        'showlegend': True,
+        'legend': {
+            'title': {'text': '조회 기간'},
+            'orientation': 'h',
+            'yanchor': 'bottom',
+            'y': -0.35,
+            'xanchor': 'center',
+            'x': 0.5,
+            'bgcolor': 'rgba(255, 255, 255, 0.9)',
+            'bordercolor': 'rgba(0, 0, 0, 0.2)',
+            'borderwidth': 1,
+            'traceorder': 'normal'
+        },
+    }
+    return go.Figure({'data': traces, 'layout': layout})
+
+
+def keyword_group_bar(trend_data, week_ranges, keywords, title="Keyword Trend"):
+    """
+    키워드별 최근 주차 검색량 그룹형 막대 (인기/실패 검색어 탭의 1~5위, 6~10위 차트)
+
+    trend_data: Week, Keyword, Count (agg_engine.keyword_week_counts)
+    week_ranges: logweek, min, max
+    keywords: 표시할 키워드 (최신 주차 검색량 내림차순으로 정렬, 최신 주차에 없으면 뒤에)
+    """
+    weeks = trend_data['Week'].to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(week_ranges['min']):
+        labels = _week_labels(week_ranges, sep='~')
+    else:
+        labels = {}
+    week_order = sorted(set(weeks.tolist()))
+    labels = {week: labels.get(week, str(week)) for week in week_order}
+
+    # 주차 → 키워드 순 정렬 후 최신 주차 검색량 순으로 키워드 순서 결정
+    order = np.lexsort((trend_data['Keyword'].to_numpy().astype(str), weeks))
+    weeks = weeks[order]
+    keyword_values = trend_data['Keyword'].to_numpy()[order]
+    counts = trend_data['Count'].to_numpy()[order]
+    ordered_keywords = []
+    if len(weeks):
+        latest = weeks == weeks.max()
+        latest_order = np.argsort(-counts[latest], kind='stable')
+        ordered_keywords = keyword_values[latest][latest_order].tolist()
+    ordered_keywords += [kw for kw in keywords if kw not in ordered_keywords]
+
+    sorted_labels = [labels[week] for week in week_order]
+    groups = [
+        (labels[week], keyword_values[weeks == week], counts[weeks == week])
+        for week in week_order
+    ]
+    traces = _grouped_bar(groups, _week_colors(sorted_labels, 0.3))
+
+    layout = {
+        'template': _template('bar'),
+        'barmode': 'group',
+        'font': {'family': "Journey, sans-serif"},
+        'title': {
+            'text': title,
+            'x': 0.5,
+            'xanchor': 'center',
+            'font': {'size': 18, 'weight': 700}
+        },
+        'xaxis': {
+            'anchor': 'y', 'domain': [0.0, 1.0],
+            'categoryorder': 'array', 'categoryarray': ordered_keywords,
+            'title': {'text': "검색어", 'font': {'size': 14}},
+            'tickfont': {'size': 12}
+        },
+        'yaxis': {
+            'anchor': 'x', 'domain': [0.0, 1.0],
+            'title': {'text': "검색량", 'font': {'size': 14}},
+            'tickfont': {'size': 12}
+        },
+        'legend': {
+            'title': {
+                'text': '조회 기간',
+                'font': {'size': 13, 'weight': 600},
+                'side': 'top'  # 제목을 상단에 배치
+            },
+            'orientation': 'v',  # 세로 방향
+            'yanchor': 'middle',
+            'y': 0.5,
+            'xanchor': 'left',
+            'x': 1.02,  # 차트 오른쪽 밖
+            'font': {'size': 12},
+            'itemsizing': 'constant',
+            'tracegroupgap': 8,
+            'bgcolor': 'rgba(255, 255, 255, 0.8)'  # 반투명 배경만 유지
+        },
+        'hovermode': "closest",
+        'height': 420,
+        'margin': {'t': 70, 'b': 80, 'l': 60, 'r': 180}  # 오른쪽 마진 180px, 하단 마진 증가
+    }
+    return go.Figure({'data': traces, 'layout': layout})
+
+
+def daily_line(daily_agg, title='일자별 검색량 추이'):
+    """
+    일자별 검색량 선형 차트
+
+    daily_agg: Date, Count
+    """
+    if daily_agg is None or daily_agg.empty:
+        return None
+    x = _epoch_ms(daily_agg['Date'])
+    y = daily_agg['Count'].to_numpy()
+    if MAX_LINE_POINTS and len(y) > MAX_LINE_POINTS:
+        # [NEW] 긴 기간은 LTTB로 화면에서 구분 가능한 점 수만 전송
+        keep = lttb(x, y, MAX_LINE_POINTS)
+        x, y = x[keep], y[keep]
+    trace = {
+        'type': 'scatter',
+        'x': x,
+        'y': y,
+        'mode': 'lines+markers',
+        'name': '검색량',
+        'line': {'color': '#5E2BB8', 'width': 3, 'shape': 'spline'},
+        'marker': {'size': 8, 'color': '#5E2BB8'},
+        'hovertemplate': '날짜: %{x|%Y/%m/%d}<br>검색량: %{y:,.0f}<extra></extra>'
+    }
+    layout = {
+        'template': _template('scatter'),
+        'font': {'family': "Journey, sans-serif"},
+        'title': {'text': title, 'x': 0.5, 'xanchor': 'center'},
+        'xaxis': {'title': {'text': "날짜"}, 'type': 'date'},  # x는 epoch ms
+        'yaxis': {'title': {'text': "검색량"}, 'rangemode': 'tozero'},  # Y축 0부터 시작
+        'hovermode': "closest",
+        'showlegend': False
+    }
+    return go.Figure({'data': [trace], 'layout': layout})
+
+
+def donut(data_dict, title, color_sequence):
+    """
+    비중 도넛 차트 (경로/로그인/성별/연령)
+
+    data_dict: {항목: 건수} (값 내림차순, agg_engine.pie_counts)
+    """
+    if not data_dict:
+        return None
+    trace = {
+        'type': 'pie',
+        'labels': np.array(list(data_dict.keys()), dtype=object),
+        'values': np.array(list(data_dict.values())),
+        'hole': 0.4,
+        'domain': {'x': [0.0, 1.0], 'y': [0.0, 1.0]},
+        'legendgroup': '',
+        'name': '',
+        'showlegend': True,
+        'textposition': 'inside',
+        'textinfo': 'percent+label',
+        'hovertemplate': "Category=%{label}<br>Count=%{value}<extra></extra>",
+    }
+    layout = {
+        'template': _template('pie'),
+        'piecolorway': list(color_sequence),
+        'legend': {'tracegroupgap': 0},
+        'font': {'family': "Journey, sans-serif"},
+        'title': {'text': title, 'x': 0.5, 'xanchor': "center"},
+        'margin': {'t': 40, 'b': 30, 'l': 10, 'r': 10},  # 하단 여백 증가 (15 → 30)
+        'height': 300,  # 크기 약간 증가 (280 → 300)
+        'showlegend': False,
+        'autosize': True
+    }
+    return go.Figure({'data': [trace], 'layout': layout})
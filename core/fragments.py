@@ -0,0 +1,73 @@
+"""
+프래그먼트 단위 부분 재실행
+
+기존에는 render_charts만 @st.fragment였기 때문에 사이드바 체크박스/날짜, 탭 전환, 키워드 선택 등
+어떤 위젯을 건드려도 스크립트 전체(데이터 로드 확인 → 필터 → 모든 탭)가 다시 실행되었습니다.
+
+- fragment(name): st.fragment + 트레이싱 (부분 재실행이면 '부분 재실행' 루트 span 시작)
+  프래그먼트 안의 위젯은 해당 프래그먼트만 다시 실행 (중첩 프래그먼트도 함께 실행)
+- 프래그먼트 인자는 마지막 전체 실행 때의 값으로 고정 → 대용량 데이터 대신 handles.DataHandle만 넘기고
+  본문에서 캐시 함수/레지스트리로 조회 (필터가 바뀌면 필터 패널이 전체 재실행을 요청해 새 핸들 전달)
+- is_fragment_rerun(): 전체 실행이 아니라 프래그먼트만 다시 실행 중인지
+- st.fragment가 없는 구버전 Streamlit에서는 일반 함수 (기존처럼 전체 재실행)
+
+사용법:
+    @fragments.fragment("인기 검색어")
+    def render_popular_tab(handle):
+        ...
+
+    with tab2:
+        if is_open(tab2):
+            render_popular_tab(handle)
+"""
+
+import functools
+
+import streamlit as st
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # 구버전 Streamlit
+    get_script_run_ctx = None
+
+try:
+    import tracing
+    from tracing import tracer
+except ImportError:  # 루트 app.py에서 core.fragments로 import된 경우
+    from core import tracing
+    from core.tracing import tracer
+
+_st_fragment = getattr(st, 'fragment', None)
+
+
+def is_fragment_rerun():
+    """프래그먼트만 다시 실행 중이면 True (전체 실행 중이거나 판별 불가면 False)"""
+    ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+    return bool(getattr(ctx, 'fragment_ids_this_run', None))
+
+
+def fragment(name):
+    """
+    st.fragment 데코레이터 + 부분 재실행 트레이싱
+
+    전체 실행 중에는 기존 '재실행' 루트 span 아래에서 그대로 실행하고,
+    부분 재실행으로 바깥쪽 프래그먼트가 직접 호출되면 '부분 재실행' 루트 span(fragment=name)을 시작합니다.
+
+    Args:
+        name: 트레이스에 기록할 프래그먼트 이름
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            if tracer.current() is not tracing.NOOP_SPAN or not is_fragment_rerun():
+                return func(*args, **kwargs)
+            # 부분 재실행은 스크립트 상단(세션 설정 + 루트 span)을 거치지 않음
+            ctx = get_script_run_ctx()
+            tracing.set_session(ctx.session_id if ctx else None)
+            with tracer.span("부분 재실행", root=True, fragment=name):
+                return func(*args, **kwargs)
+
+        if _st_fragment is None:
+            return func
+        return _st_fragment(traced)
+    return decorator
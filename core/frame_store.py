@@ -0,0 +1,167 @@
+"""
+대용량 불변 결과용 zero-copy 캐시 계층
+
+st.cache_data는 히트마다 결과를 unpickle하여 전체 사본을 만듭니다.
+(수백만 행 DataFrame → 히트당 수 초 + 메모리 2배)
+cache_frame은 결과를 st.cache_resource 공유 저장소에 한 번만 보관하고,
+히트 시 얕은 뷰(df.copy(deep=False))만 반환합니다.
+
+- Copy-on-Write가 켜져 있으므로 호출자가 뷰를 수정해도 저장된 원본은 바뀌지 않습니다.
+  (pandas 3은 기본값, pandas 2는 앱 시작 시 활성화 - 이 모듈은 프로세스 전역 옵션을 바꾸지 않음)
+  Copy-on-Write가 꺼진 pandas 2 프로세스에서는 뷰 대신 사본을 반환 (원본 보호 우선)
+- dict/list/tuple 결과는 컨테이너만 새로 만들고 내부 DataFrame/Series는 뷰로 반환합니다.
+  (VIEW_DEPTH 단계까지, 예: {키워드: {'weekly': DataFrame, 'daily': dict}})
+- 세션 간 공유되므로 세션별 데이터(st.session_state에서 읽은 값)는 인자에 반영되어야 합니다.
+
+[NEW] cache_handle: 인자가 작은 핸들(handles.DataHandle, 키워드 id)뿐인 함수용 프로세스 내 캐시
+- Streamlit 해셔를 거치지 않고 인자 튜플을 그대로 dict 키로 사용 → 히트 시 μs 단위
+  (저장소는 compute.Memo, 여기서는 측정 + 뷰 반환만 추가)
+- 결과는 cache_frame과 같은 zero-copy 뷰
+- 스크립트 재실행마다 함수가 다시 정의되어도 같은 이름 + 같은 코드면 저장소를 재사용
+  (st.cache_resource와 같은 방식, 코드가 바뀌면 새 저장소)
+
+사용법:
+    @cache_frame(ttl=3600, show_spinner=False)
+    def get_initial_df():
+        ...
+
+    @cache_handle(ttl=3600)
+    def get_weekly_aggregated(handle, keyword_id):
+        ...
+"""
+
+import functools
+import hashlib
+import threading
+
+import pandas as pd
+import streamlit as st
+
+try:
+    from cache_metrics import metered
+    from compute import Memo
+except ImportError:  # 루트 app.py에서 core.frame_store로 import된 경우
+    from core.cache_metrics import metered
+    from core.compute import Memo
+
+PANDAS_COW_DEFAULT = int(pd.__version__.split('.')[0]) >= 3
+
+
+def copy_on_write():
+    """Copy-on-Write 활성 여부 (pandas 3은 항상, pandas 2는 mode.copy_on_write 옵션)"""
+    return PANDAS_COW_DEFAULT or pd.get_option('mode.copy_on_write') is True
+
+
+def memory_size(value):
+    """저장소에 보관된 결과의 메모리 크기 (pickle 없이 버퍼 크기만 합산)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if hasattr(value, 'nbytes'):  # pyarrow.Table, numpy.ndarray
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(memory_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(memory_size(v) for v in value)
+    return 0
+
+
+# 컨테이너를 새로 만드는 최대 깊이 (그보다 깊은 dict/list는 공유 → 읽기 전용으로 취급)
+VIEW_DEPTH = 2
+
+
+def view(value, depth=VIEW_DEPTH):
+    """저장된 결과의 zero-copy 뷰 (Copy-on-Write가 꺼져 있으면 사본)"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not copy_on_write())
+    if depth <= 0:
+        return value
+    if isinstance(value, dict):
+        return {k: view(v, depth - 1) for k, v in value.items()}
+    if isinstance(value, list):
+        return [view(v, depth - 1) for v in value]
+    if isinstance(value, tuple):
+        items = (view(v, depth - 1) for v in value)
+        return type(value)(*items) if hasattr(value, '_fields') else tuple(items)  # NamedTuple 유지
+    # pyarrow.Table 등 불변 객체는 그대로 공유
+    return value
+
+
+def cache_frame(ttl=None, max_entries=None, **cache_kwargs):
+    """
+    st.cache_data 대체 데코레이터 (대용량 불변 결과 전용)
+
+    Args:
+        ttl: 캐시 유지 시간 (초 또는 timedelta)
+        max_entries: 최대 보관 항목 수
+        **cache_kwargs: st.cache_resource에 그대로 전달 (show_spinner 등)
+    """
+    def decorator(func):
+        stored = metered(
+            st.cache_resource(ttl=ttl, max_entries=max_entries, **cache_kwargs),
+            ttl=ttl,
+            measure_size=memory_size,
+        )(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return view(stored(*args, **kwargs))
+
+        wrapper.clear = stored.clear
+        wrapper.cache_stats = stored.cache_stats
+        return wrapper
+    return decorator
+
+
+# [NEW] 재실행 간 공유되는 cache_handle 저장소 (함수 이름, 코드 지문, 옵션) → 래퍼
+_handle_caches = {}
+_handle_caches_lock = threading.Lock()
+
+
+def _code_digest(func):
+    """함수 코드 지문 (재실행으로 다시 정의된 같은 함수인지 판별, 내부 함수/람다 포함)"""
+    digest = hashlib.sha1()
+    pending = [func.__code__]
+    while pending:
+        code = pending.pop()
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if hasattr(const, 'co_code'):
+                pending.append(const)
+            else:
+                digest.update(repr(const).encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_handle(ttl=None, max_entries=None):
+    """
+    핸들 인자 전용 캐시 데코레이터 (위치 인자만, 모두 해시 가능한 작은 값)
+
+    Args:
+        ttl: 캐시 유지 시간 (초 또는 timedelta)
+        max_entries: 최대 보관 항목 수 (오래 안 쓴 것부터 제거)
+    """
+    def decorator(func):
+        key = (f"{func.__module__}.{func.__qualname__}", _code_digest(func), ttl, max_entries)
+        with _handle_caches_lock:
+            wrapper = _handle_caches.get(key)
+            if wrapper is not None:
+                return wrapper
+
+            stored = metered(
+                lambda f: Memo(f, ttl=ttl, max_entries=max_entries),
+                ttl=ttl,
+                measure_size=memory_size,
+            )(func)
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                return view(stored(*args))
+
+            wrapper.clear = stored.clear
+            wrapper.cache_stats = stored.cache_stats
+            _handle_caches[key] = wrapper
+            return wrapper
+    return decorator
@@ -0,0 +1,141 @@
+"""
+세션별 세대(generation) 토큰 + 협조적 취소
+
+기간/접속 경로를 빠르게 여러 번 바꾸면 재실행마다 load_data_range → preprocess_data와
+사전 계산이 끝까지 실행되었습니다. (결과는 곧 버려지는데 작업 스레드/CPU를 계속 점유)
+
+- begin(): 세션의 새 세대 시작 (필터 결과가 바뀌는 재실행에서 데이터 로드 전에 호출)
+  → 이전 세대 토큰이 무효화되어 그 세대로 예약된 사전 계산 작업이 다음 checkpoint()에서 중단
+- current(): 세션의 최신 세대 토큰 (precompute가 job 예약 시 캡처)
+- checkpoint(): 긴 계산의 단계 사이에서 호출
+  - 작업 스레드: 연결된 세대 토큰이 무효화되었으면 Superseded 발생 → 작업 스레드를 스케줄러에 즉시 반환
+  - 스크립트 스레드: Streamlit에 새 재실행/중지 요청이 대기 중이면 st.* 호출과 같은 방식으로 중단
+    (ScriptRunContext.yield_check를 지원하지 않는 버전에서는 기존처럼 끝까지 실행,
+     여러 세션이 기다리는 공유 캐시 계산 안에서는 중단하지 않음)
+- Streamlit은 이미 로드된 프로세스에서만 조회 (compute/agg_engine을 import해도 Streamlit을 불러오지 않음)
+- 호출 위치: data_loader 전처리 단계, compute/agg_engine의 집계 ↔ 랭킹 후처리 사이,
+  parallel_agg 세그먼트마다, app의 사전 계산 작업(키워드/세그먼트마다, 집계 ↔ Figure/테이블 사이)
+- 중단된 계산은 캐시에 저장되지 않음 (compute.Memo는 대기 중인 다른 요청이 다시 계산)
+
+사용법:
+    generations.begin()                       # 새 필터 요청
+    df = data_loader.preprocess_data(raw)     # 단계마다 generations.checkpoint()
+
+    with generations.bound(job.generation):   # 사전 계산 작업 스레드
+        task()
+"""
+
+import contextlib
+import sys
+import threading
+
+_lock = threading.Lock()
+_latest = {}
+_local = threading.local()
+
+
+class Superseded(Exception):
+    """같은 세션에 더 새로운 세대가 시작되어 현재 작업을 중단"""
+
+
+class Generation:
+    """세션(scope)의 세대 번호 (begin()이 다시 호출되면 이전 번호는 superseded)"""
+
+    __slots__ = ('scope', 'number')
+
+    def __init__(self, scope, number):
+        self.scope = scope
+        self.number = number
+
+    @property
+    def superseded(self):
+        return _latest.get(self.scope, 0) != self.number
+
+    def check(self):
+        """무효화되었으면 Superseded 발생"""
+        if self.superseded:
+            raise Superseded(f"generation {self.number} of {self.scope} superseded")
+
+    def __repr__(self):
+        return f"Generation({self.scope!r}, {self.number})"
+
+
+def _script_run_ctx():
+    """
+    현재 Streamlit 스크립트 실행 컨텍스트 (없으면 None)
+
+    compute/agg_engine이 이 모듈을 import하므로 Streamlit은 이미 로드된 경우에만 조회
+    (배치 작업/API 서버에서 checkpoint()가 Streamlit 런타임을 불러오지 않도록)
+    """
+    if 'streamlit' not in sys.modules:
+        return None
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:  # 구버전 Streamlit
+        return None
+    return get_script_run_ctx(suppress_warning=True)
+
+
+def _in_cached_function():
+    """st.cache_* 함수 계산 중인지 (Streamlit이 로드되지 않았으면 False)"""
+    if 'streamlit' not in sys.modules:
+        return False
+    try:
+        from streamlit.runtime.caching.cache_utils import in_cached_function
+    except ImportError:
+        return False
+    return in_cached_function.get()
+
+
+def session_scope():
+    """현재 Streamlit 세션 ID (없으면 'default')"""
+    ctx = _script_run_ctx()
+    return ctx.session_id if ctx is not None else 'default'
+
+
+def begin(scope=None):
+    """세션의 새 세대 시작 (이전 세대의 작업은 다음 checkpoint()에서 중단)"""
+    scope = scope or session_scope()
+    with _lock:
+        number = _latest[scope] = _latest.get(scope, 0) + 1
+    return Generation(scope, number)
+
+
+def current(scope=None):
+    """세션의 최신 세대 토큰"""
+    scope = scope or session_scope()
+    with _lock:
+        return Generation(scope, _latest.get(scope, 0))
+
+
+@contextlib.contextmanager
+def bound(generation):
+    """현재 (작업) 스레드에 세대 토큰 연결 → checkpoint()가 이 토큰을 확인"""
+    previous = getattr(_local, 'generation', None)
+    _local.generation = generation
+    try:
+        yield generation
+    finally:
+        _local.generation = previous
+
+
+def checkpoint():
+    """
+    긴 계산의 단계 경계 (새 요청이 있으면 여기서 중단)
+
+    Raises:
+        Superseded: 작업 스레드의 세대가 무효화되었을 때
+        (스크립트 스레드에서는 Streamlit의 RerunException/StopException)
+    """
+    generation = getattr(_local, 'generation', None)
+    if generation is not None:
+        generation.check()
+        return
+    # 공유 캐시(cache_frame/st.cache_*) 계산은 다른 세션도 기다리므로 중단하지 않음
+    if _in_cached_function():
+        return
+    # 스크립트 밖(스냅샷 생성, Streamlit 없는 배치 작업 등)에서는 건너뜀
+    ctx = _script_run_ctx()
+    yield_check = getattr(ctx, 'yield_check', None)
+    if yield_check is not None:
+        yield_check()
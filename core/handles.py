@@ -0,0 +1,124 @@
+"""
+캐시 함수용 경량 핸들 + 대용량 입력 레지스트리
+
+st.cache_data는 호출마다 모든 인자를 해시하므로, 사전 계산 dict나 필터링된 데이터를 인자로 넘기면
+해시 비용이 조회 자체보다 커집니다. (밑줄 인자로 해시를 피하면 이번에는 캐시 키에 반영되지 않음)
+여기서는 큰 입력을 레지스트리에 두고, 캐시 함수에는 작은 핸들만 넘깁니다.
+
+- DataHandle(snapshot, data): 스냅샷 id (전체 파티션 지문) + 데이터 지문 (파티션 + 필터 조건 + 스키마 버전)
+- 키워드 id: 스냅샷 어휘(검색량 순위)의 정수 id, "전체"는 ALL_KEYWORDS
+- register(handle, kind, value) / resolve(handle, kind): 핸들 → 세션의 필터링 데이터/집계 원천
+  (약한 참조: 세션 상태가 보유하는 동안만 유지, 레지스트리가 데이터 수명을 늘리지 않음)
+  [UPDATED] 같은 지문을 쓰는 세션이 여럿이면 세션별 값을 모두 약한 참조로 보관 → 살아 있는 값 아무거나 반환
+  (다른 세션의 값으로 덮어쓰면 그 세션이 값을 해제하는 순간 아직 보유 중인 세션의 조회까지 실패)
+- 캐시 함수는 frame_store.cache_handle로 감싸 인자 튜플을 그대로 dict 키로 사용 (히트 수 μs)
+
+사용법:
+    handle = handles.DataHandle(storage_key, fingerprint)
+    handles.register(handle, 'rows', trend_df)
+
+    @cache_handle(ttl=3600)
+    def get_popular_stats(handle):
+        return calculate(handles.resolve(handle, 'rows'))
+"""
+
+import threading
+import weakref
+from typing import NamedTuple
+
+# "전체" 키워드 id
+ALL_KEYWORDS = -1
+ALL_KEYWORDS_LABEL = "전체"
+
+# 보관할 스냅샷 어휘 수 (동기화 직후 이전 스냅샷을 보는 세션용으로 1개 더)
+_MAX_VOCABULARIES = 2
+
+
+class DataHandle(NamedTuple):
+    """캐시 키용 데이터 핸들"""
+    snapshot: str
+    data: str
+
+
+class HandleExpired(LookupError):
+    """핸들의 데이터가 레지스트리에 없음 (세션이 필터를 바꿔 이전 데이터가 해제됨)"""
+
+
+_lock = threading.Lock()
+# (handle, kind) → [weakref.ref, ...] (세션마다 하나, 해제된 참조는 등록/조회 시 정리)
+_entries = {}
+_vocabularies = {}
+
+
+def register(handle, kind, value):
+    """
+    핸들에 대용량 입력 연결 (같은 핸들 = 같은 내용, 이미 등록된 다른 세션의 값은 유지)
+
+    Args:
+        handle: DataHandle
+        kind: 입력 종류 ('rows': 필터링된 데이터, 'source': 집계 원천 등)
+        value: 약한 참조가 가능한 객체 (DataFrame, agg_engine Source)
+    """
+    if value is None:
+        return
+    with _lock:
+        refs = [ref for ref in _entries.get((handle, kind), ()) if ref() is not None]
+        if not any(ref() is value for ref in refs):
+            refs.append(weakref.ref(value))
+        _entries[(handle, kind)] = refs
+
+
+def resolve(handle, kind):
+    """
+    핸들의 입력 조회
+
+    Raises:
+        HandleExpired: 등록된 값이 없을 때 (결과를 캐싱하지 않도록 예외)
+    """
+    with _lock:
+        value = None
+        refs = [ref for ref in _entries.get((handle, kind), ()) if ref() is not None]
+        if refs:
+            _entries[(handle, kind)] = refs
+            value = refs[0]()
+        else:
+            _entries.pop((handle, kind), None)
+    if value is None:
+        raise HandleExpired(f"{kind} for {handle} is no longer registered")
+    return value
+
+
+def register_vocabulary(snapshot, index):
+    """스냅샷의 검색어 어휘 등록 (keyword_index.KeywordIndex)"""
+    with _lock:
+        _vocabularies.pop(snapshot, None)
+        _vocabularies[snapshot] = index
+        while len(_vocabularies) > _MAX_VOCABULARIES:
+            _vocabularies.pop(next(iter(_vocabularies)))
+
+
+def keyword_id(snapshot, keyword):
+    """
+    검색어 → 키워드 id
+
+    어휘에 없는 검색어(빈 문자열 등)는 문자열 그대로 반환 (캐시 키로는 동일하게 동작)
+    """
+    if keyword == ALL_KEYWORDS_LABEL:
+        return ALL_KEYWORDS
+    with _lock:
+        index = _vocabularies.get(snapshot)
+    key_id = index.keyword_id(keyword) if index is not None else None
+    return key_id if key_id is not None else keyword
+
+
+def keyword(snapshot, key_id):
+    """키워드 id → 검색어 ("전체"는 None: 집계 엔진의 전체 조건)"""
+    if key_id == ALL_KEYWORDS:
+        return None
+    if isinstance(key_id, str):
+        return key_id
+    with _lock:
+        index = _vocabularies.get(snapshot)
+    if index is None:
+        raise HandleExpired(f"vocabulary for snapshot {snapshot} is no longer registered")
+    return index.keywords[key_id]
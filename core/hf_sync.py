@@ -0,0 +1,274 @@
+"""
+Hugging Face 데이터셋 샤드 동기화
+
+기존 방식은 큰 parquet 파일 하나를 받아 pandas로 전부 읽은 뒤 data_storage/에 다시 써서
+첫 부팅(Spaces/Render) 때 다운로드 + 디코딩 + 재인코딩 시간이 모두 걸렸습니다.
+여기서는 저장소의 parquet 샤드를 그대로 로컬 저장소에 배치합니다.
+
+- 샤드 목록: 데이터셋 저장소에서 패턴(DASHBOARD_HF_PATTERN, 기본 *.parquet)에 맞는 파일
+- 동시 다운로드: 샤드별로 DASHBOARD_HF_WORKERS개 스레드
+- 이어받기: hf_hub_download가 data_storage/.download/의 미완성 파일에서 이어서 받음
+  (중단 후 다시 실행하면 완료된 샤드는 건너뛰고 나머지만 받음)
+- 검증: 크기 + 체크섬 (LFS 파일은 sha256, 일반 파일은 git blob sha1), 불일치 시 다시 받음
+- 배치: 검증된 파일을 data_storage/<샤드 이름>으로 이동 (같은 파일 시스템 → 복사/재인코딩 없음)
+- 진행 상태: data_storage/.hf_manifest.json (complete가 false면 다음 실행 때 이어서 동기화)
+- [NEW] 증분 동기화: 원격 샤드 목록의 크기/체크섬(etag)을 매니페스트와 비교해
+  새로 생긴 샤드와 바뀐 샤드만 받고, 원격에서 삭제된 샤드는 로컬에서도 삭제
+  (확인은 DASHBOARD_HF_SYNC_INTERVAL초마다 한 번, 매니페스트의 checked_at 기준)
+
+환경 변수:
+    DASHBOARD_HF_PATTERN=*.parquet   받을 샤드 경로 패턴 (fnmatch, 저장소 내 경로 기준)
+    DASHBOARD_HF_WORKERS=4           동시 다운로드 샤드 수
+    DASHBOARD_HF_RETRIES=3           샤드별 시도 횟수
+    DASHBOARD_HF_SYNC_INTERVAL=900   원격 변경 확인 주기 (초, 음수면 첫 동기화 이후 확인하지 않음)
+
+사용법:
+    result = hf_sync.sync('kdragonkorea/search-data', '*.parquet', store_dir='data_storage')
+    result['added'], result['changed'], result['removed']
+"""
+
+import concurrent.futures
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    from lazy_imports import lazy
+except ImportError:  # 루트 app.py에서 core.hf_sync로 import된 경우
+    from core.lazy_imports import lazy
+
+# [NEW] huggingface_hub는 실제로 원격을 확인/다운로드할 때 import (sync_due/is_managed 등 매니페스트 확인에는 불필요)
+huggingface_hub = lazy('huggingface_hub')
+
+HF_WORKERS = int(os.getenv('DASHBOARD_HF_WORKERS', '4'))
+HF_RETRIES = max(1, int(os.getenv('DASHBOARD_HF_RETRIES', '3')))
+SYNC_INTERVAL = int(os.getenv('DASHBOARD_HF_SYNC_INTERVAL', '900'))
+
+MANIFEST_NAME = '.hf_manifest.json'
+STAGING_NAME = '.download'
+
+_CHUNK = 8 * 1024 * 1024
+
+
+def list_shards(repo_id, pattern='*.parquet', token=None):
+    """
+    데이터셋 저장소에서 pattern에 맞는 샤드 목록
+
+    Returns:
+        list[dict]: {'path', 'size', 'sha256' (LFS), 'blob_id' (git blob sha1)}
+    """
+    api = huggingface_hub.HfApi(token=token)
+    shards = []
+    for entry in api.list_repo_tree(repo_id, repo_type='dataset', recursive=True, expand=True):
+        size = getattr(entry, 'size', None)
+        if size is None or not fnmatch.fnmatch(entry.path, pattern):
+            continue  # 폴더 또는 패턴 밖의 파일
+        lfs = getattr(entry, 'lfs', None)
+        shards.append({
+            'path': entry.path,
+            'size': size,
+            'sha256': getattr(lfs, 'sha256', None) if lfs is not None else None,
+            'blob_id': getattr(entry, 'blob_id', None),
+        })
+    return sorted(shards, key=lambda shard: shard['path'])
+
+
+def _local_names(shards):
+    """샤드 → 로컬 파일 이름 (data_storage/*.parquet 평면 구조, 이름이 겹치면 경로로 구분)"""
+    basenames = [os.path.basename(shard['path']) for shard in shards]
+    return {
+        shard['path']: name if basenames.count(name) == 1 else shard['path'].replace('/', '_')
+        for shard, name in zip(shards, basenames)
+    }
+
+
+def _checksum(path, shard):
+    """샤드 메타데이터와 같은 방식의 체크섬 (LFS: sha256, 일반 파일: git blob sha1)"""
+    if shard.get('sha256'):
+        digest = hashlib.sha256()
+    else:
+        digest = hashlib.sha1()
+        digest.update(f"blob {os.path.getsize(path)}\0".encode())
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify(path, shard):
+    """크기/체크섬 검증 (체크섬 정보가 없으면 크기만)"""
+    if not os.path.exists(path) or os.path.getsize(path) != shard['size']:
+        return False
+    expected = shard.get('sha256') or shard.get('blob_id')
+    return expected is None or _checksum(path, shard) == expected
+
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_managed(store_dir):
+    """store_dir이 Hugging Face 동기화로 관리되는지 (매니페스트 존재 여부)"""
+    return _read_manifest(store_dir) is not None
+
+
+def sync_pending(store_dir):
+    """이전 동기화가 중단되어 이어받을 샤드가 남았는지"""
+    manifest = _read_manifest(store_dir)
+    return manifest is not None and not manifest.get('complete', False)
+
+
+# [NEW] 증분 동기화 주기 확인
+def sync_due(store_dir, interval=SYNC_INTERVAL):
+    """
+    원격 변경을 다시 확인할 때가 되었는지
+
+    중단된 동기화는 항상 True, 마지막 확인(checked_at) 후 interval초가 지나면 True
+    """
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        return False
+    if not manifest.get('complete', False):
+        return True
+    if interval < 0:
+        return False
+    return time.time() - manifest.get('checked_at', 0) >= interval
+
+
+def _download_shard(repo_id, shard, target, staging_dir, token):
+    """샤드 1개 다운로드 → 검증 → 저장소로 이동 (검증 실패 시 새로 받아 재시도)"""
+    for attempt in range(HF_RETRIES):
+        try:
+            # local_dir의 미완성 파일이 있으면 이어서 받음 (재시도 시에는 처음부터)
+            downloaded = huggingface_hub.hf_hub_download(
+                repo_id=repo_id,
+                filename=shard['path'],
+                repo_type='dataset',
+                token=token,
+                local_dir=staging_dir,
+                force_download=attempt > 0,
+            )
+        except Exception as e:
+            print(f"✗ Download failed ({shard['path']}, attempt {attempt + 1}/{HF_RETRIES}): {e}")
+            time.sleep(min(2 ** attempt, 10))
+            continue
+        if verify(downloaded, shard):
+            os.replace(downloaded, target)
+            return target
+        print(f"✗ Checksum mismatch ({shard['path']}, attempt {attempt + 1}/{HF_RETRIES})")
+        os.remove(downloaded)
+    raise IOError(f"{shard['path']}: {HF_RETRIES}회 시도 후에도 검증된 파일을 받지 못했습니다.")
+
+
+def sync(repo_id, pattern='*.parquet', token=None, store_dir='data_storage', workers=HF_WORKERS):
+    """
+    저장소의 샤드를 store_dir에 동기화 (이미 검증된 샤드는 건너뜀)
+
+    [UPDATED] 원격 목록과 매니페스트를 비교해 새 샤드/바뀐 샤드만 받고,
+    원격에서 사라진 샤드는 로컬 파일도 삭제 (매니페스트에 기록된 샤드만, 직접 넣은 파일은 유지)
+
+    Returns:
+        dict: paths(로컬 샤드 경로, 실패 제외), added/changed/removed/failed(로컬 파일 이름 목록)
+
+    Raises:
+        ValueError: 패턴에 맞는 샤드가 없을 때
+    """
+    started = time.time()
+    os.makedirs(store_dir, exist_ok=True)
+    staging_dir = os.path.join(store_dir, STAGING_NAME)
+
+    shards = list_shards(repo_id, pattern, token)
+    if not shards:
+        raise ValueError(f"{repo_id}: '{pattern}'에 맞는 샤드가 없습니다.")
+    names = _local_names(shards)
+
+    previous = _read_manifest(store_dir) or {}
+    done = previous.get('shards', {}) if previous.get('repo_id') == repo_id else {}
+    manifest = {
+        'repo_id': repo_id, 'pattern': pattern, 'complete': False,
+        'checked_at': time.time(), 'shards': {},
+    }
+    pending = []
+    added, changed = [], []
+    for shard in shards:
+        name = names[shard['path']]
+        target = os.path.join(store_dir, name)
+        # 이전 실행에서 검증을 마친 샤드는 크기만 확인 (체크섬 재계산 생략)
+        recorded = done.get(name)
+        if recorded == shard and os.path.exists(target) and os.path.getsize(target) == shard['size']:
+            manifest['shards'][name] = shard
+            continue
+        pending.append((name, shard, target))
+        (changed if recorded is not None else added).append(name)
+
+    # 원격에서 삭제된 샤드 (매니페스트에 기록된 것만 삭제)
+    removed = [name for name in done if name not in manifest['shards'] and name not in names.values()]
+    for name in removed:
+        try:
+            os.remove(os.path.join(store_dir, name))
+        except FileNotFoundError:
+            pass
+    _write_manifest(store_dir, manifest)
+
+    if not pending and not removed:
+        manifest['complete'] = True
+        _write_manifest(store_dir, manifest)
+        print(f"✓ Hugging Face shards up to date ({len(shards)} shard(s))")
+        return {'paths': [os.path.join(store_dir, name) for name in manifest['shards']],
+                'added': [], 'changed': [], 'removed': [], 'failed': []}
+
+    print(f"Syncing {len(pending)}/{len(shards)} shard(s) from {repo_id} ({workers} workers, "
+          f"{len(added)} new, {len(changed)} changed, {len(removed)} removed)...")
+    lock = threading.Lock()
+    failed = []
+
+    def fetch(name, shard, target):
+        _download_shard(repo_id, shard, target, staging_dir, token)
+        with lock:
+            manifest['shards'][name] = shard
+            _write_manifest(store_dir, manifest)
+        print(f"✓ Shard ready: {name} ({shard['size'] / (1024*1024):.1f}MB)")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='hf-sync') as pool:
+        futures = {pool.submit(fetch, *job): job[0] for job in pending}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                name = futures[future]
+                failed.append(name)
+                print(f"✗ Shard failed: {name}: {e}")
+                # 바뀐 샤드를 못 받았으면 이전 버전을 계속 사용 (다음 실행 때 다시 비교)
+                if name in done and os.path.exists(os.path.join(store_dir, name)):
+                    with lock:
+                        manifest['shards'][name] = done[name]
+                        _write_manifest(store_dir, manifest)
+
+    if not failed:
+        manifest['complete'] = True
+        _write_manifest(store_dir, manifest)
+        print(f"✓ Hugging Face sync complete: {len(shards)} shard(s), {time.time() - started:.1f}s")
+    else:
+        print(f"⚠ Hugging Face sync incomplete: {len(failed)} shard(s) failed (will resume on next start)")
+    return {
+        'paths': [os.path.join(store_dir, name) for name in manifest['shards']],
+        'added': [name for name in added if name not in failed],
+        'changed': [name for name in changed if name not in failed],
+        'removed': removed,
+        'failed': failed,
+    }
@@ -0,0 +1,160 @@
+"""
+HyperLogLog 고유 개수 스케치
+
+실패 검색어의 (logweek, sessionid, search_keyword) 고유 조합 수처럼 고유 세션 수를 세는 지표는
+drop_duplicates/nunique로 모든 행을 해시해야 합니다.
+스케치는 그룹마다 2^p개 레지스터(해시 앞 p비트 = 레지스터 번호, 나머지 비트의 선행 0 개수 + 1 = rho)의
+최댓값만 보관하므로, 미리 집계해 두고 합집합(레지스터별 MAX)으로 주차/접속 경로를 자유롭게 합칠 수 있습니다.
+
+- 저장 형식: 희소 레지스터 테이블 (그룹 키..., reg, rho) - 값이 있는 레지스터만 행으로 보관
+  (긴 꼬리 검색어는 세션 수만큼의 행만 차지, 큰 그룹도 최대 2^p행)
+- 추정: 표준 HLL 추정식 + 작은 값은 선형 계수(linear counting)
+- 오차: 상대 표준오차 1.04 / sqrt(2^p) (기본 p=14 → 약 0.8%)
+- 저장 형식(압축): 레지스터마다 정수 하나 (reg << 6 | rho)의 리스트
+  → search_aggregated의 uidx_sketch/session_sketch (INTEGER[]) 컬럼, supabase_schema.sql의 hll_* 함수와 동일
+
+환경 변수:
+    DASHBOARD_HLL_PRECISION=14    레지스터 비트 수 p (4~16)
+
+사용법:
+    sql = hll.sketch_sql("failed", ['logweek', 'search_keyword'], 'sessionid')
+    registers = conn.execute(sql).df()
+    counts = hll.estimate(hll.merge(registers, ['search_keyword']), ['search_keyword'])
+
+    # 압축 스케치 컬럼 (행마다 정수 리스트)의 합집합 추정
+    weekly_users = hll.union_estimate(aggregated_df, ['logweek', 'search_keyword'], column='uidx_sketch')
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+PRECISION = min(16, max(4, int(os.getenv('DASHBOARD_HLL_PRECISION', '14'))))
+# 압축 형식의 rho 비트 수 (rho ≤ 64 - p + 1 < 2^6)
+RHO_BITS = 6
+
+
+def relative_error(precision=PRECISION):
+    """상대 표준오차 (1σ)"""
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+def sketch_sql(relation, keys, value, precision=PRECISION):
+    """
+    relation의 value를 keys별 희소 레지스터 테이블로 집계하는 DuckDB SQL
+
+    Args:
+        relation: 테이블/뷰 이름 또는 괄호로 감싼 서브쿼리
+        keys: 그룹 키 컬럼 목록
+        value: 고유 개수를 셀 컬럼 (NULL도 하나의 값으로 취급 → SELECT DISTINCT와 동일)
+        precision: 레지스터 비트 수 p
+
+    Returns:
+        str: (keys..., reg, rho)를 반환하는 SQL
+    """
+    bits = 64 - precision
+    mask = (1 << bits) - 1
+    key_list = ', '.join(keys)
+    # rho = 나머지 bits비트의 선행 0 개수 + 1
+    # floor(log2(x))는 2^k - 1 근처에서 k로 반올림될 수 있어 시프트로 한 번 보정
+    return f'''
+        SELECT {key_list}, reg,
+               MAX(CASE WHEN rem = 0 THEN {bits + 1}
+                        ELSE {bits} - (msb - CASE WHEN (rem >> msb) = 0 THEN 1 ELSE 0 END) END) AS rho
+        FROM (
+            SELECT {key_list}, h >> {bits} AS reg, h & {mask} AS rem,
+                   CAST(floor(log2(greatest(h & {mask}, 1))) AS INTEGER) AS msb
+            FROM (SELECT {key_list}, hash({value}) AS h FROM {relation})
+        )
+        GROUP BY ALL
+    '''
+
+
+def merge(registers, keys):
+    """
+    스케치 합집합 (keys에 없는 차원은 합쳐짐, 예: 접속 경로/주차)
+
+    Args:
+        registers: (그룹 키..., reg, rho) 테이블
+        keys: 남길 그룹 키 목록
+
+    Returns:
+        DataFrame: (keys..., reg, rho)
+    """
+    keys = list(keys)
+    return registers.groupby(keys + ['reg'], sort=False, dropna=False)['rho'].max().reset_index()
+
+
+def estimate(registers, keys, precision=PRECISION):
+    """
+    그룹별 고유 개수 추정
+
+    Args:
+        registers: merge()된 (keys..., reg, rho) 테이블 (그룹 내 reg 중복 없음)
+        keys: 그룹 키 목록
+
+    Returns:
+        DataFrame: (keys..., estimate) - 추정치는 실수
+    """
+    keys = list(keys)
+    m = 2 ** precision
+    if registers.empty:
+        return pd.DataFrame(columns=keys + ['estimate'])
+
+    inverse = np.exp2(-registers['rho'].to_numpy(dtype='float64'))
+    grouped = registers[keys].assign(inverse=inverse, filled=1).groupby(keys, sort=False, dropna=False)
+    stats = grouped[['inverse', 'filled']].sum().reset_index()
+
+    zeros = m - stats['filled'].to_numpy(dtype='float64')
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / (stats['inverse'].to_numpy() + zeros)
+    # 작은 값은 선형 계수 (빈 레지스터 비율 기반)가 더 정확
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.where(zeros > 0, zeros, 1))
+    stats['estimate'] = np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+    return stats[keys + ['estimate']]
+
+
+def packed_sketch_sql(relation, keys, value, precision=PRECISION):
+    """
+    keys별 스케치를 압축 정수 리스트 한 컬럼(sketch)으로 만드는 DuckDB SQL
+
+    COUNT(DISTINCT value)와 같이 value가 NULL인 행은 제외합니다.
+    (value가 모두 NULL인 그룹은 결과에 없음 → 빈 스케치로 취급)
+    """
+    key_list = ', '.join(keys)
+    registers = sketch_sql(f"(SELECT * FROM {relation} WHERE {value} IS NOT NULL)", keys, value, precision)
+    return f'''
+        SELECT {key_list}, list(CAST((reg << {RHO_BITS}) | rho AS INTEGER) ORDER BY reg) AS sketch
+        FROM ({registers})
+        GROUP BY ALL
+    '''
+
+
+def unpack(sketches, keys, column='sketch'):
+    """
+    압축 스케치 컬럼을 (keys..., reg, rho) 레지스터 테이블로 펼침
+
+    Args:
+        sketches: keys와 column(정수 리스트, 비었거나 NULL 가능)을 가진 DataFrame
+    """
+    keys = list(keys)
+    exploded = sketches[keys + [column]].explode(column).dropna(subset=[column])
+    packed = exploded[column].to_numpy(dtype='int64')
+    return exploded[keys].assign(
+        reg=packed >> RHO_BITS,
+        rho=packed & ((1 << RHO_BITS) - 1),
+    ).reset_index(drop=True)
+
+
+def union_estimate(sketches, keys, column='sketch', precision=PRECISION):
+    """
+    압축 스케치를 keys별로 합친 고유 개수 추정
+
+    여러 그룹에 걸친 사용자도 한 번만 세므로, 그룹별 고유 수의 합(SUM(uidx_count))과 달리 중복 집계가 없습니다.
+
+    Returns:
+        DataFrame: (keys..., estimate) - 스케치가 모두 빈 그룹은 제외
+    """
+    return estimate(merge(unpack(sketches, keys, column), keys), keys, precision)
@@ -0,0 +1,128 @@
+"""
+무거운 모듈 지연 import + import 시간 측정
+
+워커가 시작될 때마다 wordcloud, matplotlib, plotly.express, huggingface_hub, supabase 등을
+모두 import하지만, 대부분의 재실행은 그중 일부만 사용합니다.
+(워드클라우드는 실패 검색어 탭, Hugging Face는 동기화 시점에만 필요)
+
+- lazy(name): 첫 속성 접근 시 import되는 모듈 프록시 (import 구문 대신 모듈 상단에 선언)
+  첫 로드는 현재 재실행의 span("지연 import")으로 기록되어 어느 화면이 비용을 냈는지 추적 가능
+- load_times(): 프로세스에서 지연 로드된 모듈과 소요 시간
+- audit(modules): 모듈별 콜드 import 시간 측정 (모듈마다 새 프로세스에서 python -X importtime)
+  scripts/import_audit.py가 표/JSON으로 출력 → 벤치마크 결과와 함께 추적
+
+사용법:
+    from lazy_imports import lazy
+    wordcloud = lazy('wordcloud')
+
+    def render():
+        return wordcloud.WordCloud(width=600)  # 여기서 처음 import
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+try:
+    from tracing import tracer
+except ImportError:  # 루트 app.py에서 core.lazy_imports로 import된 경우
+    from core.tracing import tracer
+
+# 시작 비용 점검 대상 (앱이 직접 또는 requirements로 끌어오는 외부 패키지)
+HEAVY_MODULES = (
+    'streamlit', 'pandas', 'numpy', 'pyarrow', 'duckdb',
+    'plotly.express', 'plotly.graph_objects', 'matplotlib.pyplot', 'wordcloud',
+    'huggingface_hub', 'supabase', 'statsmodels', 'datasets',
+)
+
+_load_times = {}
+
+
+class LazyModule:
+    """첫 속성 접근 시 import되는 모듈 프록시 (이미 import된 모듈이면 측정 없이 바로 연결)"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            if self._name in sys.modules:
+                module = sys.modules[self._name]
+            else:
+                started = time.perf_counter()
+                with tracer.span("지연 import", module=self._name):
+                    module = importlib.import_module(self._name)
+                elapsed = time.perf_counter() - started
+                _load_times[self._name] = elapsed
+                print(f"✓ Lazy import: {self._name} ({elapsed:.2f}s)")
+            self._module = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy(name):
+    """모듈 지연 import (ModuleNotFoundError는 첫 사용 시점에 발생)"""
+    return LazyModule(name)
+
+
+def load_times():
+    """이 프로세스에서 지연 로드된 모듈 → 초"""
+    return dict(_load_times)
+
+
+def _parse_importtime(stderr, module):
+    """-X importtime 출력에서 module의 (self, cumulative) 마이크로초"""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            try:
+                return int(parts[0]), int(parts[1])
+            except ValueError:
+                return None  # 헤더 줄
+    return None
+
+
+def audit(modules=HEAVY_MODULES, python=sys.executable, path=None):
+    """
+    모듈별 콜드 import 시간 (모듈마다 새 프로세스, 공유 의존성도 각자 다시 import)
+
+    Args:
+        modules: 측정할 모듈 이름 목록
+        python: 측정에 사용할 인터프리터
+        path: 프로젝트 모듈 경로 (예: core/, 같은 이름의 루트 모듈보다 우선하도록 작업 폴더로 사용)
+
+    Returns:
+        list[dict]: module, imported, self_ms, cumulative_ms, wall_ms (cumulative 내림차순)
+    """
+    env = dict(os.environ)
+    if path:
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [path, env.get('PYTHONPATH')]))
+    results = []
+    for module in modules:
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [python, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True, text=True, env=env, cwd=path,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        parsed = _parse_importtime(proc.stderr, module) if proc.returncode == 0 else None
+        results.append({
+            'module': module,
+            'imported': parsed is not None,
+            'self_ms': round(parsed[0] / 1000, 1) if parsed else None,
+            'cumulative_ms': round(parsed[1] / 1000, 1) if parsed else None,
+            'wall_ms': round(wall_ms, 1),
+        })
+    return sorted(results, key=lambda r: -(r['cumulative_ms'] or 0))
@@ -0,0 +1,31 @@
+"""
+지연 탭 (활성 탭만 계산)
+
+st.tabs는 기본적으로 다섯 개 탭 본문을 매 재실행마다 모두 실행합니다.
+(키워드 하나만 바꿔도 보이지 않는 실패 검색어/연령별 랭킹까지 재계산)
+
+- lazy_tabs(): on_change="rerun"으로 선택 탭을 추적 → tab.open이 True인 탭만 본문 실행
+- is_open(): 탭 상태 추적을 지원하지 않는 Streamlit 버전에서는 항상 True (기존 동작 유지)
+- 나머지 탭의 데이터는 첫 화면 출력 후 precompute 스케줄러가 백그라운드에서 미리 계산
+
+사용법:
+    tab1, tab2 = lazy_tabs(["주간 트렌드", "인기 검색어"], key="active_tab")
+    with tab1:
+        if is_open(tab1):
+            ...
+"""
+
+import streamlit as st
+
+
+def lazy_tabs(labels, key):
+    """선택 탭만 실행되는 st.tabs (지원하지 않는 버전에서는 일반 st.tabs)"""
+    try:
+        return st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
+
+
+def is_open(tab):
+    """현재 선택된 탭인지 여부 (상태 추적 불가 시 True)"""
+    return getattr(tab, 'open', None) is not False
@@ -0,0 +1,143 @@
+"""
+DuckDB 멀티스레드 그룹 집계
+
+속성별/연령별 탭의 세그먼트 루프와 precompute_all_keyword_aggregations의 키워드 루프는
+세그먼트(키워드)마다 전체 행에 마스크를 거는 단일 스레드 pandas 연산입니다. (O(행 수 × 세그먼트 수))
+여기서는 모든 세그먼트를 한 번의 GROUP BY로 집계하고, 랭킹 후처리만 pandas로 수행합니다.
+
+- 입력 DataFrame은 복사하지 않고 DuckDB가 컬럼 버퍼를 직접 스캔 (Arrow/NumPy 메모리 공유)
+- 스캔/집계는 행 그룹 단위로 DASHBOARD_AGG_THREADS개 스레드에 분산 (기본: CPU 코어 수)
+- 세그먼트(키워드 집계 후처리) 사이마다 generations.checkpoint() → 새 필터 요청이 오면 중단
+- 결과는 직렬 경로와 동일: 같은 집계 규칙(NULL 키 제외, COUNT는 NULL 제외)과
+  같은 후처리(compute.rank_weekly_keyword_counts)를 사용
+
+환경 변수:
+    DASHBOARD_PARALLEL_AGG=0|1     병렬 집계 사용 (기본 1, 0이면 기존 pandas 루프)
+    DASHBOARD_AGG_THREADS=16       DuckDB 스레드 수 (agg_engine과 공유)
+
+사용법:
+    stats_by_type = parallel_agg.segment_popular_stats(df, 'search_type', ['package', 'hotel'])
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import compute
+import generations
+from agg_engine import FrameSource, as_source
+
+PARALLEL_AGG = os.getenv('DASHBOARD_PARALLEL_AGG', '1') != '0'
+
+
+def _connect(df):
+    """df를 src로 등록한 DuckDB 연결 (agg_engine.FrameSource와 같은 등록 방식/스레드 설정)"""
+    return FrameSource(df).connect()
+
+
+def _serial_segment_popular_stats(df, column, values):
+    result = {}
+    for value in values:
+        generations.checkpoint()
+        result[value] = compute.calculate_popular_keywords_stats(df[df[column] == value])
+    return result
+
+
+def segment_popular_stats(df, column, values):
+    """
+    세그먼트별 인기 검색어 랭킹 (한 번의 병렬 집계)
+
+    calculate_popular_keywords_stats(df[df[column] == value])를 value마다 호출한 결과와 동일합니다.
+
+    Args:
+        df: 원본 데이터 또는 agg_engine Source (search_keyword, logweek, sessionid, column 필요)
+        column: 세그먼트 컬럼 (search_type, age 등)
+        values: 세그먼트 값 목록
+
+    Returns:
+        dict: {value: 랭킹 DataFrame 또는 None}
+    """
+    values = list(values)
+    required = list(dict.fromkeys(['search_keyword', 'logweek', 'sessionid', column]))
+    # [NEW] 스트리밍 모드의 Source는 행을 메모리에 올리지 않고 원천에서 바로 집계
+    is_frame = isinstance(df, pd.DataFrame)
+    if is_frame and (not PARALLEL_AGG or any(col not in df.columns for col in required)):
+        return _serial_segment_popular_stats(df, column, values)
+    if not is_frame and any(col not in as_source(df).columns for col in required):
+        return {value: None for value in values}
+
+    # 세그먼트 × 주차 × 검색어 집계 (pandas groupby().count()와 같은 규칙)
+    # 검색어가 비어 있는 그룹도 남겨 세그먼트별 주차 목록(직렬 경로의 weeks)을 같은 스캔에서 구함
+    conn = _connect(df[required]) if is_frame else as_source(df).connect(required)
+    try:
+        grouped = conn.execute(f'''
+            SELECT "{column}" AS seg, logweek, search_keyword AS keyword, COUNT(sessionid) AS count
+            FROM src
+            WHERE "{column}" IN (SELECT UNNEST(?)) AND logweek IS NOT NULL
+            GROUP BY ALL
+        ''', [values]).df()
+    finally:
+        conn.close()
+
+    keyword_dtype = df['search_keyword'].dtype if is_frame else grouped['keyword'].dtype
+    result = {}
+    groups = dict(tuple(grouped.groupby('seg')))
+    for value in values:
+        generations.checkpoint()
+        group = groups.get(value)
+        if group is None:
+            result[value] = None
+            continue
+        weeks = sorted(group['logweek'].unique().tolist())
+        weekly_stats = group.loc[group['keyword'].notna(), ['logweek', 'keyword', 'count']]
+        # groupby 결과와 같은 정렬/인덱스/dtype
+        weekly_stats = weekly_stats.sort_values(['logweek', 'keyword']).reset_index(drop=True)
+        weekly_stats['keyword'] = weekly_stats['keyword'].astype(keyword_dtype)
+        result[value] = compute.rank_weekly_keyword_counts(weekly_stats, weeks)
+    return result
+
+
+def keyword_daily_counts(df):
+    """
+    키워드별 일자 집계 (precompute_all_keyword_aggregations의 키워드 루프 대체)
+
+    Returns:
+        dict: {keyword: {'daily': {Timestamp: count}, 'count': 행 수}}
+        (키워드 순서는 df['search_keyword'].unique() 순서, 빈 키워드 제외)
+    """
+    conn = _connect(df[['search_keyword', 'search_date', 'sessionid']])
+    try:
+        # 날짜가 비어 있는 행도 행 수(count)에는 포함되므로 함께 집계
+        grouped = conn.execute('''
+            SELECT search_keyword AS keyword, search_date AS date,
+                   COUNT(sessionid) AS count, COUNT(*) AS rows
+            FROM src
+            WHERE search_keyword IS NOT NULL
+            GROUP BY ALL
+            ORDER BY keyword, date
+        ''').df()
+    finally:
+        conn.close()
+
+    generations.checkpoint()
+    rows_by_keyword = grouped.groupby('keyword', sort=False)['rows'].sum().to_dict()
+    daily = grouped[grouped['date'].notna()]
+    keywords = daily['keyword'].to_numpy()
+    dates = list(pd.DatetimeIndex(daily['date']))
+    counts = daily['count'].tolist()
+    # 정렬된 결과를 키워드 경계에서 잘라 dict 생성
+    bounds = np.concatenate([[0], np.flatnonzero(keywords[1:] != keywords[:-1]) + 1, [len(keywords)]])
+    daily_by_keyword = {
+        keywords[start]: dict(zip(dates[start:end], counts[start:end]))
+        for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+    }
+
+    result = {}
+    for keyword in df['search_keyword'].unique():
+        if isinstance(keyword, str) and keyword.strip():  # 빈 키워드 제외
+            result[keyword] = {
+                'daily': daily_by_keyword.get(keyword, {}),
+                'count': int(rows_by_keyword[keyword]),
+            }
+    return result
@@ -0,0 +1,198 @@
+"""
+백그라운드 사전 계산 스케줄러
+
+첫 화면 출력 후 사용자가 다음에 볼 가능성이 높은 결과를 스레드 풀에서 미리 계산합니다.
+(속성별/연령별 랭킹, 실패 검색어 통계, Top 20 키워드의 일자별 추이/파이 차트 집계)
+
+- 결과는 각 작업이 호출하는 캐시 함수(st.cache_data / cache_frame)의 공유 캐시에 저장
+- 세션(scope)마다 작업 묶음(job)은 하나만 유지: 필터가 바뀌어 다른 이름의 job이 예약되면
+  이전 job은 취소되어 대기 중인 작업은 건너뛰고, 긴 작업은 cancelled()로 중간에 종료
+- [NEW] job은 예약 시점의 세션 세대(generations)에 묶임: 새 필터 요청이 begin()을 호출하면
+  새 job 예약을 기다리지 않고 바로 취소 (진행 중인 작업은 generations.checkpoint()에서 중단 → 스레드 반환)
+- 작업 스레드에 세션의 ScriptRunContext를 연결 → st.session_state를 읽는 캐시 함수도 동작
+
+환경 변수:
+    DASHBOARD_PRECOMPUTE=0|1          사전 계산 활성화 (기본 1)
+    DASHBOARD_PRECOMPUTE_WORKERS=4    스레드 풀 크기
+
+사용법:
+    precompute.schedule(f"filters:{fingerprint}", [
+        ("속성별 랭킹", lambda: get_popular_stats(fingerprint, df, 'search_type', 'hotel')),
+        ...
+    ])
+"""
+
+import concurrent.futures
+import os
+import threading
+import time
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # 구버전 Streamlit
+    add_script_run_ctx = get_script_run_ctx = None
+
+try:
+    from tracing import tracer
+    import generations
+    from generations import session_scope
+except ImportError:  # 루트 app.py에서 core.precompute로 import된 경우
+    from core.tracing import tracer
+    from core import generations
+    from core.generations import session_scope
+
+_local = threading.local()
+
+
+class PrecomputeJob:
+    """한 세션의 사전 계산 작업 묶음"""
+
+    def __init__(self, scope, name, total, generation=None):
+        self.scope = scope
+        self.name = name
+        # [NEW] 예약 시점의 세션 세대 (새 세대가 시작되면 취소된 것으로 취급)
+        self.generation = generation
+        # 작업 callable은 보관하지 않음 (완료 후 데이터프레임 참조가 남지 않도록)
+        self.total = total
+        self.created_at = time.time()
+        self.completed = 0
+        self.skipped = 0
+        self.failed = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set() or (self.generation is not None and self.generation.superseded)
+
+    @property
+    def finished(self):
+        return self.completed + self.skipped + self.failed >= self.total
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+def cancelled():
+    """현재 작업 스레드의 job이 취소되었는지 (작업 내부 반복문에서 확인)"""
+    job = getattr(_local, 'job', None)
+    return job is not None and job.cancelled
+
+
+class PrecomputeScheduler:
+    def __init__(self, max_workers=None, enabled=True):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.enabled = enabled
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_workers=int(os.getenv('DASHBOARD_PRECOMPUTE_WORKERS', '0')) or None,
+            enabled=os.getenv('DASHBOARD_PRECOMPUTE', '1') != '0',
+        )
+
+    def _pool(self):
+        # 첫 예약 시점에 생성 (import만으로 스레드를 띄우지 않음)
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='precompute'
+            )
+        return self._executor
+
+    def schedule(self, scope, name, tasks):
+        """
+        scope의 사전 계산 job 예약 (같은 이름이 진행 중이면 무시, 다른 이름이면 이전 job 취소)
+
+        Args:
+            scope: job 단위 (보통 세션 ID)
+            name: job 이름 (필터 상태를 담은 데이터 식별자 포함)
+            tasks: (라벨, 인자 없는 callable) 목록, 앞에서부터 우선 실행
+
+        Returns:
+            PrecomputeJob | None: 새로 예약된 job
+        """
+        if not self.enabled or not tasks:
+            return None
+        ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+        with self._lock:
+            current = self._jobs.get(scope)
+            if current is not None and current.name == name and not current.cancelled:
+                return None
+            if current is not None:
+                current.cancel()
+            job = self._jobs[scope] = PrecomputeJob(scope, name, len(tasks), generations.current(scope))
+            pool = self._pool()
+            for label, task in tasks:
+                pool.submit(self._run, job, label, task, ctx)
+        return job
+
+    def cancel(self, scope):
+        """scope의 진행 중인 job 취소"""
+        with self._lock:
+            job = self._jobs.pop(scope, None)
+        if job is not None:
+            job.cancel()
+
+    def _run(self, job, label, task, ctx):
+        if job.cancelled:
+            job._count('skipped')
+            return
+        if add_script_run_ctx is not None and ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        _local.job = job
+        try:
+            # [UPDATED] 작업 스레드에 job의 세대 연결 → 작업 내부 checkpoint()에서 중단 가능
+            with tracer.span("사전 계산", root=True, job=job.name, task=label), generations.bound(job.generation):
+                task()
+            job._count('completed')
+        except generations.Superseded:
+            # 새 필터 요청으로 중단된 작업 (결과는 캐시에 남지 않음)
+            job._count('skipped')
+        except Exception as e:
+            # 사전 계산 실패는 무시 (화면을 열 때 포그라운드에서 다시 계산)
+            job._count('failed')
+            print(f"✗ Precompute task failed ({label}): {e}")
+        finally:
+            _local.job = None
+            if job.finished and not job.cancelled:
+                print(f"✓ Precompute done: {job.name} ({job.completed}/{job.total} tasks, "
+                      f"{time.time() - job.created_at:.2f}s)")
+
+    def jobs(self):
+        """세션별 현재 job 상태"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            {
+                'scope': job.scope,
+                'name': job.name,
+                'generation': job.generation.number if job.generation is not None else None,
+                'tasks': job.total,
+                'completed': job.completed,
+                'skipped': job.skipped,
+                'failed': job.failed,
+                'cancelled': job.cancelled,
+            }
+            for job in jobs
+        ]
+
+
+# 전역 스케줄러 (프로세스당 1개, 세션 간 공유)
+scheduler = PrecomputeScheduler.from_env()
+
+
+def schedule(name, tasks, scope=None):
+    """현재 세션의 사전 계산 job 예약 (scheduler.schedule 단축)"""
+    return scheduler.schedule(scope or session_scope(), name, tasks)
+
+
+def cancel(scope=None):
+    """현재 세션의 사전 계산 job 취소 (필터 결과가 비었을 때 등)"""
+    scheduler.cancel(scope or session_scope())
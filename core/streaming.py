@@ -0,0 +1,184 @@
+"""
+스트리밍(out-of-core) 모드
+
+기본 모드는 기간 데이터 전체를 pandas DataFrame으로 메모리에 올린 뒤 탭별로 집계합니다.
+12개월(~3천만 건) 이상이면 컨테이너 메모리를 넘으므로, 스트리밍 모드에서는 원본 행을 메모리에 두지 않습니다.
+
+- 차트/랭킹/실패 검색어 집계: agg_engine의 SQL을 parquet 원천(ParquetSource)에 직접 실행
+  (DuckDB가 행 그룹 단위로 스캔하며 그룹 상태만 유지, DASHBOARD_DUCKDB_MEMORY_LIMIT 초과분은 임시 파일로)
+- 행 수/기간/검색어 빈도 등 화면 공통 요약: DuckDB에서 레코드 배치(기본 100만 행)를 받아
+  배치마다 부분 집계 후 누적 (메모리 = 배치 1개 + 요약 결과)
+- 메모리에 남는 것은 집계 결과뿐이며, 크기는 행 수가 아니라 검색어/일자/주차 수에 비례
+
+환경 변수:
+    DASHBOARD_STREAMING=0|1              스트리밍 모드 (기본 0, parquet 원천 + DuckDB 엔진 필요)
+    DASHBOARD_STREAM_BATCH_ROWS=1000000  레코드 배치 크기
+
+사용법:
+    source = data_loader.parquet_source(start_date, end_date)
+    summary = streaming.summarize(source)
+    summary.rows, summary.top_keywords(100)
+"""
+
+import os
+import threading
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+try:
+    from tracing import tracer
+except ImportError:  # 루트 app.py에서 core.streaming으로 import된 경우
+    from core.tracing import tracer
+
+STREAMING = os.getenv('DASHBOARD_STREAMING', '0') == '1'
+BATCH_ROWS = int(os.getenv('DASHBOARD_STREAM_BATCH_ROWS', '1000000'))
+
+# 부분 집계를 이 개수만큼 모으면 한 번 합침 (누적 결과 크기를 검색어 수 수준으로 유지)
+_COMPACT_EVERY = 8
+
+# 원천 객체별 요약 (세션 상태에 보관된 원천이 살아 있는 동안만 유지)
+_summaries = weakref.WeakKeyDictionary()
+_summaries_lock = threading.Lock()
+
+
+def record_batches(source, columns, batch_rows=BATCH_ROWS):
+    """
+    원천의 columns를 레코드 배치 단위로 읽기
+
+    Yields:
+        pyarrow.RecordBatch (최대 batch_rows행)
+    """
+    columns = [col for col in dict.fromkeys(columns) if col in source.columns]
+    conn = source.connect(columns)
+    try:
+        select = ', '.join('"' + col.replace('"', '""') + '"' for col in columns)
+        reader = conn.execute(f"SELECT {select} FROM src").fetch_record_batch(batch_rows)
+        for batch in reader:
+            yield batch
+    finally:
+        conn.close()
+
+
+class KeywordCounter:
+    """검색어별 행 수 누적 (value_counts와 같은 집계, 배치별 부분 집계를 합산)"""
+
+    def __init__(self):
+        self._partials = []
+
+    def add(self, keywords):
+        counts = pc.value_counts(keywords.drop_null())
+        self._partials.append(pa.table({'keyword': counts.field('values'), 'count': counts.field('counts')}))
+        if len(self._partials) >= _COMPACT_EVERY:
+            self._partials = [self._combine()]
+
+    def _combine(self):
+        if not self._partials:
+            return pa.table({'keyword': pa.array([], pa.string()), 'count': pa.array([], pa.int64())})
+        table = pa.concat_tables(self._partials, promote_options='permissive')
+        return table.group_by('keyword').aggregate([('count', 'sum')]).rename_columns(['keyword', 'count'])
+
+    def result(self):
+        """검색어 → 행 수 Series (행 수 내림차순, 동률은 검색어 순)"""
+        table = self._combine().to_pandas()
+        table = table.sort_values(['count', 'keyword'], ascending=[False, True])
+        return pd.Series(table['count'].to_numpy(), index=pd.Index(table['keyword'], name='search_keyword'),
+                         name='count')
+
+
+class StreamSummary:
+    """
+    원천 전체를 한 번 스캔한 요약 (행 수, 기간, 검색어 빈도)
+
+    화면 공통 값(사이드바 건수, 데이터 식별자, 날짜 선택 범위, 검색어 선택 목록)은 이 요약으로 계산합니다.
+    """
+
+    def __init__(self, rows, min_date, max_date, keyword_counts):
+        self.rows = rows
+        self.min_date = min_date
+        self.max_date = max_date
+        self.keyword_counts = keyword_counts
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    def top_keywords(self, n):
+        """행 수 상위 n개 검색어"""
+        return self.keyword_counts.head(n).index.tolist()
+
+
+def summarize(source, batch_rows=BATCH_ROWS):
+    """
+    레코드 배치를 누적해 StreamSummary 생성 (메모리 = 배치 1개 + 검색어 빈도 표)
+
+    Args:
+        source: agg_engine Source (search_keyword, search_date 필요)
+    """
+    rows = 0
+    min_date = max_date = None
+    keywords = KeywordCounter()
+    with tracer.span("스트리밍 요약") as sp:
+        batches = 0
+        for batch in record_batches(source, ['search_keyword', 'search_date'], batch_rows):
+            batches += 1
+            rows += batch.num_rows
+            if 'search_keyword' in batch.schema.names:
+                keywords.add(batch.column('search_keyword'))
+            if 'search_date' in batch.schema.names:
+                bounds = pc.min_max(batch.column('search_date')).as_py()
+                if bounds['min'] is not None:
+                    min_date = bounds['min'] if min_date is None else min(min_date, bounds['min'])
+                    max_date = bounds['max'] if max_date is None else max(max_date, bounds['max'])
+        sp.set(rows=rows, batches=batches)
+    return StreamSummary(
+        rows,
+        pd.Timestamp(min_date) if min_date is not None else None,
+        pd.Timestamp(max_date) if max_date is not None else None,
+        keywords.result(),
+    )
+
+
+def summary(source):
+    """원천의 StreamSummary (원천 객체마다 한 번만 스캔)"""
+    with _summaries_lock:
+        cached = _summaries.get(source)
+    if cached is None:
+        cached = summarize(source)
+        with _summaries_lock:
+            _summaries[source] = cached
+    return cached
+
+
+# ==========================================
+# DataFrame / 원천 공용 헬퍼 (기본 모드는 기존 pandas 연산 그대로)
+# ==========================================
+
+def row_count(data):
+    """행 수"""
+    if isinstance(data, pd.DataFrame):
+        return len(data)
+    return summary(data).rows
+
+
+def keyword_counts(data):
+    """검색어별 행 수 (value_counts())"""
+    if isinstance(data, pd.DataFrame):
+        return data['search_keyword'].value_counts()
+    return summary(data).keyword_counts
+
+
+def top_keywords(data, n):
+    """행 수 상위 n개 검색어 (value_counts().head(n))"""
+    if isinstance(data, pd.DataFrame):
+        return data['search_keyword'].value_counts().head(n).index.tolist()
+    return summary(data).top_keywords(n)
+
+
+def keyword_rows(data, keyword):
+    """검색어의 행 수"""
+    if isinstance(data, pd.DataFrame):
+        return int((data['search_keyword'] == keyword).sum())
+    return int(summary(data).keyword_counts.get(keyword, 0))
@@ -0,0 +1,100 @@
+"""
+랭킹 테이블 표시 (벡터화 스타일)
+
+기존에는 테이블마다 Styler.apply(highlight_new_row, axis=1) + map(color_negative_red)
++ map(color_rank_change) + set_properties로 셀마다 Python 콜백을 호출했고,
+'순위 변화' 컬럼이 숫자/'NEW' 혼합이라 Arrow 변환이 실패한 뒤 문자열로 다시 변환되었습니다.
+
+여기서는 랭킹 결과 1개당 한 번만
+- 표시용 DataFrame (정수 컬럼, '순위 변화'는 '+3'/'-1'/'0'/'NEW' 문자열)
+- 셀별 CSS DataFrame (NEW 행 배경, 음수 빨간색 → numpy 마스크로 계산)
+을 만들고 (app.py에서 랭킹 핸들 단위로 캐싱), 렌더링 시에는 미리 계산한 CSS를
+apply(axis=None) 한 번으로 붙인 Styler만 새로 만듭니다.
+(Styler는 st.dataframe이 렌더링 중 상태를 바꾸므로 세션 간 공유하지 않음)
+
+사용법:
+    table = tables.ranking_table(stats_df)
+    st.dataframe(tables.style(table), use_container_width=True, height=800, hide_index=True)
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('순위', '검색어', '검색량', '전주 대비 변화', '순위 변화')
+
+BASE_CSS = 'font-weight: normal; font-family: Journey, sans-serif'
+NEW_ROW_CSS = 'background-color: rgba(94, 43, 184, 0.08)'  # NEW가 있는 행 전체
+NEGATIVE_CSS = 'color: #DC3545'  # Bootstrap red (양수는 테마 기본 색상)
+# NEW 배지 색상/굵기는 JavaScript가 처리 (셀 CSS는 BASE_CSS의 font-weight: normal)
+
+TABLE_STYLES = [
+    # 헤더 스타일
+    {
+        'selector': 'th',
+        'props': [
+            ('background-color', '#5E2BB8'),
+            ('color', 'white'),
+            ('text-align', 'center !important'),
+            ('font-weight', 'normal'),
+            ('font-family', 'Journey, sans-serif')
+        ]
+    },
+    {'selector': 'td.col0', 'props': [('text-align', 'center !important')]},  # 순위 - 가운데
+    {'selector': 'td.col1', 'props': [('text-align', 'left !important')]},    # 검색어 - 왼쪽
+    {'selector': 'td.col2', 'props': [('text-align', 'right !important')]},   # 검색량 - 오른쪽
+    {'selector': 'td.col3', 'props': [('text-align', 'right !important')]},   # 전주 대비 변화 - 오른쪽
+    {'selector': 'td.col4', 'props': [('text-align', 'center !important')]}   # 순위 변화 - 가운데
+]
+
+
+class RankingTable(NamedTuple):
+    """data: 표시용 DataFrame, css: 같은 모양의 셀별 CSS 문자열"""
+    data: pd.DataFrame
+    css: pd.DataFrame
+
+
+def _signed(value):
+    """+1,234 / -1,234 / 0"""
+    return f"{value:+,}" if value else "0"
+
+
+def ranking_table(stats, keyword_col='keyword', count_col='count', count_label='검색량', limit=100):
+    """
+    랭킹 결과 → 표시용 테이블 + 셀별 CSS
+
+    Args:
+        stats: rank, keyword_col, count_col, count_change, rank_change_display 컬럼의 랭킹
+        count_label: 검색량 컬럼 표시 이름 (실패 검색어 탭은 '실패 횟수')
+        limit: 표시할 최대 행 수
+    """
+    stats = stats.head(limit)
+    rank_change = stats['rank_change_display']
+    is_new = (rank_change == 'NEW').to_numpy()
+    rank_delta = pd.to_numeric(rank_change.where(~is_new), errors='coerce').fillna(0).astype(int).to_numpy()
+    count_change = stats['count_change'].astype(int).to_numpy()
+
+    columns = list(COLUMNS)
+    columns[2] = count_label
+    data = pd.DataFrame({
+        columns[0]: stats['rank'].astype(int).to_numpy(),
+        columns[1]: stats[keyword_col].to_numpy(),
+        columns[2]: stats[count_col].astype(int).to_numpy(),
+        columns[3]: count_change,
+        columns[4]: np.where(is_new, 'NEW', [_signed(int(v)) for v in rank_delta]),
+    })
+
+    css = np.full(data.shape, BASE_CSS, dtype=object)
+    css[is_new, :] = f"{BASE_CSS}; {NEW_ROW_CSS}"
+    css[count_change < 0, 3] += f"; {NEGATIVE_CSS}"
+    css[~is_new & (rank_delta < 0), 4] += f"; {NEGATIVE_CSS}"
+    return RankingTable(data, pd.DataFrame(css, index=data.index, columns=data.columns))
+
+
+def style(table):
+    """캐시된 테이블 → st.dataframe용 Styler (렌더링마다 새로 생성, 콜백은 CSS 반환 1회)"""
+    data, css = table
+    return data.style.apply(lambda _: css, axis=None)\
+        .format({data.columns[2]: '{:,}', data.columns[3]: _signed})\
+        .set_table_styles(TABLE_STYLES)
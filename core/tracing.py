@@ -0,0 +1,389 @@
+"""
+핫패스 구조화 트레이싱
+
+PerformanceLogger/PerfTimer를 대체하는 span 기반 트레이싱 시스템입니다.
+- 중첩 span: 소요 시간, 처리 행 수, 할당 메모리(선택), 캐시 히트/미스 기록
+- 세션 귀속: 루트 span마다 Streamlit 세션 ID를 기록하여 느린 재실행의 원인(탭/필터/키워드) 추적
+- 비활성 모드: DASHBOARD_TRACE=0 이면 span()이 공용 no-op 객체를 반환 (할당/시간 측정 없음)
+- 링 버퍼: 완료된 루트 span을 최근 N개만 메모리에 보관
+- Exporter: 터미널 요약(LoggingExporter), JSONL 파일(JsonlExporter, OTLP 형식 선택 가능)
+
+환경 변수:
+    DASHBOARD_TRACE=0|1            트레이싱 활성화 (기본 1)
+    DASHBOARD_TRACE_MEMORY=0|1     tracemalloc 기반 할당 바이트 측정 (기본 0, 오버헤드 큼)
+    DASHBOARD_TRACE_BUFFER=512     링 버퍼 크기
+    DASHBOARD_TRACE_FILE=path      JSONL 내보내기 경로 (미설정 시 파일 기록 안 함)
+    DASHBOARD_TRACE_FORMAT=jsonl|otlp
+
+사용법:
+    with tracer.span("카테고리 랭킹", tab="속성별 검색어") as sp:
+        stats = calculate_popular_keywords_stats(type_df)
+        sp.set(rows=len(type_df))
+"""
+
+import collections
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('dashboard_current_span', default=None)
+_current_session = contextvars.ContextVar('dashboard_session_id', default=None)
+_span_ids = itertools.count(1)
+
+
+def _status_emoji(elapsed):
+    """기존 터미널 로그와 동일한 소요 시간 등급"""
+    if elapsed < 0.3:
+        return "🟢"
+    elif elapsed < 1.0:
+        return "🟡"
+    elif elapsed < 2.0:
+        return "🟠"
+    return "🔴"
+
+
+class Span:
+    """하나의 측정 구간 (with 문 또는 start()/end()로 사용)"""
+
+    __slots__ = ('tracer', 'name', 'span_id', 'parent', 'trace_id', 'session_id',
+                 'start_ns', 'end_ns', 'wall_ns', 'attrs', 'children', 'error', '_token', '_mem_start')
+
+    def __init__(self, tracer, name, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.session_id = parent.session_id if parent is not None else _current_session.get()
+        self.start_ns = None
+        self.end_ns = None
+        self.wall_ns = None
+        self.attrs = attrs
+        self.children = []
+        self.error = None
+        self._token = None
+        self._mem_start = None
+
+    # --- 속성 기록 ---
+    def set(self, **attrs):
+        """임의 속성 기록 (rows, bytes, keyword, tab 등)"""
+        self.attrs.update(attrs)
+        return self
+
+    def add_rows(self, n):
+        self.attrs['rows'] = self.attrs.get('rows', 0) + int(n)
+        return self
+
+    def cache_hit(self):
+        self.attrs['cache_hits'] = self.attrs.get('cache_hits', 0) + 1
+        return self
+
+    def cache_miss(self):
+        self.attrs['cache_misses'] = self.attrs.get('cache_misses', 0) + 1
+        return self
+
+    # --- 생명주기 ---
+    def start(self):
+        self._token = _current_span.set(self)
+        if self.tracer.track_memory:
+            self._mem_start = tracemalloc.get_traced_memory()[0]
+        self.wall_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.perf_counter_ns()
+        if self._mem_start is not None:
+            self.attrs['bytes_allocated'] = tracemalloc.get_traced_memory()[0] - self._mem_start
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # 다른 컨텍스트에서 종료된 경우 (예: st.stop 이후 다음 재실행)
+            _current_span.set(self.parent)
+        if self.parent is not None:
+            self.parent.children.append(self)
+        else:
+            self.tracer._finish_root(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.end()
+        return False
+
+    @property
+    def duration(self):
+        """소요 시간 (초)"""
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e9
+
+    def walk(self, depth=0):
+        """(depth, span) 깊이 우선 순회"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent is not None else None,
+            'session_id': self.session_id,
+            'name': self.name,
+            'start_unix_ns': self.wall_ns,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attrs': self.attrs,
+            'error': self.error,
+        }
+
+
+class _NoopSpan:
+    """비활성 모드용 span (모든 메서드가 아무 일도 하지 않음)"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        return self
+
+    def add_rows(self, n):
+        return self
+
+    def cache_hit(self):
+        return self
+
+    def cache_miss(self):
+        return self
+
+    def start(self):
+        return self
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class LoggingExporter:
+    """루트 span을 기존 터미널 로그 형식(이모지 등급)의 트리로 출력"""
+
+    def __init__(self, min_duration=0.0):
+        self.min_duration = min_duration
+
+    def export(self, root):
+        if root.duration < self.min_duration:
+            return
+        lines = [f"━━━ {root.name} 완료: {_status_emoji(root.duration)} {root.duration:.2f}초 ━━━"]
+        for depth, span in root.walk():
+            if depth == 0:
+                continue
+            extras = ' '.join(f"{k}={v}" for k, v in span.attrs.items())
+            lines.append(f"{'  ' * depth}{_status_emoji(span.duration)} {span.name}: {span.duration:.3f}초 {extras}".rstrip())
+        logger.info('\n'.join(lines))
+
+
+class JsonlExporter:
+    """루트 span 단위로 JSONL 한 줄씩 기록 (format='otlp'이면 OTLP/JSON resourceSpans 형식)"""
+
+    def __init__(self, path, format='jsonl', service_name='search-dashboard'):
+        self.path = path
+        self.format = format
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, root):
+        if self.format == 'otlp':
+            record = to_otlp([root], self.service_name)
+        else:
+            record = {'spans': [span.to_dict() for _, span in root.walk()]}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp(roots, service_name='search-dashboard'):
+    """루트 span 목록 → OTLP/JSON(ExportTraceServiceRequest) 형식 dict"""
+    spans = []
+    for root in roots:
+        for _, span in root.walk():
+            attrs = dict(span.attrs)
+            if span.session_id is not None:
+                attrs['session.id'] = span.session_id
+            spans.append({
+                'traceId': f"{span.trace_id:032x}",
+                'spanId': f"{span.span_id:016x}",
+                'parentSpanId': f"{span.parent.span_id:016x}" if span.parent is not None else '',
+                'name': span.name,
+                'startTimeUnixNano': str(span.wall_ns),
+                'endTimeUnixNano': str(span.wall_ns + span.end_ns - span.start_ns),
+                'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in attrs.items()],
+                'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+            })
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+        'scopeSpans': [{'scope': {'name': 'dashboard.tracing'}, 'spans': spans}],
+    }]}
+
+
+class Tracer:
+    """span 생성, 링 버퍼 보관, exporter 호출을 담당"""
+
+    def __init__(self, enabled=True, track_memory=False, buffer_size=512, exporters=None):
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.buffer = collections.deque(maxlen=buffer_size)
+        self.exporters = list(exporters or [])
+        self._lock = threading.Lock()
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls):
+        enabled = os.getenv('DASHBOARD_TRACE', '1') != '0'
+        exporters = [LoggingExporter()]
+        trace_file = os.getenv('DASHBOARD_TRACE_FILE')
+        if trace_file:
+            exporters.append(JsonlExporter(trace_file, format=os.getenv('DASHBOARD_TRACE_FORMAT', 'jsonl')))
+        return cls(
+            enabled=enabled,
+            track_memory=os.getenv('DASHBOARD_TRACE_MEMORY', '0') == '1',
+            buffer_size=int(os.getenv('DASHBOARD_TRACE_BUFFER', '512')),
+            exporters=exporters,
+        )
+
+    def span(self, name, root=False, **attrs):
+        """
+        span 생성 (with 문으로 사용)
+
+        Args:
+            name: span 이름
+            root: True이면 현재 span과 무관하게 새 트레이스 시작 (재실행 단위 루트용)
+            **attrs: 초기 속성
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = None if root else _current_span.get()
+        return Span(self, name, parent, attrs)
+
+    def start_root(self, name, **attrs):
+        """with 블록으로 감쌀 수 없는 구간(스크립트 전체 재실행)용 루트 span 시작"""
+        return self.span(name, root=True, **attrs).start()
+
+    def current(self):
+        """현재 활성 span (없거나 비활성 모드면 no-op span)"""
+        span = _current_span.get() if self.enabled else None
+        return span if span is not None else NOOP_SPAN
+
+    def end_interrupted(self):
+        """
+        이전 실행이 중단되어(새 재실행 요청, st.rerun) 끝나지 않은 span을 루트까지 종료 (interrupted=True)
+        같은 스크립트 스레드에서 다음 재실행의 루트 span을 시작하기 전에 호출
+        """
+        span = _current_span.get() if self.enabled else None
+        while span is not None:
+            parent = span.parent
+            if span.end_ns is None:
+                span.set(interrupted=True).end()
+            span = parent
+        _current_span.set(None)
+
+    def _finish_root(self, root):
+        with self._lock:
+            self.buffer.append(root)
+        for exporter in self.exporters:
+            try:
+                exporter.export(root)
+            except Exception as e:
+                logger.warning(f"Trace export failed ({type(exporter).__name__}): {e}")
+
+    def recent(self, n=None):
+        """링 버퍼의 최근 루트 span 목록 (오래된 순)"""
+        with self._lock:
+            roots = list(self.buffer)
+        return roots if n is None else roots[-n:]
+
+    def summary(self, by=()):
+        """
+        링 버퍼 전체의 span 이름(+속성)별 집계
+
+        Args:
+            by: 그룹 키로 추가할 속성 이름 (예: ('tab',), ('keyword',))
+
+        Returns:
+            list[dict]: name, 그룹 속성, count, total_s, p50_s, p95_s, max_s, rows, cache_hits, cache_misses
+        """
+        groups = collections.defaultdict(list)
+        for root in self.recent():
+            for _, span in root.walk():
+                key = (span.name,) + tuple(span.attrs.get(attr) for attr in by)
+                groups[key].append(span)
+
+        rows = []
+        for key, spans in groups.items():
+            durations = sorted(s.duration for s in spans)
+            row = {'name': key[0]}
+            row.update(zip(by, key[1:]))
+            row.update({
+                'count': len(spans),
+                'total_s': sum(durations),
+                'p50_s': durations[len(durations) // 2],
+                'p95_s': durations[min(int(len(durations) * 0.95), len(durations) - 1)],
+                'max_s': durations[-1],
+                'rows': sum(s.attrs.get('rows', 0) for s in spans),
+                'cache_hits': sum(s.attrs.get('cache_hits', 0) for s in spans),
+                'cache_misses': sum(s.attrs.get('cache_misses', 0) for s in spans),
+            })
+            rows.append(row)
+        return sorted(rows, key=lambda r: r['total_s'], reverse=True)
+
+
+def set_session(session_id):
+    """현재 컨텍스트(스크립트 실행 스레드)의 세션 ID 설정"""
+    _current_session.set(session_id)
+
+
+def traced(name=None, **attrs):
+    """함수 전체를 span으로 감싸는 데코레이터"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# 전역 트레이서 (모듈 단위 싱글턴)
+tracer = Tracer.from_env()
+span = tracer.span
@@ -0,0 +1,219 @@
+"""
+실패 검색어 워드클라우드 PNG 캐시 + 백그라운드 렌더링
+
+워드클라우드는 호출마다 WordCloud 배치(600×1000) + matplotlib 10×15인치 렌더링을 수행해
+한 번에 수 초가 걸리고, 그동안 UI 스레드(재실행)가 멈춥니다.
+여기서는 렌더링 결과를 PNG 바이트로 캐싱하고, 배치/렌더링은 별도 프로세스 풀에서 실행합니다.
+
+- 캐시 키: 빈도표({검색어: 횟수})의 해시 → 같은 빈도표는 필터/세션이 달라도 같은 이미지
+- 미스: 프로세스 풀에 렌더링을 맡기고 즉시 반환 (UI는 기다리지 않음, 같은 키의 중복 요청은 합침)
+- 이전 이미지: 새 빈도표를 렌더링하는 동안 같은 슬롯의 마지막 이미지를 반환 (stale=True)
+- 워커 프로세스는 spawn으로 시작 (Streamlit 스레드 상태를 fork하지 않음), 첫 렌더링 때 생성
+
+환경 변수:
+    DASHBOARD_WORDCLOUD_WORKERS=1     렌더링 프로세스 수
+    DASHBOARD_WORDCLOUD_CACHE=32      보관할 PNG 수 (오래 안 쓴 것부터 제거)
+
+사용법:
+    image = wordcloud_cache.get(word_freq, slot='failed')
+    if image.png is not None:
+        st.image(image.png)   # image.stale이면 새 이미지 렌더링 중
+"""
+
+import atexit
+import collections
+import concurrent.futures
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from typing import NamedTuple
+
+WORKERS = max(1, int(os.getenv('DASHBOARD_WORDCLOUD_WORKERS', '1')))
+CACHE_SIZE = max(1, int(os.getenv('DASHBOARD_WORDCLOUD_CACHE', '32')))
+
+FONT_NAME = 'JOURNEYITSELF-REGULAR 3.TTF'
+# 작업 폴더 → 프로젝트 assets/ 순서로 폰트 탐색
+FONT_CANDIDATES = (
+    FONT_NAME,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', FONT_NAME),
+)
+
+
+class WordCloudImage(NamedTuple):
+    """png: PNG 바이트 (아직 없으면 None), stale: 요청한 빈도표가 아닌 이전 이미지인지"""
+    png: bytes
+    stale: bool
+
+
+def frequency_key(word_freq):
+    """빈도표 해시 (항목 순서와 무관)"""
+    items = sorted((str(word), int(count)) for word, count in word_freq.items())
+    return hashlib.sha1(json.dumps(items, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def render_png(word_freq):
+    """
+    빈도표 → 워드클라우드 PNG 바이트 (워커 프로세스에서 실행)
+
+    한글 폰트가 있으면 600×1000 세로 배치, 폰트 문제로 실패하면 기본 폰트 1000×600 배치
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # 화면 없는 워커 프로세스
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
+    font_file = next((path for path in FONT_CANDIDATES if os.path.exists(path)), None)
+    try:
+        wc = WordCloud(
+            font_path=font_file,
+            width=600,
+            height=1000,
+            background_color='white',
+            colormap='Purples',  # Premium purple theme
+            relative_scaling=0.4,  # Balanced size difference
+            min_font_size=20,
+            max_font_size=100,
+            prefer_horizontal=1.0,
+            margin=5,
+            random_state=42
+        ).generate_from_frequencies(word_freq)
+    except Exception:
+        wc = WordCloud(
+            font_path=None,
+            width=1000,
+            height=600,
+            background_color='white',
+            colormap='Purples',
+            relative_scaling=0.4,
+            min_font_size=10,
+            max_font_size=120,
+            prefer_horizontal=1.0,
+            margin=5,
+            random_state=42
+        ).generate_from_frequencies(word_freq)
+
+    fig, ax = plt.subplots(figsize=(10, 15))  # Adjusted for user's width:600 height:1000 preference
+    try:
+        # Use bilinear interpolation for smoother edges as requested
+        ax.imshow(wc, interpolation='bilinear')
+        ax.axis('off')
+        fig.tight_layout(pad=0)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+_lock = threading.Lock()
+_images = collections.OrderedDict()  # 빈도표 키 → PNG
+_pending = {}                        # 빈도표 키 → (Future, 완성 시 갱신할 슬롯 목록)
+_latest = {}                         # 슬롯 → 마지막으로 완성된 빈도표 키
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_reset_pool)
+
+
+def _store_locked(key, png, slots):
+    """결과 저장 (호출자가 _lock 보유)"""
+    _images[key] = png
+    _images.move_to_end(key)
+    while len(_images) > CACHE_SIZE:
+        _images.popitem(last=False)
+    for slot in slots:
+        _latest[slot] = key
+
+
+def _store(key, png, slots):
+    with _lock:
+        _store_locked(key, png, slots)
+
+
+def _on_done(key, future):
+    try:
+        png = future.result()
+    except concurrent.futures.process.BrokenProcessPool as e:
+        with _lock:
+            _pending.pop(key, None)
+        _reset_pool()  # 워커가 비정상 종료됨 → 다음 요청 때 새 풀 생성
+        print(f"✗ Word cloud render failed ({key}): {e}")
+        return
+    except Exception as e:
+        with _lock:
+            _pending.pop(key, None)
+        print(f"✗ Word cloud render failed ({key}): {e}")
+        return
+    # 저장과 대기 목록 제거를 같은 잠금 안에서 처리
+    # (그 사이에 render()가 조회하면 Future도 이미지도 없어 None을 반환하던 문제 방지)
+    with _lock:
+        _, slots = _pending.pop(key, (None, []))
+        _store_locked(key, png, slots)
+    print(f"✓ Word cloud rendered: {key} ({len(png) / 1024:.0f}KB)")
+
+
+def get(word_freq, slot='default'):
+    """
+    빈도표의 워드클라우드 이미지 (UI 스레드에서 블로킹 없이 호출)
+
+    Args:
+        word_freq: {검색어: 횟수}
+        slot: 화면 위치 이름 (새 이미지가 준비될 때까지 이 슬롯의 이전 이미지를 반환)
+
+    Returns:
+        WordCloudImage: 캐시 히트면 (png, False), 렌더링 중이면 (이전 png 또는 None, True)
+    """
+    key = frequency_key(word_freq)
+    with _lock:
+        png = _images.get(key)
+        if png is not None:
+            _images.move_to_end(key)
+            _latest[slot] = key
+            return WordCloudImage(png, False)
+        pending = _pending.get(key)
+        submitted = pending is None
+        if submitted:
+            pending = _pending[key] = (_get_pool().submit(render_png, dict(word_freq)), [])
+        if slot not in pending[1]:
+            pending[1].append(slot)
+        stale = _images.get(_latest.get(slot))
+    if submitted:
+        # 잠금 밖에서 등록 (이미 끝난 Future면 콜백이 이 스레드에서 바로 실행됨)
+        pending[0].add_done_callback(lambda f: _on_done(key, f))
+    return WordCloudImage(stale, True)
+
+
+def render(word_freq, slot='default', timeout=None):
+    """
+    렌더링이 끝날 때까지 기다려 PNG 반환 (배치 작업용, 시간 초과 시 TimeoutError)
+    """
+    image = get(word_freq, slot)
+    if not image.stale:
+        return image.png
+    key = frequency_key(word_freq)
+    with _lock:
+        future, _ = _pending.get(key, (None, None))
+        png = _images.get(key)
+    if future is not None:
+        png = future.result(timeout=timeout)
+        _store(key, png, [slot])
+    return png
@@ -2,8 +2,12 @@ import streamlit as st
 import pandas as pd
 import os
 import logging
-from supabase import create_client, Client
 from dotenv import load_dotenv
+from core.cache_metrics import metered_cache_data
+from core.frame_store import cache_frame
+# [NEW] supabase SDK는 첫 조회 시 import (워커 시작 비용 감소)
+from core.lazy_imports import lazy
+supabase_sdk = lazy('supabase')
 
 logging.getLogger("supabase").setLevel(logging.ERROR)
 logging.getLogger("httpx").setLevel(logging.ERROR)
@@ -14,14 +18,14 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
 @st.cache_resource
-def get_supabase_client() -> Client:
+def get_supabase_client():
     if not SUPABASE_URL or not SUPABASE_KEY:
         url = st.secrets.get("SUPABASE_URL", SUPABASE_URL)
         key = st.secrets.get("SUPABASE_KEY", SUPABASE_KEY)
-        return create_client(url, key)
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+        return supabase_sdk.create_client(url, key)
+    return supabase_sdk.create_client(SUPABASE_URL, SUPABASE_KEY)
 
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def get_raw_data_count(start_date=None, end_date=None, paths=None):
     """원본 CSV 행수를 정확히 반영"""
     return 4746464
@@ -33,7 +37,7 @@ def _to_int_date(dt):
     try: return int(str(dt).replace('-', ''))
     except: return dt
 
-@st.cache_data(ttl=3600)
+@metered_cache_data(ttl=3600)
 def get_server_daily_metrics(start_date, end_date):
     """[ULTRA-FAST] 474만 건 전수 일자별 집계 결과만 가져옵니다."""
     supabase = get_supabase_client()
@@ -59,7 +63,7 @@ def get_server_daily_metrics(start_date, end_date):
         logging.error(f"RPC Error (daily_metrics): {e}")
     return pd.DataFrame()
 
-@st.cache_data(ttl=3600, show_spinner="데이터를 분석하는 중...")
+@cache_frame(ttl=3600, show_spinner="데이터를 분석하는 중...")
 def load_data_range(start_date=None, end_date=None, cache_bust=None):
     """
     [STABLE LOADING] 50,000건의 요약 데이터를 안전하게 로드합니다.
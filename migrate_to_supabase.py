@@ -14,6 +14,8 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 from tqdm import tqdm
 import glob
+# [NEW] 고유 사용자/세션 HLL 스케치 (그룹 간 합집합 가능)
+from core import hll
 
 # 환경 변수 로드
 load_dotenv()
@@ -51,7 +53,11 @@ def load_parquet_data():
     
     # DuckDB로 집계 쿼리 실행 (한글 컬럼명 대응)
     conn = duckdb.connect()
-    query = f"""
+    columns = {row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM read_parquet('{file_path}')").fetchall()}
+    # [NEW] 세션 ID가 없는 파일은 세션 스케치 생략 (NULL → 뷰에서 session_count 합계 사용)
+    has_session = 'sessionid' in columns
+    conn.execute(f"""
+    CREATE TEMP VIEW logs AS
     SELECT 
         "검색일" as logday,
         "검색어" as search_keyword,
@@ -64,12 +70,36 @@ def load_parquet_data():
             WHEN uidx LIKE 'C%' THEN '로그인'
             ELSE '비로그인'
         END as login_status,
-        SUM("검색량") as total_count,
-        SUM("검색결과수") as result_total_count,
-        COUNT(DISTINCT uidx) as uidx_count,
-        COUNT(*) as session_count
+        "검색량" as search_count,
+        "검색결과수" as result_count,
+        uidx,
+        {'sessionid' if has_session else 'NULL'} as sessionid
     FROM read_parquet('{file_path}')
-    GROUP BY logday, search_keyword, pathcd, age, gender, tab, logweek, login_status
+    """)
+    group_keys = ['logday', 'search_keyword', 'pathcd', 'age', 'gender', 'tab', 'logweek', 'login_status']
+    
+    # [UPDATED] 그룹별 고유 수(uidx_count)는 더하면 여러 그룹에 걸친 사용자가 중복 집계되므로
+    # 같은 집계 단위의 HLL 스케치를 함께 저장 (주간/키워드 고유 사용자는 스케치 합집합으로 추정)
+    join_on = ' AND '.join(f"a.{key} IS NOT DISTINCT FROM {{alias}}.{key}" for key in group_keys)
+    session_sketch = "coalesce(s.sketch, [])" if has_session else "NULL"
+    session_join = (
+        f"LEFT JOIN ({hll.packed_sketch_sql('logs', group_keys, 'sessionid')}) s ON {join_on.format(alias='s')}"
+        if has_session else ""
+    )
+    query = f"""
+    SELECT a.*, coalesce(u.sketch, []) as uidx_sketch, {session_sketch} as session_sketch
+    FROM (
+        SELECT 
+            {', '.join(group_keys)},
+            SUM(search_count) as total_count,
+            SUM(result_count) as result_total_count,
+            COUNT(DISTINCT uidx) as uidx_count,
+            COUNT(*) as session_count
+        FROM logs
+        GROUP BY {', '.join(group_keys)}
+    ) a
+    LEFT JOIN ({hll.packed_sketch_sql('logs', group_keys, 'uidx')}) u ON {join_on.format(alias='u')}
+    {session_join}
     """
     
     df = conn.execute(query).fetchdf()
@@ -87,6 +117,13 @@ def load_parquet_data():
     for col in numeric_cols:
         df[col] = df[col].fillna(0).astype(int)
     
+    # [NEW] 스케치: 정수 리스트로 변환 (Supabase INTEGER[] 대응, 세션 ID가 없으면 NULL)
+    sketch_cols = ['uidx_sketch', 'session_sketch'] if has_session else ['uidx_sketch']
+    for col in sketch_cols:
+        df[col] = df[col].map(lambda sketch: [int(v) for v in sketch])
+    if not has_session:
+        df['session_sketch'] = None
+    
     # 날짜 데이터도 정수형 확인
     df['logday'] = df['logday'].astype(int)
     df['logweek'] = df['logweek'].astype(int)
@@ -1,48 +1,374 @@
-import pandas as pd
+"""
+부하 테스트용 합성 검색 로그 생성기
+
+운영 데이터와 동일한 18개 컬럼 스키마(raw) 또는 search_aggregated 스키마(aggregated)로
+일자별 parquet 파티션을 생성합니다. 모든 컬럼을 numpy/pyarrow 벡터 연산으로 만들기 때문에
+수천만 건도 수 초 안에 생성됩니다.
+
+- 검색어: Zipf 분포 (상위 소수 키워드에 검색량 집중 + 긴 꼬리)
+- 접속 경로/연령/성별/로그인: 운영 데이터와 유사한 비율
+- 실패 검색: --fail-rate 비율만큼 결과 0건 (오타성 롱테일 키워드 위주)
+- 악성 문자열: 실패 검색어 정규식 필터(특수문자, H코드, 상품코드, 스팸 등)를 자극하는 값
+
+사용법:
+    python scripts/generate_data.py --rows 30000000 --start 2025-10-01 --days 61
+    python scripts/generate_data.py --schema aggregated --out data_storage_agg
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import duckdb
 import numpy as np
-from datetime import datetime, timedelta
-import random
-
-def generate_dummy_data(num_weeks=10, rows_per_week=100):
-    """
-    Generates a dummy Excel file with travel search data.
-    """
-    data = []
-    start_date = datetime.now() - timedelta(weeks=num_weeks)
-    
-    keywords = ["Jeju", "Seoul", "Busan", "Osaka", "Tokyo", "Bangkok", "Danang", "Paris", "London", "New York"]
-    failed_keywords = ["asdf", "gagal", "nowhere", "unknown place", "mars"]
-    
-    for i in range(num_weeks):
-        week_start = start_date + timedelta(weeks=i)
-        for _ in range(rows_per_week):
-            # Random date within the week
-            search_date = week_start + timedelta(days=random.randint(0, 6))
-            
-            # Decide if fit is a successful or failed search
-            if random.random() < 0.1: # 10% failure
-                keyword = random.choice(failed_keywords)
-                result_count = 0
-            else:
-                keyword = random.choice(keywords)
-                result_count = random.randint(1, 50)
-            
-            user_age = random.choice([20, 30, 40, 50, 60])
-            search_attribute = random.choice(["Hotel", "Flight", "Package"])
-            
-            data.append({
-                "search_date": search_date.strftime("%Y-%m-%d"),
-                "keyword": keyword,
-                "result_count": result_count,
-                "user_age": user_age,
-                "search_type": search_attribute
-            })
-            
-    df = pd.DataFrame(data)
-    file_path = "dummy_data.xlsx"
-    df.to_excel(file_path, index=False)
-    print(f"Dummy data created at {file_path}")
-    return df
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# 프로젝트 루트의 core 패키지 (스케치 정의를 migrate_to_supabase와 공유)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import hll  # noqa: E402
+
+# 운영 원본 스키마 (docs/PROJECT_SPECIFICATION.md - 18개 컬럼)
+RAW_COLUMNS = [
+    'logweek', 'logday', 'pathcd', 'uidx', 'sessionid', 'userip',
+    'origin_keyword', 'search_keyword', 'tab', 'ai_filter_tag', 'utm_medium',
+    'search_type', 'quick_link_yn', 'total_count', 'result_total_count',
+    'gender', 'birthday', 'age'
+]
+
+# Supabase search_aggregated 스키마 (migrate_to_supabase.load_parquet_data와 동일한 집계 단위)
+AGG_GROUP_COLUMNS = ['logday', 'search_keyword', 'pathcd', 'age', 'gender', 'tab', 'logweek', 'login_status']
+AGG_COLUMNS = AGG_GROUP_COLUMNS + [
+    'total_count', 'result_total_count', 'uidx_count', 'session_count', 'uidx_sketch', 'session_sketch'
+]
+
+# 분포 설정 (값: 비율)
+PATHCD_MIX = {'MDA': 0.62, 'DCM': 0.27, 'DCP': 0.11}
+AGE_MIX = {'20대 이하': 0.17, '30대': 0.27, '40대': 0.25, '50대 이상': 0.16, '미분류': 0.15}
+GENDER_MIX = {'F': 0.52, 'M': 0.38, None: 0.10}
+SEARCH_TYPE_MIX = {'all': 0.55, 'package': 0.15, 'domestic': 0.12, 'hotel': 0.10, 'localTour': 0.08}
+TAB_MIX = {'all': 0.70, 'package': 0.10, 'hotel': 0.10, 'localTour': 0.10}
+UTM_MEDIUM_MIX = {None: 0.70, 'organic': 0.15, 'cpc': 0.10, 'email': 0.05}
+AI_FILTER_TAG_MIX = {None: 0.92, '가족여행': 0.03, '커플': 0.03, '가성비': 0.02}
+QUICK_LINK_MIX = {'N': 0.96, 'Y': 0.03, None: 0.01}
+
+# 연령대별 나이 범위 (birthday 역산용)
+AGE_YEARS = {'20대 이하': (15, 29), '30대': (30, 39), '40대': (40, 49), '50대 이상': (50, 75)}
+
+# 실패 검색어 IP 필터에서 제외되는 사내 IP (compute.preprocess_failed_keyword_data와 동일)
+BLOCKED_IPS = [
+    '112.223.61.10', '112.223.61.11', '112.223.61.12', '112.223.61.13', '112.223.61.14',
+    '112.223.61.16', '112.223.61.17', '112.223.61.18', '112.223.61.39', '112.223.61.40',
+    '112.220.71.243', '112.220.71.244'
+]
+
+DESTINATIONS = [
+    '제주', '제주도', '부산', '서울', '강릉', '경주', '여수', '속초', '전주', '대구',
+    '오사카', '도쿄', '후쿠오카', '삿포로', '오키나와', '교토', '방콕', '치앙마이', '푸켓', '다낭',
+    '나트랑', '하노이', '호치민', '세부', '보라카이', '발리', '싱가포르', '홍콩', '마카오', '타이베이',
+    '괌', '사이판', '하와이', '파리', '런던', '로마', '바르셀로나', '프라하', '스위스', '뉴욕',
+    '라스베가스', '시드니', '멜버른', '몰디브', '칸쿤', '두바이', '이스탄불', '울릉도', '남해', '거제'
+]
+SUFFIXES = ['', ' 여행', ' 호텔', ' 패키지', ' 자유여행', ' 항공권', ' 리조트', ' 맛집', ' 투어', ' 입장권']
+
+# 정규식 필터별 대표 악성 문자열 (+ 인젝션/인코딩 경계값)
+HOSTILE_KEYWORDS = [
+    '제주!!', '호텔@@특가', '50%할인', 'H1234567890A', 'h0a1b2c3d4e5',
+    '20251001', '1234', 'A1234567890ABCD', 'PKG20251001XYZ99',
+    'DB', '디비 추출', 'db덤프', 'abc123', 'tour 123 seoul abc2025',
+    'abc123456', 'xyz9876543', '출장마사지', '텔레그램 문의', '마사지 예약',
+    '東京', '大阪', '', ' ', '   ',
+    "'; DROP TABLE search_aggregated; --", '<script>alert(1)</script>', '.*+?^$()[]{}|\\',
+    '제주\n호텔', '\t탭\t', '🏝️ 제주', 'ｆｕｌｌｗｉｄｔｈ', 'ㅈㅈ', 'ㅏㅏㅏ',
+    '제주 ' * 60,
+]
+
+
+def _mix_arrays(mix):
+    """{값: 비율} → (값 배열, 정규화된 확률 배열)"""
+    values = list(mix.keys())
+    probs = np.asarray(list(mix.values()), dtype=np.float64)
+    return values, probs / probs.sum()
+
+
+def _sample_column(rng, mix, n):
+    """비율 분포에 따라 n개의 문자열 컬럼을 생성 (None은 null)"""
+    values, probs = _mix_arrays(mix)
+    codes = np.searchsorted(np.cumsum(probs), rng.random(n), side='right').clip(max=len(values) - 1)
+    return pc.take(pa.array(values, type=pa.string()), pa.array(codes, type=pa.int32())), codes, values
+
+
+def _zipf_sample(rng, vocab_size, n, exponent):
+    """순위 1..vocab_size에 대한 Zipf(exponent) 분포 샘플 (0-based 인덱스)"""
+    ranks = np.arange(1, vocab_size + 1, dtype=np.float64)
+    cdf = np.cumsum(ranks ** -exponent)
+    cdf /= cdf[-1]
+    return np.searchsorted(cdf, rng.random(n), side='right').clip(max=vocab_size - 1)
+
+
+def _random_hangul_words(rng, count, min_len=2, max_len=4):
+    """무작위 한글 음절 조합 (롱테일/오타 키워드용)"""
+    syllables = rng.integers(0xAC00, 0xD7A4, size=(count, max_len))
+    lengths = rng.integers(min_len, max_len + 1, size=count)
+    return [''.join(map(chr, row[:length])) for row, length in zip(syllables, lengths)]
+
+
+def build_vocabulary(vocab_size, seed=0):
+    """
+    검색량 순으로 정렬된 정상 키워드 사전과 실패(오타) 키워드 사전 생성
+
+    Returns:
+        tuple: (정상 키워드 리스트, 실패 키워드 리스트)
+    """
+    rng = np.random.default_rng(seed)
+    head = [f"{dest}{suffix}" for suffix in SUFFIXES for dest in DESTINATIONS]
+    tail_size = max(vocab_size - len(head), 0)
+    tail = [f"{word}{SUFFIXES[i % len(SUFFIXES)]}" for i, word in enumerate(_random_hangul_words(rng, tail_size))]
+    vocabulary = list(dict.fromkeys(head + tail))[:vocab_size]
+
+    failed_vocabulary = list(dict.fromkeys(_random_hangul_words(rng, max(vocab_size // 10, 100), 2, 5)))
+    return vocabulary, failed_vocabulary
+
+
+def _string_ids(prefix, ids):
+    """정수 ID 배열 → 'prefix' + 숫자 문자열 배열 (pyarrow 커널, 파이썬 루프 없음)"""
+    return pc.binary_join_element_wise(prefix, pc.cast(pa.array(ids), pa.string()), '')
+
+
+def _ip_strings(rng, n):
+    octets = [pc.cast(pa.array(rng.integers(1, 255, size=n)), pa.string()) for _ in range(4)]
+    return pc.binary_join_element_wise(*octets, '.')
+
+
+def generate_day(day, n_rows, vocabulary, failed_vocabulary, rng,
+                 fail_rate=0.03, hostile_rate=0.01, blocked_ip_rate=0.005,
+                 login_rate=0.58, zipf_exponent=1.1, n_users=2_000_000):
+    """
+    하루치 원본 검색 로그(18개 컬럼)를 pyarrow Table로 생성
+
+    Args:
+        day: 로그 일자 (datetime.date)
+        n_rows: 생성할 행 수
+        vocabulary / failed_vocabulary: build_vocabulary() 결과
+        rng: numpy Generator
+        fail_rate: 결과 0건 검색 비율
+        hostile_rate: 악성 문자열 치환 비율
+        blocked_ip_rate: 사내(제외 대상) IP 비율
+
+    Returns:
+        pa.Table: RAW_COLUMNS 순서의 테이블
+    """
+    n = n_rows
+    logday = int(day.strftime('%Y%m%d'))
+    logweek = day.isocalendar()[1]
+
+    # 1. 검색어 (정상: Zipf, 실패: 실패 사전 Zipf, 일부 악성 문자열로 치환)
+    is_failed = rng.random(n) < fail_rate
+    dictionary = pa.array(vocabulary + failed_vocabulary + HOSTILE_KEYWORDS, type=pa.string())
+    codes = _zipf_sample(rng, len(vocabulary), n, zipf_exponent)
+    n_failed = int(is_failed.sum())
+    codes[is_failed] = len(vocabulary) + _zipf_sample(rng, len(failed_vocabulary), n_failed, zipf_exponent)
+    is_hostile = rng.random(n) < hostile_rate
+    codes[is_hostile] = len(vocabulary) + len(failed_vocabulary) + rng.integers(
+        0, len(HOSTILE_KEYWORDS), size=int(is_hostile.sum())
+    )
+    search_keyword = pc.take(dictionary, pa.array(codes, type=pa.int32()))
+    # 원본 검색어: 일부는 공백이 붙은 상태로 입력됨 (정규화 전 값)
+    origin_keyword = pc.if_else(
+        pa.array(rng.random(n) < 0.05),
+        pc.binary_join_element_wise(search_keyword, ' ', ''),
+        search_keyword
+    )
+
+    # 2. 사용자 속성
+    pathcd, _, _ = _sample_column(rng, PATHCD_MIX, n)
+    age, age_codes, age_values = _sample_column(rng, AGE_MIX, n)
+    gender, _, _ = _sample_column(rng, GENDER_MIX, n)
+    is_login = rng.random(n) < login_rate
+    uidx = pc.if_else(
+        pa.array(is_login),
+        _string_ids('C', rng.integers(10_000_000, 10_000_000 + n_users, size=n)),
+        pa.nulls(n, pa.string())
+    )
+
+    # birthday: 연령대에서 역산 (미분류는 null)
+    birth_year = np.zeros(n, dtype=np.int64)
+    for code, label in enumerate(age_values):
+        if label in AGE_YEARS:
+            mask = age_codes == code
+            low, high = AGE_YEARS[label]
+            birth_year[mask] = day.year - rng.integers(low, high + 1, size=int(mask.sum()))
+    birthday_values = (birth_year * 10000 + rng.integers(1, 13, size=n) * 100 + rng.integers(1, 29, size=n)).astype(np.float64)
+    birthday_values[birth_year == 0] = np.nan
+    birthday = pa.array(birthday_values, from_pandas=True)
+
+    # 3. 세션/IP (세션당 평균 4회 검색, 일자별로 ID 공간 분리)
+    session_ids = logday * 100_000_000 + rng.integers(0, max(n // 4, 1), size=n)
+    sessionid = _string_ids('sess_', session_ids)
+    userip = _ip_strings(rng, n)
+    is_blocked = rng.random(n) < blocked_ip_rate
+    blocked = pc.take(pa.array(BLOCKED_IPS), pa.array(rng.integers(0, len(BLOCKED_IPS), size=n)))
+    userip = pc.if_else(pa.array(is_blocked), blocked, userip)
+
+    # 4. 검색 컨텍스트
+    tab, _, _ = _sample_column(rng, TAB_MIX, n)
+    search_type, _, _ = _sample_column(rng, SEARCH_TYPE_MIX, n)
+    utm_medium, _, _ = _sample_column(rng, UTM_MEDIUM_MIX, n)
+    ai_filter_tag, _, _ = _sample_column(rng, AI_FILTER_TAG_MIX, n)
+    quick_link_yn, _, _ = _sample_column(rng, QUICK_LINK_MIX, n)
+
+    # 5. 결과 건수 (실패 검색은 0건)
+    total = np.maximum(rng.lognormal(mean=5.0, sigma=1.5, size=n).astype(np.int64), 1)
+    result_total = (total * rng.uniform(0.3, 1.0, size=n)).astype(np.int64)
+    total[is_failed] = 0
+    result_total[is_failed] = 0
+
+    columns = {
+        'logweek': pa.array(np.full(n, logweek, dtype=np.int64)),
+        'logday': pa.array(np.full(n, logday, dtype=np.int64)),
+        'pathcd': pathcd,
+        'uidx': uidx,
+        'sessionid': sessionid,
+        'userip': userip,
+        'origin_keyword': origin_keyword,
+        'search_keyword': search_keyword,
+        'tab': tab,
+        'ai_filter_tag': ai_filter_tag,
+        'utm_medium': utm_medium,
+        'search_type': search_type,
+        'quick_link_yn': quick_link_yn,
+        'total_count': pa.array(total),
+        'result_total_count': pa.array(result_total),
+        'gender': gender,
+        'birthday': birthday,
+        'age': age,
+    }
+    return pa.table([columns[c] for c in RAW_COLUMNS], names=RAW_COLUMNS)
+
+
+def aggregate_day(table):
+    """
+    원본 테이블을 search_aggregated 스키마로 집계
+    (migrate_to_supabase.load_parquet_data의 DuckDB 집계와 동일한 정의)
+    """
+    is_login = pc.fill_null(pc.starts_with(table['uidx'], 'C'), False)
+    login_status = pc.if_else(is_login, '로그인', '비로그인')
+    table = table.append_column('login_status', login_status)
+
+    grouped = table.group_by(AGG_GROUP_COLUMNS).aggregate([
+        ('total_count', 'sum'),
+        ('result_total_count', 'sum'),
+        ('uidx', 'count_distinct'),
+        ('logday', 'count'),
+    ])
+    grouped = grouped.rename_columns([
+        {'total_count_sum': 'total_count',
+         'result_total_count_sum': 'result_total_count',
+         'uidx_count_distinct': 'uidx_count',
+         'logday_count': 'session_count'}.get(name, name)
+        for name in grouped.column_names
+    ])
+    return add_sketch_columns(table, grouped).select(AGG_COLUMNS)
+
+
+def add_sketch_columns(table, grouped):
+    """
+    집계 행에 uidx/sessionid HLL 스케치 컬럼 추가
+    (migrate_to_supabase와 같은 hll.packed_sketch_sql → (reg << 6) | rho 정수 리스트, 값이 없으면 빈 리스트)
+    """
+    join_on = ' AND '.join(f"a.{key} IS NOT DISTINCT FROM {{alias}}.{key}" for key in AGG_GROUP_COLUMNS)
+    conn = duckdb.connect()  # 일자별 스레드마다 별도 연결
+    try:
+        conn.register('logs', table)
+        conn.register('agg', grouped)
+        return conn.execute(f'''
+            SELECT a.*, coalesce(u.sketch, []) AS uidx_sketch, coalesce(s.sketch, []) AS session_sketch
+            FROM agg a
+            LEFT JOIN ({hll.packed_sketch_sql('logs', AGG_GROUP_COLUMNS, 'uidx')}) u ON {join_on.format(alias='u')}
+            LEFT JOIN ({hll.packed_sketch_sql('logs', AGG_GROUP_COLUMNS, 'sessionid')}) s ON {join_on.format(alias='s')}
+        ''').fetch_arrow_table()
+    finally:
+        conn.close()
+
+
+def generate_dataset(out_dir='data_storage', n_rows=1_000_000, start=date(2025, 10, 1), days=61,
+                     schema='raw', vocab_size=200_000, seed=42, workers=None, **day_options):
+    """
+    일자별 parquet 파티션 생성 ({out_dir}/search_logs_YYYYMMDD.parquet)
+
+    data_loader가 읽는 `data_storage/*.parquet` 패턴과 호환되도록 일자별 평면 파일로 저장합니다.
+
+    Returns:
+        list: 생성된 파일 경로 목록
+    """
+    if schema not in ('raw', 'aggregated'):
+        raise ValueError(f"schema must be 'raw' or 'aggregated', got {schema!r}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    vocabulary, failed_vocabulary = build_vocabulary(vocab_size, seed)
+    child_seeds = np.random.SeedSequence(seed).spawn(days)
+
+    # 요일별 검색량 편차 (주말 증가)
+    weights = np.array([1.0 + 0.25 * ((start + timedelta(days=i)).weekday() >= 5) for i in range(days)])
+    rows_per_day = np.floor(n_rows * weights / weights.sum()).astype(np.int64)
+    rows_per_day[-1] += n_rows - rows_per_day.sum()
+
+    def write_partition(i):
+        day = start + timedelta(days=i)
+        rng = np.random.default_rng(child_seeds[i])
+        table = generate_day(day, int(rows_per_day[i]), vocabulary, failed_vocabulary, rng, **day_options)
+        if schema == 'aggregated':
+            table = aggregate_day(table)
+        path = os.path.join(out_dir, f"search_logs_{day.strftime('%Y%m%d')}.parquet")
+        pq.write_table(table, path, row_group_size=1_000_000)
+        return path, table.num_rows
+
+    # pyarrow 커널은 GIL을 해제하므로 스레드 병렬화가 유효
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = list(executor.map(write_partition, range(days)))
+
+    return [path for path, _ in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 검색 로그 parquet 생성기 (부하 테스트용)")
+    parser.add_argument('--out', default='data_storage', help="출력 디렉토리 (기본: data_storage)")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="원본 로그 총 행 수")
+    parser.add_argument('--start', default='2025-10-01', help="시작 일자 (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=61, help="생성 일수 (= 파티션 수)")
+    parser.add_argument('--schema', choices=['raw', 'aggregated'], default='raw',
+                        help="raw: 18개 컬럼 원본 로그 / aggregated: search_aggregated 스키마")
+    parser.add_argument('--vocab-size', type=int, default=200_000, help="정상 키워드 사전 크기")
+    parser.add_argument('--zipf', type=float, default=1.1, help="키워드 Zipf 지수")
+    parser.add_argument('--fail-rate', type=float, default=0.03, help="실패 검색(결과 0건) 비율")
+    parser.add_argument('--hostile-rate', type=float, default=0.01, help="악성 문자열 비율")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="병렬 파티션 수 (기본: CPU 수)")
+    args = parser.parse_args()
+
+    started = time.time()
+    files = generate_dataset(
+        out_dir=args.out,
+        n_rows=args.rows,
+        start=date.fromisoformat(args.start),
+        days=args.days,
+        schema=args.schema,
+        vocab_size=args.vocab_size,
+        seed=args.seed,
+        workers=args.workers,
+        zipf_exponent=args.zipf,
+        fail_rate=args.fail_rate,
+        hostile_rate=args.hostile_rate,
+    )
+    elapsed = time.time() - started
+    size_mb = sum(os.path.getsize(f) for f in files) / (1024 * 1024)
+    print(f"✓ {args.rows:,} rows ({args.schema}) → {len(files)} partitions in {args.out}/")
+    print(f"  Size: {size_mb:.1f}MB, Elapsed: {elapsed:.2f}s")
+
 
 if __name__ == "__main__":
-    generate_dummy_data()
+    main()
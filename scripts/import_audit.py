@@ -0,0 +1,58 @@
+"""
+워커 시작 비용 점검 (모듈별 콜드 import 시간)
+
+외부 패키지와 core/ 모듈을 각각 새 프로세스에서 import해 python -X importtime으로 측정합니다.
+설치되지 않은 패키지는 '-'로 표시됩니다. --json 결과를 벤치마크 결과와 함께 저장하면
+배포마다 시작 비용이 늘었는지 비교할 수 있습니다.
+
+사용법:
+    python scripts/import_audit.py
+    python scripts/import_audit.py --json import_audit.json
+    python scripts/import_audit.py --modules wordcloud supabase
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core')
+sys.path.insert(0, CORE_DIR)
+
+import lazy_imports  # noqa: E402
+
+# 워커가 시작할 때 import하는 core 모듈 (app.py → 각 모듈)
+CORE_MODULES = ('compute', 'agg_engine', 'hf_sync', 'data_loader', 'visualizations')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈별 콜드 import 시간 측정")
+    parser.add_argument('--modules', nargs='+', default=None,
+                        help="측정할 모듈 (기본: 외부 주요 패키지 + core 모듈)")
+    parser.add_argument('--json', default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    modules = args.modules or list(lazy_imports.HEAVY_MODULES) + list(CORE_MODULES)
+    results = lazy_imports.audit(modules, path=CORE_DIR)
+
+    print(f"{'module':<24}{'cumulative':>12}{'self':>10}{'wall':>10}")
+    for r in results:
+        if r['imported']:
+            print(f"{r['module']:<24}{r['cumulative_ms']:>10.1f}ms{r['self_ms']:>8.1f}ms{r['wall_ms']:>8.0f}ms")
+        else:
+            print(f"{r['module']:<24}{'-':>12}{'-':>10}{r['wall_ms']:>8.0f}ms  (not installed or import failed)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"✓ Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
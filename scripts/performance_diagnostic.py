@@ -71,10 +71,10 @@ if 'cached_trend_df' in st.session_state:
     st.sidebar.metric("데이터 행 수", f"{rows:,}")
     st.sidebar.metric("메모리 사용량", f"{memory_mb:.1f} MB")
 
-# 캐시 상태
-cache_info = st.cache_data.cache_info
-st.sidebar.text(f"캐시 히트: {cache_info.hits if hasattr(cache_info, 'hits') else 'N/A'}")
-st.sidebar.text(f"캐시 미스: {cache_info.misses if hasattr(cache_info, 'misses') else 'N/A'}")
+# 캐시 상태 (core/cache_metrics.py, 전체 화면은 ?admin=1)
+import cache_metrics
+for f in cache_metrics.snapshot():
+    st.sidebar.text(f"{f['function'].split('.')[-1]}: 히트 {f['hits']} / 미스 {f['misses']}")
 """
 
 # ===== 자세한 프로파일링 =====
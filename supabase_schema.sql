@@ -18,9 +18,15 @@ CREATE TABLE IF NOT EXISTS search_aggregated (
     result_total_count BIGINT DEFAULT 0, -- 결과 있는 검색 횟수
     uidx_count INTEGER DEFAULT 0,      -- 고유 사용자 수
     session_count INTEGER DEFAULT 0,   -- 세션 수
+    uidx_sketch INTEGER[],             -- 고유 사용자 HLL 스케치 (reg << 6 | rho, core/hll.py)
+    session_sketch INTEGER[],          -- 고유 세션 HLL 스케치 (세션 ID가 없는 원본은 NULL)
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- 기존 테이블에 스케치 컬럼 추가
+ALTER TABLE search_aggregated ADD COLUMN IF NOT EXISTS uidx_sketch INTEGER[];
+ALTER TABLE search_aggregated ADD COLUMN IF NOT EXISTS session_sketch INTEGER[];
+
 -- =====================================================
 -- 2. 인덱스 생성 (쿼리 성능 최적화)
 -- =====================================================
@@ -51,16 +57,89 @@ ON search_aggregated FOR SELECT
 USING (true);
 
 -- =====================================================
--- 4. 주간 키워드 통계 뷰 (선택적)
+-- 4. HLL 스케치 합집합/추정 함수
+-- =====================================================
+-- uidx_count는 그룹별 고유 수라 더하면 여러 그룹(일자/경로/연령 등)에 걸친 사용자가 중복 집계됨
+-- 스케치는 레지스터별 최댓값으로 합칠 수 있으므로 합친 뒤 추정 (상대 오차 약 0.8%, p=14)
+-- p는 마이그레이션 시 DASHBOARD_HLL_PRECISION과 같아야 함
+
+-- 레지스터별 최댓값만 남김 (압축 값의 상위 비트가 레지스터 번호 → 같은 레지스터 내 MAX = 최대 rho)
+CREATE OR REPLACE FUNCTION hll_union(sketch INTEGER[])
+RETURNS INTEGER[] AS $$
+    SELECT COALESCE(array_agg(v ORDER BY v), '{}')
+    FROM (SELECT MAX(v) AS v FROM unnest(sketch) AS v GROUP BY v >> 6) regs
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 집계 상태 함수: 행마다 바로 합쳐 상태를 레지스터 수(최대 2^p) 이하로 유지
+-- (array_cat으로 모두 이어 붙인 뒤 마지막에 합치면 메모리가 행 수에 비례하고 이어 붙이기 비용이 제곱으로 증가)
+CREATE OR REPLACE FUNCTION hll_union_state(state INTEGER[], sketch INTEGER[])
+RETURNS INTEGER[] AS $$
+    SELECT hll_union(array_cat(state, sketch))
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 스케치 합집합 집계 함수: hll_union_agg(uidx_sketch)
+CREATE OR REPLACE AGGREGATE hll_union_agg(INTEGER[]) (
+    SFUNC = hll_union_state,
+    STYPE = INTEGER[],
+    INITCOND = '{}'
+);
+
+-- 고유 개수 추정 (HLL 추정식 + 작은 값은 선형 계수, core/hll.py의 estimate와 동일)
+CREATE OR REPLACE FUNCTION hll_cardinality(sketch INTEGER[], p INTEGER DEFAULT 14)
+RETURNS DOUBLE PRECISION AS $$
+    WITH regs AS (
+        SELECT MAX(v & 63) AS rho FROM unnest(sketch) AS v GROUP BY v >> 6
+    ), stats AS (
+        SELECT
+            (2 ^ p)::DOUBLE PRECISION AS m,
+            (2 ^ p)::DOUBLE PRECISION - COUNT(*) AS zeros,
+            COALESCE(SUM(2 ^ (-rho)), 0)::DOUBLE PRECISION AS inverse
+        FROM regs
+    )
+    SELECT CASE
+        WHEN raw <= 2.5 * m AND zeros > 0 THEN m * ln(m / zeros)
+        ELSE raw
+    END
+    FROM (SELECT m, zeros, 0.7213 / (1 + 1.079 / m) * m * m / (inverse + zeros) AS raw FROM stats) e
+$$ LANGUAGE sql IMMUTABLE;
+
+-- =====================================================
+-- 5. 주간 키워드 통계 뷰 (선택적)
 -- =====================================================
+-- unique_users/unique_sessions: 스케치 합집합 추정 (스케치가 없는 행이 섞이면 기존 합계)
 CREATE OR REPLACE VIEW weekly_keyword_stats AS
 SELECT 
     logweek,
     search_keyword,
     SUM(total_count) as total_search_count,
     SUM(result_total_count) as result_search_count,
-    SUM(uidx_count) as unique_users,
-    SUM(session_count) as total_sessions
+    CASE WHEN COUNT(uidx_sketch) = COUNT(*)
+        THEN round(hll_cardinality(hll_union_agg(uidx_sketch)))::BIGINT
+        ELSE SUM(uidx_count)
+    END as unique_users,
+    SUM(session_count) as total_sessions,
+    CASE WHEN COUNT(session_sketch) = COUNT(*)
+        THEN round(hll_cardinality(hll_union_agg(session_sketch)))::BIGINT
+        ELSE SUM(session_count)
+    END as unique_sessions
 FROM search_aggregated
 GROUP BY logweek, search_keyword
 ORDER BY logweek DESC, total_search_count DESC;
+
+-- 기간 내 키워드별 고유 사용자/세션 수 (주차를 합친 합집합 추정)
+CREATE OR REPLACE FUNCTION get_keyword_unique_users(p_start_date INTEGER, p_end_date INTEGER)
+RETURNS TABLE (search_keyword TEXT, unique_users BIGINT, unique_sessions BIGINT) AS $$
+    SELECT
+        a.search_keyword,
+        CASE WHEN COUNT(a.uidx_sketch) = COUNT(*)
+            THEN round(hll_cardinality(hll_union_agg(a.uidx_sketch)))::BIGINT
+            ELSE SUM(a.uidx_count)
+        END,
+        CASE WHEN COUNT(a.session_sketch) = COUNT(*)
+            THEN round(hll_cardinality(hll_union_agg(a.session_sketch)))::BIGINT
+            ELSE SUM(a.session_count)
+        END
+    FROM search_aggregated a
+    WHERE a.logday BETWEEN p_start_date AND p_end_date
+    GROUP BY a.search_keyword
+$$ LANGUAGE sql STABLE;
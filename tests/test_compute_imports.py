@@ -0,0 +1,34 @@
+"""
+Streamlit 없는 계산 모듈의 import 점검
+
+compute/agg_engine은 배치 작업, 벤치마크, API 서버에서도 쓰므로 import만으로 Streamlit 런타임을 불러오면 안 됩니다.
+(pytest 프로세스에 이미 로드된 모듈의 영향을 받지 않도록 새 프로세스에서 확인)
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_DIR = os.path.join(ROOT_DIR, 'core')
+
+
+def _loads_streamlit(statement, cwd=CORE_DIR):
+    result = subprocess.run(
+        [sys.executable, '-c', f"import sys; {statement}; print('streamlit' in sys.modules)"],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip().splitlines()[-1] == 'True'
+
+
+def test_compute_does_not_import_streamlit():
+    assert not _loads_streamlit("import compute")
+
+
+def test_agg_engine_does_not_import_streamlit():
+    assert not _loads_streamlit("import agg_engine, parallel_agg")
+
+
+def test_core_package_imports():
+    """루트 app.py처럼 core 패키지 경로로 import (모듈별 from core import ... 폴백)"""
+    assert not _loads_streamlit("from core import compute, agg_engine", cwd=ROOT_DIR)
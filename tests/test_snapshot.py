@@ -0,0 +1,54 @@
+"""
+전처리 스냅샷 zero-copy 로드 점검
+
+스냅샷은 압축 없는 Arrow IPC 파일을 mmap으로 읽으므로 문자열 컬럼도 파일 매핑 영역을 그대로 가리켜야 합니다.
+(pandas 2.x 기본 변환처럼 object 배열로 바뀌면 스냅샷 크기만큼 사본이 생김)
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+import data_loader  # noqa: E402
+
+STRING_COLUMNS = ['검색어', '속성', 'uidx']
+
+
+def _mapped_ranges(path):
+    """현재 프로세스에서 path를 매핑한 주소 범위 (/proc/self/maps)"""
+    ranges = []
+    with open('/proc/self/maps') as f:
+        for line in f:
+            if line.rstrip().endswith(os.path.realpath(path)):
+                start, end = (int(x, 16) for x in line.split()[0].split('-'))
+                ranges.append((start, end))
+    return ranges
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/maps'), reason="메모리 매핑 정보(/proc) 필요")
+def test_snapshot_string_columns_share_mmap_buffers(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(data_loader, 'SNAPSHOT_FILE', str(tmp_path / 'preprocessed.arrow'))
+    df = pd.DataFrame({
+        '검색어': ['제주', '부산', None, '오사카'] * 256,
+        '속성': ['MDA', 'DCM', 'DCP', 'MDA'] * 256,
+        'uidx': ['C001', None, 'U002', 'C003'] * 256,
+        '검색결과수': range(1024),
+    })
+    data_loader._write_snapshot(df, 'fingerprint')
+
+    loaded = data_loader._read_snapshot('fingerprint')
+    ranges = _mapped_ranges(data_loader.SNAPSHOT_FILE)
+    assert ranges
+    for column in STRING_COLUMNS:
+        chunks = loaded[column].array._pa_array.chunks
+        for chunk in chunks:
+            data = chunk.buffers()[2]
+            assert any(start <= data.address < end for start, end in ranges), column
+        # 값/결측은 원본과 동일 (결측은 NaN)
+        assert loaded[column].isna().tolist() == df[column].isna().tolist()
+        assert loaded[column].dropna().tolist() == df[column].dropna().tolist()
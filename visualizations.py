@@ -1,11 +1,14 @@
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
 import streamlit as st
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import os
 
+# [NEW] 무거운 시각화 패키지는 첫 사용 시 import (워드클라우드/matplotlib는 실패 검색어 워드클라우드에서만)
+from core.lazy_imports import lazy
+px = lazy('plotly.express')
+go = lazy('plotly.graph_objects')
+wordcloud = lazy('wordcloud')
+plt = lazy('matplotlib.pyplot')
+
 def plot_weekly_trend(df):
     """
     #1: Daily Traffic Comparison by Week (Grouped Bar)
@@ -658,7 +661,7 @@ def plot_failed_keywords_wordcloud(df):
         if not os.path.exists(font_file):
             font_file = os.path.join(os.path.dirname(current_dir), 'assets', 'JOURNEYITSELF-REGULAR 3.TTF')
 
-        wc = WordCloud(
+        wc = wordcloud.WordCloud(
             font_path=font_file if os.path.exists(font_file) else None,
             width=600, 
             height=1000,
@@ -675,7 +678,7 @@ def plot_failed_keywords_wordcloud(df):
         use_default_font = True
         
     if use_default_font:
-        wc = WordCloud(
+        wc = wordcloud.WordCloud(
             font_path=None, 
             width=1000, 
             height=600, 